@@ -1,15 +1,26 @@
 import streamlit as st
 import pandas as pd
-import folium
 from pathlib import Path
-import zipfile
-import io
-import time
+import os
 import base64
 from streamlit_lottie import st_lottie
 import json
-import requests
 import random
+import uuid
+
+from gpsviz.assets import load_lottie_assets
+from gpsviz.clustering import DEFAULT_EPS_M, DEFAULT_MIN_SAMPLES
+from gpsviz.columnar import DATASET_NAME
+from gpsviz.decimate import DEFAULT_BUDGET
+from gpsviz.ingest import PREVIEW_ROWS, IngestCache, content_key
+from gpsviz.instrumentation import RunTrace, stage
+from gpsviz.jobs import JobQueue
+from gpsviz.pipeline import EXPORT_FORMATS, MAP_TYPES, MapOptions, generate_upload
+from gpsviz.render_cache import RenderCache
+from gpsviz.rendering import RENDER_MODES
+from gpsviz.results import ResultStore, StoredRun
+from gpsviz.summary import summarize
+from gpsviz.trajectory import DEFAULT_TOLERANCE_M
 
 # Set page configuration
 st.set_page_config(
@@ -19,20 +30,107 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Function to load Lottie animation
-def load_lottieurl(url: str):
-    try:
-        r = requests.get(url)
-        if r.status_code != 200:
-            return None
-        return r.json()
-    except:
-        return None
+# Lottie animations, loaded once per server from local files (network only as a fallback)
+@st.cache_resource(show_spinner=False)
+def get_lottie_assets():
+    return load_lottie_assets()
+
+# Parsed uploads, shared by all sessions
+@st.cache_resource
+def get_ingest_cache():
+    return IngestCache()
+
+# Rendered maps on disk, reused when a group's map would come out the same
+@st.cache_resource
+def get_render_cache():
+    return RenderCache()
+
+# Background generation jobs, shared by all sessions
+@st.cache_resource
+def get_job_queue():
+    return JobQueue()
+
+# Status shown while a job is in each of its stages
+JOB_STAGE_TEXT = {
+    None: "⏳ Waiting for a free worker...",
+    "load": "📂 Loading selected columns...",
+    "clean": "🧹 Cleaning coordinate data...",
+    "stream": "🧹 Cleaning coordinate data...",
+    "order": "⏱️ Ordering points by time...",
+    "cluster": "🧭 Clustering points...",
+    "maps": "🗺️ Creating maps...",
+    "zip": "📦 Finalizing download package...",
+}
+
+@st.fragment(run_every=0.5)
+def show_job_progress(key):
+    """Live progress of a background job; reruns the page once it has finished."""
+    job = get_job_queue().get(key)
+    if job is None or job.finished:
+        st.rerun()
+    text = JOB_STAGE_TEXT.get(job.stage, job.stage)
+    if job.stage is None:
+        text += f" ({get_job_queue().position(job)} job(s) ahead)"
+    elif job.stage == "stream":
+        text += f" {job.done:,} rows read"
+    elif job.total:
+        text += f" {job.done:,} of {job.total:,}"
+    st.progress(job.progress, text=f"{text} · {job.seconds:.0f} s")
+
+# Identifies this session's submissions to the job queue
+def session_token():
+    if "session_token" not in st.session_state:
+        st.session_state["session_token"] = uuid.uuid4().hex
+    return st.session_state["session_token"]
+
+# Generated runs of this session, kept across reruns
+def get_session_results():
+    if "results" not in st.session_state:
+        st.session_state["results"] = ResultStore()
+    return st.session_state["results"]
+
+def show_generated(run):
+    """Success message, ZIP download and switchable map preview of a stored run."""
+    st.markdown(f"""
+    <div class="success-message">
+        <h4>✅ Successfully Generated {run.info['maps']} Map(s)</h4>
+        <p>{'Maps created for groups' if run.info['grouped'] else 'Single map created'} with {run.info['labels']} labeling variables.</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    st.download_button(
+        "📥 Download All Maps (ZIP)",
+        data=run.zip_bytes,
+        file_name="generated_maps.zip",
+        mime="application/zip",
+        use_container_width=True
+    )
+    
+    if not run.maps:
+        return
+    st.markdown("### 🗺️ Map Preview")
+    choice = 0
+    if len(run.maps) > 1:
+        # Switching only renders (or unzips) the chosen map, once
+        choice = st.selectbox(
+            "**Preview map**",
+            options=range(len(run.maps)),
+            format_func=lambda i: run.maps[i][1],
+            help="Pick any generated map to preview it without generating again"
+        )
+    with stage("preview render"):
+        preview_html = run.preview(run.maps[choice][0])
+    if preview_html is None:
+        st.info("This map is too large to preview here. Download the ZIP to open it.")
+    else:
+        with stage("preview embed"):
+            st.components.v1.html(preview_html, height=400)
 
 # Load animations
-lottie_loading = load_lottieurl("https://assets1.lottiefiles.com/packages/lf20_raiw2hpe.json")
-lottie_map = load_lottieurl("https://assets1.lottiefiles.com/packages/lf20_kyOW06.json")
-lottie_plotting = load_lottieurl("https://assets1.lottiefiles.com/packages/lf20_ot6erjsc.json")
+lottie_assets = get_lottie_assets()
+lottie_loading = lottie_assets["loading"]
+lottie_map = lottie_assets["map"]
+lottie_plotting = lottie_assets["plotting"]
 
 # High-quality, relevant images for the tool
 slideshow_images = [
@@ -195,7 +293,7 @@ st.markdown('<p class="developer-name">Developed by Milan Seemon</p>', unsafe_al
 st.markdown("""
 <div class="coming-soon">
     <h3>🚀 Coming Soon: Advanced Data Analysis Interface</h3>
-    <p>We're working on adding powerful analytical capabilities including clustering, heatmaps, route optimization, and statistical analysis!</p>
+    <p>Clustering, heatmaps and trajectories are available now in the map options below. We're working on adding route optimization and statistical analysis next!</p>
 </div>
 """, unsafe_allow_html=True)
 
@@ -210,7 +308,7 @@ for i, col in enumerate(cols):
 with st.sidebar:
     st.markdown("### ℹ️ Instructions:")
     st.info("""
-    1. Upload your dataset (Excel or CSV format)
+    1. Upload your dataset (Excel, CSV, Parquet or Feather format)
     2. Ensure your file contains columns named **'latitude'** and **'longitude'** for map visualization
     3. Select variables for grouping or labeling
     4. Generate visualizations and download results
@@ -235,6 +333,18 @@ with st.sidebar:
     st.dataframe(sample_data, use_container_width=True)
 
     
+    st.markdown("---")
+    st.markdown("### ⏱️ Performance")
+    show_timings = st.checkbox(
+        "Show performance panel",
+        value=False,
+        help="Times each stage of a generation (read, detect, clean, group split, render, zip, preview) with rows and peak memory, shown at the bottom of the sidebar and downloadable as JSON"
+    )
+    profile_run = trace_memory = False
+    if show_timings:
+        profile_run = st.checkbox("Profile with cProfile", value=False, help="Adds the slowest functions to the panel. Slows the run down.")
+        trace_memory = st.checkbox("Trace memory allocations", value=False, help="Adds the peak Python allocation of each stage (tracemalloc). Slows the run down noticeably.")
+    
     # Contact information in sidebar
     st.markdown("---")
     st.markdown("""
@@ -245,6 +355,14 @@ with st.sidebar:
     </div>
     """, unsafe_allow_html=True)
 
+# Per-stage timings of this run; the stage() hooks in gpsviz record into it
+previous_trace = st.session_state.get("running_trace")
+if previous_trace is not None:
+    # A run that ended early (st.stop or an error) left its trace running
+    previous_trace.stop()
+run_trace = RunTrace(profile=profile_run, trace_memory=trace_memory).start() if show_timings else None
+st.session_state["running_trace"] = run_trace
+
 # Main content
 st.markdown("""
 <div class="info-box">
@@ -259,7 +377,15 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-uploaded_file = st.file_uploader("**Upload your Excel or CSV file**", type=["xlsx", "csv"], help="Supported formats: Excel (.xlsx) or CSV (.csv)")
+ingest_mode = st.radio(
+    "**Data loading mode**",
+    options=["standard", "typed", "streaming"],
+    format_func={"standard": "Standard", "typed": "⚡ Fast typed", "streaming": "🌊 Streaming (CSV larger than memory)"}.get,
+    horizontal=True,
+    help="Fast typed reads only the header and a preview on upload, then loads just the selected columns with numeric coordinates when you generate. Streaming processes the CSV in chunks and writes maps group by group."
+)
+
+uploaded_file = st.file_uploader("**Upload your Excel, CSV or Parquet file**", type=["xlsx", "csv", "parquet", "feather", "arrow"], help="Supported formats: Excel (.xlsx), CSV (.csv), Parquet (.parquet) or Feather (.feather, .arrow). Parquet and Feather files load fastest: they need no parsing and only the selected columns are read.")
 
 if uploaded_file:
     # Show loading animation
@@ -274,30 +400,39 @@ if uploaded_file:
         # Load data
         status_text.text("📂 Reading uploaded file...")
         progress_bar.progress(20)
-        time.sleep(0.5)
         
         try:
-            if uploaded_file.name.endswith('xlsx'):
-                df = pd.read_excel(uploaded_file, dtype=str)
-            else:
-                df = pd.read_csv(uploaded_file, dtype=str)
+            # Parsed once per distinct upload and shared across reruns and sessions
+            if ingest_mode == "streaming" and not uploaded_file.name.lower().endswith('.csv'):
+                st.info("🌊 Streaming mode reads CSV files only. Using fast typed loading for this file.")
+                ingest_mode = "typed"
+            with stage("read"):
+                if ingest_mode != "standard":
+                    # Header and preview rows only; the data is loaded on generation
+                    dataset = get_ingest_cache().get_or_load(uploaded_file.getvalue(), uploaded_file.name, nrows=PREVIEW_ROWS)
+                else:
+                    dataset = get_ingest_cache().get_or_load(uploaded_file.getvalue(), uploaded_file.name)
+            df = dataset.frame
         except Exception as e:
             st.markdown(f"""
             <div class="error-message">
                 <h4>❌ Error Reading File</h4>
                 <p>There was an error reading your file: {str(e)}</p>
-                <p>Please ensure you've uploaded a valid Excel or CSV file.</p>
+                <p>Please ensure you've uploaded a valid Excel, CSV, Parquet or Feather file.</p>
             </div>
             """, unsafe_allow_html=True)
             st.stop()
         
         progress_bar.progress(50)
-        time.sleep(0.5)
         
+        if ingest_mode != "standard":
+            row_info = f"Found {len(df.columns)} columns. Selected columns are loaded when you generate."
+        else:
+            row_info = f"Found {len(df)} rows and {len(df.columns)} columns."
         st.markdown(f"""
         <div class="success-message">
             <h4>✅ File Successfully Uploaded!</h4>
-            <p>Found {len(df)} rows and {len(df.columns)} columns.</p>
+            <p>{row_info}</p>
         </div>
         """, unsafe_allow_html=True)
         
@@ -308,9 +443,8 @@ if uploaded_file:
         status_text.text("🔍 Analyzing data structure...")
         progress_bar.progress(70)
         
-        # Detect latitude and longitude columns (case insensitive)
-        lat_col = next((col for col in df.columns if 'latitude' in col.lower() or 'lat' in col.lower()), None)
-        lon_col = next((col for col in df.columns if 'longitude' in col.lower() or 'lon' in col.lower() or 'lng' in col.lower()), None)
+        # Latitude and longitude columns were detected at ingestion (case insensitive)
+        lat_col, lon_col = dataset.lat_col, dataset.lon_col
         
         progress_bar.progress(90)
         
@@ -355,170 +489,270 @@ if uploaded_file:
         if lat_col and lon_col:
             visualize_map = st.checkbox("🗺️ Visualize map using GPS coordinates", value=True)
         
+        cluster_points = False
+        if visualize_map:
+            cluster_points = st.checkbox(
+                "🧭 Cluster points automatically",
+                value=False,
+                help="Groups nearby points with DBSCAN and creates one map per cluster (combined with any grouping variables). Points in no cluster are mapped as 'noise'."
+            )
+            if cluster_points:
+                col1, col2 = st.columns(2)
+                with col1:
+                    cluster_eps = st.number_input(
+                        "**Cluster distance (metres)**",
+                        min_value=1.0,
+                        value=DEFAULT_EPS_M,
+                        step=50.0,
+                        help="Points closer than this are neighbours"
+                    )
+                with col2:
+                    cluster_min_points = st.number_input(
+                        "**Minimum points per cluster core**",
+                        min_value=1,
+                        value=DEFAULT_MIN_SAMPLES,
+                        help="A point starts a cluster when at least this many points (itself included) are within the cluster distance"
+                    )
+        
+        map_type = "points"
+        heat_weight = None
+        time_col = None
+        track_tolerance = DEFAULT_TOLERANCE_M
+        if visualize_map:
+            map_type = st.radio(
+                "**Map type**",
+                options=list(MAP_TYPES),
+                format_func={"points": "📍 Points", "heatmap": "🔥 Heatmap", "trajectory": "🛣️ Trajectory"}.get,
+                horizontal=True,
+                help="Heatmaps are binned on the server, so they stay fast for any number of rows. The density grid is also exported as GeoJSON. Trajectories connect the points in time order (one track per group) and draw each track as a simplified line."
+            )
+            if map_type == "heatmap":
+                heat_weight = st.selectbox(
+                    "**Heatmap weight**",
+                    options=[None] + df.columns.tolist(),
+                    format_func=lambda col: "Point count" if col is None else col,
+                    help="Numeric column summed per grid cell (e.g. population). Non-numeric values count as 0."
+                )
+            if map_type == "trajectory":
+                columns = df.columns.tolist()
+                col1, col2 = st.columns(2)
+                with col1:
+                    time_col = st.selectbox(
+                        "**Time column**",
+                        options=columns,
+                        index=next((i for i, col in enumerate(columns) if "time" in col.lower() or "date" in col.lower()), 0),
+                        help="Points are connected in the order of this column (dates and times, or numbers such as epoch seconds). Rows without a valid value are left out."
+                    )
+                with col2:
+                    track_tolerance = st.number_input(
+                        "**Track simplification (metres)**",
+                        min_value=0.0,
+                        value=DEFAULT_TOLERANCE_M,
+                        step=5.0,
+                        help="Points closer than this to the simplified line are dropped, which keeps the shape of the route with far fewer vertices. Set to 0 to keep every point."
+                    )
+        
+        with st.expander("⚙️ Performance Options"):
+            render_mode = st.selectbox(
+                "**Map rendering mode**",
+                options=list(RENDER_MODES),
+                format_func={"serial": "Serial", "thread": "Thread pool", "process": "Process pool"}.get,
+                help="Render group maps in parallel. Process pools use all CPU cores for large grouped uploads."
+            )
+            render_workers = st.number_input(
+                "**Rendering workers**",
+                min_value=1,
+                max_value=os.cpu_count() or 1,
+                value=os.cpu_count() or 1,
+                help="Number of maps rendered at the same time in thread/process mode"
+            )
+            reuse_maps = st.checkbox(
+                "Reuse unchanged maps from earlier runs",
+                value=True,
+                help="Maps whose points, labels and title are unchanged are read from a disk cache instead of being rendered again"
+            )
+            preview_budget = st.number_input(
+                "**Preview point budget**",
+                min_value=0,
+                value=DEFAULT_BUDGET,
+                step=1000,
+                help="Dense points are merged into weighted markers so the preview stays fast for any dataset size. Set to 0 to preview every point."
+            )
+            lod_exports = st.checkbox(
+                "Apply the point budget to downloaded maps too",
+                value=False,
+                help="Each exported map then holds at most this many markers"
+            )
+            export_format = st.selectbox(
+                "**Export format**",
+                options=list(EXPORT_FORMATS),
+                format_func={
+                    "html": "Interactive HTML maps",
+                    "bundle": "Shared viewer + data files (many groups)",
+                    "tiles": "Tiled maps (very large datasets)"
+                }.get,
+                help="The shared viewer writes the map page once and one small data file per group, which keeps ZIPs with thousands of groups small: extract it and open index.html to browse every map. Tiled maps split the points into zoom-level tiles that the map loads on demand, so maps with millions of points open instantly: open each map's index.html. Not available in streaming mode."
+            )
+            export_dataset = st.checkbox(
+                "Include the cleaned dataset (Parquet)",
+                value=False,
+                help=f"Adds {DATASET_NAME} to the download: every row with valid coordinates, typed, with its cluster, the map it is drawn on and that map's center. Re-upload it or read it with pandas to skip parsing next time."
+            )
+        
         progress_bar.progress(100)
-        time.sleep(0.5)
         progress_bar.empty()
         status_text.empty()
         
+        options = MapOptions(
+            tuple(group_vars), tuple(label_vars), map_type, heat_weight, cluster_points,
+            cluster_eps if cluster_points else DEFAULT_EPS_M,
+            int(cluster_min_points) if cluster_points else DEFAULT_MIN_SAMPLES,
+            export_format, preview_budget if lod_exports else 0, render_mode, render_workers,
+            time_col, track_tolerance, export_dataset,
+        )
+        # Everything that changes the generated maps; the pool settings do not
+        result_key = (
+            content_key(uploaded_file.getvalue(), uploaded_file.name, {}), ingest_mode, visualize_map,
+            options._replace(render_mode="serial", render_workers=None), preview_budget,
+        )
+        
         if st.button("🚀 Generate Visualization", use_container_width=True):
-            if not label_vars and not group_vars:
+            if not label_vars and not group_vars and not cluster_points and map_type == "points":
                 st.markdown("""
                 <div class="error-message">
                     <h4>❌ Selection Required</h4>
                     <p>Please select at least one labeling variable or grouping variable.</p>
                 </div>
                 """, unsafe_allow_html=True)
+            elif visualize_map and lat_col and lon_col:
+                # Maps are generated by a background job; identical submissions
+                # (from this or any other session) share the same job
+                job_mode = ingest_mode
+                if job_mode == "streaming" and (cluster_points or map_type != "points" or export_dataset):
+                    st.info("🧭 Clustering, heatmaps, trajectories and the dataset export need all points at once. Using fast typed loading instead of streaming.")
+                    job_mode = "typed"
+                get_job_queue().submit(
+                    result_key, generate_upload, uploaded_file.getvalue(), uploaded_file.name, job_mode,
+                    lat_col, lon_col, options, preview_budget, get_ingest_cache(),
+                    get_render_cache() if reuse_maps else None,
+                    trace=RunTrace(profile=profile_run, trace_memory=trace_memory) if show_timings else None,
+                    owner=session_token()
+                )
+                st.session_state["pending_job"] = result_key
             else:
                 # Create a status container
                 status_text = st.empty()
+                if run_trace is not None:
+                    st.session_state["perf_traces"] = [("This run", run_trace)]
                 
-                # If map visualization requested and GPS coordinates are detected
-                if visualize_map and lat_col and lon_col:
-                    status_text.text("🧹 Cleaning coordinate data...")
-                    
-                    # Clean coordinates
-                    df[lat_col] = pd.to_numeric(df[lat_col], errors='coerce')
-                    df[lon_col] = pd.to_numeric(df[lon_col], errors='coerce')
-                    df_clean = df.dropna(subset=[lat_col, lon_col])
-                    
-                    if df_clean.empty:
-                        st.markdown("""
-                        <div class="error-message">
-                            <h4>❌ No Valid Coordinates</h4>
-                            <p>No valid coordinates found after cleaning. Please check your data.</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    else:
-                        status_text.text("🗺️ Creating maps...")
-                        
-                        # Show plotting animation
-                        if lottie_plotting:
-                            st_lottie(lottie_plotting, height=200, key="plotting")
-                        
-                        map_files = {}
-                        progress_bar = st.progress(0)
-                        
-                        # Determine if we're creating a single map or multiple grouped maps
-                        if group_vars:
-                            # Use first grouping variable for map creation
-                            group_var = group_vars[0]
-                            unique_groups = df_clean[group_var].unique()
-                            
-                            for i, grp in enumerate(unique_groups):
-                                df_grp = df_clean[df_clean[group_var] == grp]
-                                if df_grp.empty:
-                                    continue
-                                
-                                center = [df_grp[lat_col].median(), df_grp[lon_col].median()]
-                                m = folium.Map(location=center, zoom_start=12)
-                                
-                                for _, row in df_grp.iterrows():
-                                    # Create popup text with all label variables
-                                    popup_text = "<br>".join([f"<b>{var}:</b> {row[var]}" for var in label_vars]) if label_vars else f"{group_var}: {row[group_var]}"
-                                    
-                                    folium.CircleMarker(
-                                        location=[row[lat_col], row[lon_col]],
-                                        radius=5,
-                                        color='#2E86AB',
-                                        fill=True,
-                                        fill_color='#2E86AB',
-                                        fill_opacity=0.7,
-                                        popup=popup_text
-                                    ).add_to(m)
-                                
-                                # Add group name to map
-                                title_html = f'''
-                                    <h3 align="center" style="font-size:16px"><b>{group_var}: {grp}</b></h3>
-                                    '''
-                                m.get_root().html.add_child(folium.Element(title_html))
-                                
-                                safe_name = "".join(c if c.isalnum() else "_" for c in str(grp))
-                                html_str = m.get_root().render()
-                                map_files[f"{safe_name}_map.html"] = html_str
-                                
-                                progress_bar.progress((i + 1) / len(unique_groups))
-                        else:
-                            # Create a single map with all points
-                            center = [df_clean[lat_col].median(), df_clean[lon_col].median()]
-                            m = folium.Map(location=center, zoom_start=12)
-                            
-                            for _, row in df_clean.iterrows():
-                                # Create popup text with all label variables
-                                popup_text = "<br>".join([f"<b>{var}:</b> {row[var]}" for var in label_vars]) if label_vars else "Location"
-                                
-                                folium.CircleMarker(
-                                    location=[row[lat_col], row[lon_col]],
-                                    radius=5,
-                                    color='#2E86AB',
-                                    fill=True,
-                                    fill_color='#2E86AB',
-                                    fill_opacity=0.7,
-                                    popup=popup_text
-                                ).add_to(m)
-                            
-                            # Add title to map
-                            title_html = '''
-                                <h3 align="center" style="font-size:16px"><b>All Locations</b></h3>
-                                '''
-                            m.get_root().html.add_child(folium.Element(title_html))
-                            
-                            html_str = m.get_root().render()
-                            map_files["all_locations_map.html"] = html_str
-                            progress_bar.progress(100)
-                        
-                        status_text.text("📦 Finalizing download package...")
-                        
-                        # Package maps as ZIP for download
-                        zip_buffer = io.BytesIO()
-                        with zipfile.ZipFile(zip_buffer, "w") as zf:
-                            for fname, html_str in map_files.items():
-                                zf.writestr(fname, html_str)
-                        zip_buffer.seek(0)
-                        
-                        status_text.empty()
-                        progress_bar.empty()
-                        
-                        st.markdown(f"""
-                        <div class="success-message">
-                            <h4>✅ Successfully Generated {len(map_files)} Map(s)</h4>
-                            <p>{'Maps created for groups' if group_vars else 'Single map created'} with {len(label_vars)} labeling variables.</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        st.download_button(
-                            "📥 Download All Maps (ZIP)",
-                            data=zip_buffer,
-                            file_name="generated_maps.zip",
-                            mime="application/zip",
-                            use_container_width=True
+                if ingest_mode != "standard":
+                    status_text.text("📂 Loading selected columns...")
+                    with stage("read columns"):
+                        dataset = get_ingest_cache().get_or_load(
+                            uploaded_file.getvalue(), uploaded_file.name,
+                            typed=True, columns=options.columns()
                         )
-                        
-                        # Show sample map
-                        if map_files:
-                            sample_key = list(map_files.keys())[0]
-                            st.markdown("### 🗺️ Map Preview")
-                            st.components.v1.html(map_files[sample_key], height=400)
-                else:
-                    status_text.text("📊 Generating summary...")
-                    st.markdown("""
-                    <div class="warning-message">
-                        <h4>📊 Data Summary</h4>
-                        <p>Map visualization skipped or unavailable. Showing data summary instead.</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    if group_vars:
-                        summary = df[group_vars].drop_duplicates()
-                        st.write("**Unique combinations:**")
-                        st.dataframe(summary)
-                    
-                    # Show basic statistics if numerical columns exist
-                    numeric_cols = df.select_dtypes(include=['number']).columns
-                    if len(numeric_cols) > 0:
-                        st.write("**Basic statistics:**")
-                        st.dataframe(df[numeric_cols].describe())
-                    
-                    status_text.empty()
+                    df = dataset.frame
+                
+                status_text.text("📊 Generating summary...")
+                st.markdown("""
+                <div class="warning-message">
+                    <h4>📊 Data Summary</h4>
+                    <p>Map visualization skipped or unavailable. Showing data summary instead.</p>
+                </div>
+                """, unsafe_allow_html=True)
+                
+                # Numeric columns are inferred from the values, so text-read uploads work too
+                with stage("summary", rows=len(df)):
+                    summary = summarize(df, group_vars)
+                
+                if summary.groups is not None:
+                    st.write(f"**Unique combinations:** {len(summary.groups):,}")
+                    st.dataframe(summary.groups, hide_index=True)
+                
+                # Show basic statistics if numerical columns exist
+                if summary.numeric:
+                    st.write("**Basic statistics:**")
+                    st.dataframe(summary.stats, hide_index=True)
+                
+                status_text.empty()
+        
+        # Poll the job for these options; changing an option leaves it running
+        # in the background and coming back to them picks it up again
+        pending_job = None
+        if st.session_state.get("pending_job") == result_key:
+            pending_job = get_job_queue().get(result_key)
+        if pending_job is not None and not pending_job.finished:
+            if lottie_plotting:
+                st_lottie(lottie_plotting, height=200, key="plotting")
+            show_job_progress(result_key)
+        elif pending_job is not None:
+            st.session_state["pending_job"] = None
+            # From here on the result is held by this session's ResultStore only
+            job_result = get_job_queue().take(pending_job, session_token())
+            if pending_job.trace is not None:
+                # The job's stages, then this run's reading, detection and preview
+                st.session_state["perf_traces"] = [("Generation job", pending_job.trace)]
+                if run_trace is not None:
+                    st.session_state["perf_traces"].append(("Page run", run_trace))
+            if pending_job.error:
+                st.markdown(f"""
+                <div class="error-message">
+                    <h4>❌ Map Generation Failed</h4>
+                    <p>{pending_job.error}</p>
+                </div>
+                """, unsafe_allow_html=True)
+            elif job_result is None:
+                st.markdown("""
+                <div class="error-message">
+                    <h4>❌ No Valid Coordinates</h4>
+                    <p>No valid coordinates found after cleaning. Please check your data.</p>
+                </div>
+                """, unsafe_allow_html=True)
+            else:
+                # Kept for this session; shown below on this and later reruns
+                get_session_results().put(StoredRun(result_key, *job_result))
+                for note in job_result.info["notes"]:
+                    st.info(note)
+        
+        # The run for this data and these options survives reruns (downloads,
+        # switching the preview) until the upload or an option changes
+        stored_run = get_session_results().get(result_key)
+        if stored_run is not None:
+            show_generated(stored_run)
+
+if run_trace is not None:
+    run_trace.stop()
+    st.session_state["running_trace"] = None
+
+# Performance panel for the last generation in this session
+if show_timings:
+    with st.sidebar:
+        st.markdown("### ⏱️ Last Generation")
+        last_traces = st.session_state.get("perf_traces")
+        if not last_traces:
+            st.caption("Generate a visualization to see where the time goes.")
+        else:
+            for title, last_trace in last_traces:
+                st.markdown(f"**{title}**")
+                st.caption(f"Total run time: {last_trace.seconds:.2f} s")
+                st.dataframe(pd.DataFrame(last_trace.summary()), use_container_width=True, hide_index=True)
+                for name, items in last_trace.items.items():
+                    st.caption(f"{name}: {items['count']} map(s), {items['mean']:.3f} s on average, slowest {items['max']:.3f} s")
+                profile = last_trace.profile_text()
+                if profile:
+                    with st.expander(f"🔬 cProfile (cumulative time) · {title}"):
+                        st.code(profile)
+                if last_trace.memory_top:
+                    with st.expander(f"🧠 Top memory allocations · {title}"):
+                        st.dataframe(pd.DataFrame(last_trace.memory_top), use_container_width=True, hide_index=True)
+            st.download_button(
+                "📥 Download timings (JSON)",
+                data=json.dumps({title: last_trace.to_dict() for title, last_trace in last_traces}, indent=2),
+                file_name="gpsviz_timings.json",
+                mime="application/json",
+                use_container_width=True
+            )
 
 # Footer with enhanced contact information
 st.markdown("---")
@@ -0,0 +1,64 @@
+"""Archive size and build time: one HTML page per group vs the shared viewer.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_bundle --rows 100000 --groups 100 1000 5000
+"""
+import argparse
+import io
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from gpsviz.bundle import BundleWriter
+from gpsviz.grouping import split_groups
+from gpsviz.packaging import MapArchive
+from gpsviz.rendering import group_tasks, render_maps
+
+
+def make_frame(rows: int, groups: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "village": rng.integers(0, groups, rows).astype(str),
+        "latitude": rng.uniform(8.0, 35.0, rows),
+        "longitude": rng.uniform(68.0, 97.0, rows),
+        "category": rng.choice(["A", "B", "C"], rows),
+    })
+
+
+def html_export(tasks, archive):
+    for filename, html, _ in render_maps(tasks):
+        archive.add(filename, html)
+
+
+def bundle_export(tasks, archive):
+    writer = BundleWriter(archive)
+    for task in tasks:
+        writer.add(task)
+    writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--groups", type=int, nargs="+", default=[100, 1_000, 5_000])
+    args = parser.parse_args(argv)
+
+    print(f"{'groups':>7} {'format':>7} {'seconds':>8} {'raw MB':>8} {'zip MB':>8}")
+    for groups in args.groups:
+        df = make_frame(args.rows, groups)
+        split = split_groups(df, ["village"], "latitude", "longitude")
+        for name, export in (("html", html_export), ("bundle", bundle_export)):
+            archive = MapArchive()
+            start = time.perf_counter()
+            export(group_tasks(split, ["village"], ["category"], "latitude", "longitude"), archive)
+            data = archive.getvalue()
+            elapsed = time.perf_counter() - start
+            raw = sum(info.file_size for info in zipfile.ZipFile(io.BytesIO(data)).infolist())
+            print(f"{groups:>7} {name:>7} {elapsed:>8.2f} {raw / 1e6:>8.2f} {len(data) / 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Wall time of the grid DBSCAN on clustered synthetic GPS points.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_clustering --rows 10000 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from gpsviz.clustering import NOISE, dbscan
+
+
+def make_points(rows: int, centers: int = 200, noise: float = 0.1, seed: int = 0):
+    # Settlements of ~2 km spread over a country, plus uniform noise
+    rng = np.random.default_rng(seed)
+    hubs = rng.uniform([8.0, 68.0], [35.0, 97.0], (centers, 2))
+    clustered = int(rows * (1 - noise))
+    pts = np.concatenate([
+        hubs[rng.integers(0, centers, clustered)] + rng.normal(0, 0.02, (clustered, 2)),
+        rng.uniform([8.0, 68.0], [35.0, 97.0], (rows - clustered, 2)),
+    ])
+    return pts[:, 0], pts[:, 1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--eps", type=float, nargs="+", default=[250.0, 1000.0])
+    parser.add_argument("--min-samples", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>10} {'eps m':>7} {'seconds':>8} {'clusters':>9} {'noise %':>8}")
+    for rows in args.rows:
+        lat, lon = make_points(rows)
+        for eps in args.eps:
+            start = time.perf_counter()
+            labels = dbscan(lat, lon, eps, args.min_samples)
+            elapsed = time.perf_counter() - start
+            print(f"{rows:>10} {eps:>7.0f} {elapsed:>8.2f} {labels.max() + 1:>9} "
+                  f"{(labels == NOISE).mean() * 100:>7.1f}%")
+
+
+if __name__ == "__main__":
+    main()
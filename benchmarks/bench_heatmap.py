@@ -0,0 +1,52 @@
+"""Heatmap page size and build time: binned density grids next to raw points.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_heatmap --rows 10000 100000 1000000
+"""
+import argparse
+import time
+
+import folium
+import numpy as np
+from folium.plugins import HeatMap
+
+from gpsviz.heatmap import density_levels, heatmap_map
+
+
+def make_points(rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    dense = rows // 2
+    lat = np.concatenate([rng.normal(19.07, 0.15, dense), rng.uniform(8.0, 35.0, rows - dense)])
+    lon = np.concatenate([rng.normal(72.88, 0.15, dense), rng.uniform(68.0, 97.0, rows - dense)])
+    return lat, lon, rng.uniform(0.0, 5.0, rows)
+
+
+def raw_render(lat, lon, weight):
+    # Every point in the page, as folium's HeatMap plugin does it
+    m = folium.Map(location=[float(np.median(lat)), float(np.median(lon))], zoom_start=12)
+    HeatMap(np.column_stack([lat, lon, weight])).add_to(m)
+    return m.get_root().render()
+
+
+def binned_render(lat, lon, weight):
+    return heatmap_map(density_levels(lat, lon, weight)).get_root().render()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>10} {'path':>7} {'seconds':>8} {'html MB':>8}")
+    for rows in args.rows:
+        lat, lon, weight = make_points(rows)
+        for name, fn in (("raw", raw_render), ("binned", binned_render)):
+            start = time.perf_counter()
+            html = fn(lat, lon, weight)
+            elapsed = time.perf_counter() - start
+            print(f"{rows:>10} {name:>7} {elapsed:>8.2f} {len(html.encode('utf-8')) / 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Parse time and memory: dtype=str ingestion versus the typed Arrow path.
+
+A synthetic CSV is written to a temporary file (use --rows 30000000 or
+more for a multi-GB file) and converted to the other ``--formats``
+(Parquet, Feather), then each reader runs on each file in its own
+subprocess. Columnar files are memory-mapped, as the batch pipeline
+reads them. Run from the repository root:
+
+    python -m benchmarks.bench_ingest --rows 5000000 --formats csv parquet feather
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.csv as pa_csv
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from benchmarks.memory import current_rss_mb, peak_rss_mb, reset_peak_rss
+from gpsviz.columnar import open_source
+from gpsviz.ingest import load_dataset
+
+CHUNK_ROWS = 1_000_000
+SELECTED = ("village", "category")
+
+
+def write_csv(path: str, rows: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, CHUNK_ROWS):
+        n = min(CHUNK_ROWS, rows - start)
+        chunk = pd.DataFrame({
+            "village": rng.integers(0, 1_000, n).astype(str),
+            "block": rng.integers(0, 50, n).astype(str),
+            "household_id": np.arange(start, start + n).astype(str),
+            "category": rng.choice(["A", "B", "C", "D"], n),
+            "latitude": rng.uniform(8.0, 35.0, n).round(6),
+            "longitude": rng.uniform(68.0, 97.0, n).round(6),
+            "surveyor": rng.choice([f"surveyor_{i}" for i in range(200)], n),
+            "visit_date": rng.choice(pd.date_range("2024-01-01", periods=365).astype(str), n),
+        })
+        chunk.to_csv(path, mode="a", header=start == 0, index=False)
+
+
+def convert(path: str, fmt: str) -> str:
+    table = pa_csv.read_csv(path)
+    out = f"{os.path.splitext(path)[0]}.{fmt}"
+    if fmt == "parquet":
+        pq.write_table(table, out)
+    else:
+        feather.write_feather(table, out)
+    return out
+
+
+def run_reader(reader: str, path: str) -> None:
+    data = open_source(path)
+    reset_peak_rss()
+    baseline = current_rss_mb()
+    start = time.perf_counter()
+    if reader == "str":
+        dataset = load_dataset(data, path)
+    else:
+        dataset = load_dataset(data, path, typed=True, columns=SELECTED)
+    elapsed = time.perf_counter() - start
+    fmt = os.path.splitext(path)[1].lstrip(".")
+    print(f"{fmt:>8} {reader:>6} {elapsed:>9.2f} {peak_rss_mb() - baseline:>14.0f} "
+          f"{dataset.nbytes / 2**20:>10.0f} {len(dataset.frame.columns):>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--formats", nargs="+", choices=["csv", "parquet", "feather"], default=["csv"])
+    parser.add_argument("--reader", choices=["str", "typed"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.reader:
+        run_reader(args.reader, args.path)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "gps.csv")
+        write_csv(path, args.rows)
+        paths = [path if fmt == "csv" else convert(path, fmt) for fmt in args.formats]
+        print(f"{args.rows:,} rows, " + ", ".join(
+            f"{os.path.getsize(p) / 2**20:,.0f} MB {fmt}" for fmt, p in zip(args.formats, paths)))
+        print(f"{'format':>8} {'reader':>6} {'seconds':>9} {'peak +RSS MB':>14} {'frame MB':>10} {'columns':>8}")
+        sys.stdout.flush()
+        for path in paths:
+            for reader in ("str", "typed"):
+                subprocess.run([sys.executable, "-m", "benchmarks.bench_ingest",
+                                "--reader", reader, "--path", path], check=True)
+
+
+if __name__ == "__main__":
+    main()
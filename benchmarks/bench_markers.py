@@ -0,0 +1,76 @@
+"""Rows/second of the vectorized PointLayer next to the per-row CircleMarker path.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_markers --rows 1000 10000 100000
+"""
+import argparse
+import time
+
+import folium
+import numpy as np
+import pandas as pd
+
+from gpsviz.markers import build_popups, point_map
+
+
+def make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "latitude": rng.uniform(8.0, 35.0, rows),
+        "longitude": rng.uniform(68.0, 97.0, rows),
+        "household_id": [f"H{i:07d}" for i in range(rows)],
+        "category": rng.choice(["A", "B", "C"], rows),
+    })
+
+
+def legacy_render(df, label_vars):
+    # The loop App.py used before the PointLayer
+    m = folium.Map(location=[df["latitude"].median(), df["longitude"].median()], zoom_start=12)
+    for _, row in df.iterrows():
+        popup_text = "<br>".join([f"<b>{var}:</b> {row[var]}" for var in label_vars]) if label_vars else "Location"
+        folium.CircleMarker(
+            location=[row["latitude"], row["longitude"]],
+            radius=5,
+            color='#2E86AB',
+            fill=True,
+            fill_color='#2E86AB',
+            fill_opacity=0.7,
+            popup=popup_text
+        ).add_to(m)
+    return m.get_root().render()
+
+
+def vectorized_render(df, label_vars):
+    popups = build_popups(df, label_vars)
+    return point_map(df["latitude"], df["longitude"], popups).get_root().render()
+
+
+def run(fn, df, label_vars):
+    start = time.perf_counter()
+    html = fn(df, label_vars)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(html.encode("utf-8"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--legacy-max", type=int, default=20_000,
+                        help="skip the per-row path above this many rows (it takes minutes)")
+    args = parser.parse_args(argv)
+
+    label_vars = ["household_id", "category"]
+    print(f"{'rows':>10} {'path':>10} {'seconds':>9} {'rows/s':>12} {'html MB':>9}")
+    for rows in args.rows:
+        df = make_frame(rows)
+        paths = [("vectorized", vectorized_render)]
+        if rows <= args.legacy_max:
+            paths.insert(0, ("legacy", legacy_render))
+        for name, fn in paths:
+            elapsed, size = run(fn, df, label_vars)
+            print(f"{rows:>10} {name:>10} {elapsed:>9.3f} {rows / elapsed:>12,.0f} {size / 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Peak RSS of a grouped run: in-memory dict + BytesIO versus MapArchive.
+
+Each packaging path runs in its own subprocess so the peak resident set
+size reported by the OS belongs to that path alone. Run from the
+repository root:
+
+    python -m benchmarks.bench_packaging --rows 1000000 --groups 1000
+"""
+import argparse
+import io
+import subprocess
+import sys
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.memory import current_rss_mb, peak_rss_mb, reset_peak_rss
+from gpsviz.grouping import split_groups
+from gpsviz.packaging import MapArchive
+from gpsviz.rendering import group_tasks, render_maps
+
+
+def make_frame(rows: int, groups: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "village": rng.integers(0, groups, rows).astype(str),
+        "latitude": rng.uniform(8.0, 35.0, rows),
+        "longitude": rng.uniform(68.0, 97.0, rows),
+        "household_id": np.arange(rows),
+    })
+
+
+def run_path(path: str, rows: int, groups: int) -> None:
+    df = make_frame(rows, groups)
+    reset_peak_rss()
+    baseline = current_rss_mb()
+    start = time.perf_counter()
+
+    tasks = group_tasks(split_groups(df, ["village"], "latitude", "longitude"),
+                        ["village"], ["household_id"], "latitude", "longitude")
+    if path == "legacy":
+        map_files = {fname: html_str for fname, html_str, _ in render_maps(tasks)}
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, "w") as zf:
+            for fname, html_str in map_files.items():
+                zf.writestr(fname, html_str)
+        size = zip_buffer.getbuffer().nbytes
+    else:
+        archive = MapArchive()
+        for fname, html_str, _ in render_maps(tasks):
+            archive.add(fname, html_str)
+        size = len(archive.getvalue())
+
+    elapsed = time.perf_counter() - start
+    print(f"{path:>8} {elapsed:>9.1f} {baseline:>12.0f} {peak_rss_mb():>12.0f} {size / 1e6:>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--groups", type=int, default=1_000)
+    parser.add_argument("--path", choices=["legacy", "archive"], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.path:
+        run_path(args.path, args.rows, args.groups)
+        return
+
+    print(f"{args.rows:,} rows, {args.groups:,} groups")
+    print(f"{'path':>8} {'seconds':>9} {'data RSS MB':>12} {'peak RSS MB':>12} {'zip MB':>10}")
+    sys.stdout.flush()
+    for path in ("legacy", "archive"):
+        subprocess.run([sys.executable, "-m", "benchmarks.bench_packaging", "--path", path,
+                        "--rows", str(args.rows), "--groups", str(args.groups)], check=True)
+
+
+if __name__ == "__main__":
+    main()
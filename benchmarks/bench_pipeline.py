@@ -0,0 +1,125 @@
+"""End-to-end pipeline time, throughput and peak memory on synthetic data.
+
+Each size is written as a synthetic CSV (see benchmarks.synthetic) and
+run through gpsviz.pipeline.process_file(), the same read -> detect ->
+clean -> group split -> render -> zip path App.py uses, in a fresh
+subprocess so peak RSS is not inflated by earlier sizes. The "grouped"
+scenario makes one map per village as App.py does with a grouping
+variable. The "single" scenario makes one map of every point, like
+demo_app.py. Run from the repository root:
+
+    python -m benchmarks.bench_pipeline --rows 10000 100000 1000000 --json results.json
+
+Pass ``--compare baseline.json`` to print each run's time relative to an
+earlier results file.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import folium
+import numpy as np
+import pandas as pd
+
+from benchmarks.memory import current_rss_mb, peak_rss_mb, reset_peak_rss
+from benchmarks.synthetic import write_gps_csv
+from gpsviz.instrumentation import RunTrace
+from gpsviz.pipeline import MapOptions, process_file
+
+SCENARIOS = {
+    "grouped": MapOptions(group_vars=("village",), label_vars=("household_id", "label_0")),
+    "single": MapOptions(label_vars=("household_id", "label_0")),
+}
+
+
+def run_scenario(scenario: str, path: str, out_dir: str) -> dict:
+    reset_peak_rss()
+    baseline = current_rss_mb()
+    start = time.perf_counter()
+    with RunTrace() as trace:
+        result = process_file(path, out_dir, SCENARIOS[scenario])
+    elapsed = time.perf_counter() - start
+    if result.error:
+        raise RuntimeError(f"{scenario} failed: {result.error}")
+    return {
+        "scenario": scenario,
+        "rows": result.rows,
+        "valid_rows": result.valid_rows,
+        "maps": result.maps,
+        "seconds": elapsed,
+        "rows_per_s": result.rows / elapsed,
+        "peak_rss_mb": peak_rss_mb() - baseline,
+        "zip_mb": os.path.getsize(result.output) / 1e6,
+        "stages": {stage.name: stage.seconds for stage in trace.stages},
+    }
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "folium": folium.__version__,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--groups", type=int, default=100)
+    parser.add_argument("--labels", type=int, default=2)
+    parser.add_argument("--invalid-rate", type=float, default=0.01)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="earlier --json results to compare against")
+    parser.add_argument("--run", nargs=3, metavar=("SCENARIO", "CSV", "OUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run:
+        print(json.dumps(run_scenario(*args.run)))
+        return
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {(r["scenario"], r["rows"]): r for r in json.load(f)["results"]}
+
+    results = []
+    print(f"{'scenario':>9} {'rows':>10} {'maps':>6} {'seconds':>8} {'rows/s':>10} "
+          f"{'peak +RSS MB':>13} {'zip MB':>8} {'slowest stage':>22}" + (f" {'vs base':>8}" if baseline else ""))
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"gps_{rows}.csv")
+            write_gps_csv(path, rows, args.groups, args.labels, args.invalid_rate)
+            for scenario in args.scenarios:
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_pipeline", "--run", scenario, path, tmp],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                r = json.loads(out.strip().splitlines()[-1])
+                results.append(r)
+                name, seconds = max(r["stages"].items(), key=lambda item: item[1])
+                line = (f"{scenario:>9} {r['rows']:>10,} {r['maps']:>6} {r['seconds']:>8.2f} "
+                        f"{r['rows_per_s']:>10,.0f} {r['peak_rss_mb']:>13.0f} {r['zip_mb']:>8.1f} "
+                        f"{f'{name} {seconds:.2f} s':>22}")
+                base = baseline.get((scenario, r["rows"]))
+                if base:
+                    line += f" {r['seconds'] / base['seconds']:>7.2f}x"
+                print(line)
+                sys.stdout.flush()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"environment": environment(), "groups": args.groups, "labels": args.labels,
+                       "invalid_rate": args.invalid_rate, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Regeneration time of many group maps with a cold and a warm render cache.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_render_cache --rows 200000 --groups 5000
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from gpsviz.grouping import split_groups
+from gpsviz.render_cache import RenderCache
+from gpsviz.rendering import group_tasks, render_maps
+
+
+def make_frame(rows: int, groups: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "village": rng.integers(0, groups, rows).astype(str),
+        "latitude": rng.uniform(8.0, 35.0, rows),
+        "longitude": rng.uniform(68.0, 97.0, rows),
+        "category": rng.choice(["A", "B", "C"], rows),
+    })
+
+
+def regenerate(df, cache) -> tuple:
+    """Seconds taken and maps reused for one regeneration."""
+    start = time.perf_counter()
+    groups = split_groups(df, ["village"], "latitude", "longitude")
+    reused = sum(from_cache for _, _, from_cache in
+                 render_maps(group_tasks(groups, ["village"], ["category"], "latitude", "longitude"), cache=cache))
+    return time.perf_counter() - start, reused
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--groups", type=int, default=5_000)
+    parser.add_argument("--changed-rows", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    df = make_frame(args.rows, args.groups)
+    edited = df.copy()
+    edited.loc[:args.changed_rows - 1, "category"] = "edited"
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = RenderCache(directory)
+        for name, frame in (("cold", df), ("unchanged", df), (f"{args.changed_rows} rows edited", edited)):
+            misses = cache.misses
+            elapsed, reused = regenerate(frame, cache)
+            print(f"{name:>18}: {elapsed:7.2f} s  "
+                  f"({reused} reused, {cache.misses - misses} rendered)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Build time and query latency of the SpatialIndex next to a full scan.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_spatial --rows 10000 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from gpsviz.spatial import SpatialIndex, haversine_m
+
+
+def make_points(rows: int, seed: int = 0):
+    # Half the points in a dense metro-sized cluster, half spread over a country
+    rng = np.random.default_rng(seed)
+    dense = rows // 2
+    lat = np.concatenate([rng.normal(19.07, 0.15, dense), rng.uniform(8.0, 35.0, rows - dense)])
+    lon = np.concatenate([rng.normal(72.88, 0.15, dense), rng.uniform(68.0, 97.0, rows - dense)])
+    return lat, lon
+
+
+def per_query_ms(fn, queries) -> float:
+    start = time.perf_counter()
+    for q in queries:
+        fn(*q)
+    return (time.perf_counter() - start) / len(queries) * 1e3
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--radius", type=float, default=1_000.0, help="radius query size in metres")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>10} {'build s':>8} {'query':>8} {'index ms':>9} {'scan ms':>9} {'speedup':>8}")
+    for rows in args.rows:
+        lat, lon = make_points(rows)
+        start = time.perf_counter()
+        index = SpatialIndex(lat, lon)
+        build = time.perf_counter() - start
+
+        rng = np.random.default_rng(1)
+        picks = rng.integers(0, rows, args.queries)
+        points = list(zip(lat[picks], lon[picks]))
+        boxes = [(a, o, a + 0.05, o + 0.05) for a, o in points]
+
+        def scan_radius(a, o):
+            return np.flatnonzero(haversine_m(a, o, lat, lon) <= args.radius)
+
+        def scan_knn(a, o):
+            d = haversine_m(a, o, lat, lon)
+            nearest = np.argpartition(d, args.k)[:args.k]
+            return nearest[np.argsort(d[nearest])]
+
+        def scan_bbox(s, w, n, e):
+            return np.flatnonzero((lat >= s) & (lat <= n) & (lon >= w) & (lon <= e))
+
+        cases = [
+            ("radius", lambda a, o: index.radius(a, o, args.radius), scan_radius, points),
+            ("knn", lambda a, o: index.knn(a, o, args.k), scan_knn, points),
+            ("bbox", index.bbox, scan_bbox, boxes),
+        ]
+        for i, (name, indexed, scan, queries) in enumerate(cases):
+            fast = per_query_ms(indexed, queries)
+            slow = per_query_ms(scan, queries[:max(len(queries) // 10, 1)])
+            label = f"{rows:>10} {build:>8.2f}" if i == 0 else f"{'':>10} {'':>8}"
+            print(f"{label} {name:>8} {fast:>9.3f} {slow:>9.3f} {slow / fast:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
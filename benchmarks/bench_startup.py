@@ -0,0 +1,62 @@
+"""Cold and warm time-to-first-render of App.py.
+
+"Cold" is the first script run in a fresh process with an empty asset
+cache, "warm" the following reruns in the same process, which is what
+every widget interaction costs. Each measurement runs in its own
+subprocess via Streamlit's AppTest harness. Run from the repository root:
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --offline
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+APP = Path(__file__).resolve().parent.parent / "App.py"
+
+
+def measure(runs: int) -> None:
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP), default_timeout=120)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - start)
+    if at.exception:
+        raise SystemExit(f"App raised: {at.exception}")
+    warm = sorted(timings[1:])
+    print(f"cold {timings[0]:.3f} s")
+    if warm:
+        print(f"warm {warm[len(warm) // 2]:.3f} s (median of {len(warm)})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--offline", action="store_true", help="set GPSVIZ_OFFLINE=1")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        measure(args.runs)
+        return
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, GPSVIZ_CACHE_DIR=cache_dir)
+        if args.offline:
+            env["GPSVIZ_OFFLINE"] = "1"
+        for label in ("empty asset cache", "populated asset cache"):
+            print(f"-- {label}")
+            sys.stdout.flush()
+            subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--child",
+                            "--runs", str(args.runs)], env=env, check=True)
+
+
+if __name__ == "__main__":
+    main()
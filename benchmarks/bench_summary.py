@@ -0,0 +1,58 @@
+"""Summary statistics time: the columnar engine next to pandas statistics.
+
+The "pandas" path parses every column with pd.to_numeric and runs
+``groupby().describe()``. Both read the same synthetic upload as text,
+as the standard reader does, and both compute exact quartiles; the last
+column checks that they agree. Run from the repository root:
+
+    python -m benchmarks.bench_summary --rows 100000 1000000 3000000 --groups 500
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_gps_frame
+from gpsviz.summary import summarize
+
+
+def pandas_summary(frame: pd.DataFrame, group_vars):
+    numeric = {}
+    for col in frame.columns.difference(group_vars):
+        values = pd.to_numeric(frame[col], errors="coerce")
+        if values.notna().mean() > 0.9:
+            numeric[col] = values
+    return pd.DataFrame(numeric).groupby([frame[var] for var in group_vars]).describe()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 3_000_000])
+    parser.add_argument("--groups", type=int, default=500)
+    parser.add_argument("--labels", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>10} {'pandas s':>9} {'summary s':>10} {'speedup':>8} {'max quartile diff':>18}")
+    for rows in args.rows:
+        frame = make_gps_frame(rows, args.groups, args.labels, invalid_rate=0.01).astype(str)
+        start = time.perf_counter()
+        exact = pandas_summary(frame, ["village"])
+        exact_s = time.perf_counter() - start
+        start = time.perf_counter()
+        summary = summarize(frame, ["village"])
+        summary_s = time.perf_counter() - start
+
+        # Largest quartile difference relative to the group's range
+        stats = summary.stats.set_index(["village", "column"])
+        worst = 0.0
+        for col in summary.numeric:
+            ours = stats.xs(col, level="column").loc[exact.index]
+            spread = (ours["max"] - ours["min"]).replace(0, np.nan)
+            for q in ("25%", "50%", "75%"):
+                worst = max(worst, float(np.nanmax(np.abs(ours[q] - exact[(col, q)]) / spread)))
+        print(f"{rows:>10} {exact_s:>9.2f} {summary_s:>10.2f} {exact_s / summary_s:>7.1f}x {worst:>17.4%}")
+
+
+if __name__ == "__main__":
+    main()
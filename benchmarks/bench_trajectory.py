@@ -0,0 +1,56 @@
+"""Trajectory page size and build time: simplified polylines next to one marker per row.
+
+The track is a synthetic 1 Hz device log: a vehicle at about 8 m/s with
+a slowly drifting heading and a few metres of GPS noise. Run from the
+repository root:
+
+    python -m benchmarks.bench_trajectory --rows 10000 100000 1000000 --tolerance 5 10 25
+"""
+import argparse
+import time
+
+import numpy as np
+
+from gpsviz.markers import point_map
+from gpsviz.trajectory import simplify_track, track_map
+
+# Metres per degree of latitude
+M_PER_DEG = 111_320.0
+
+
+def make_track(rows: int, speed_m: float = 8.0, noise_m: float = 3.0, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    heading = np.cumsum(rng.normal(0.0, 0.02, rows))
+    lat = 19.07 + np.cumsum(np.cos(heading)) * speed_m / M_PER_DEG + rng.normal(0.0, noise_m / M_PER_DEG, rows)
+    lon = 72.88 + np.cumsum(np.sin(heading)) * speed_m / M_PER_DEG + rng.normal(0.0, noise_m / M_PER_DEG, rows)
+    return lat, lon
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--tolerance", type=float, nargs="+", default=[5.0, 10.0, 25.0])
+    parser.add_argument("--markers", action="store_true", help="also time one marker per row (slow)")
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>10} {'tolerance m':>12} {'vertices':>9} {'reduction':>10} "
+          f"{'simplify s':>11} {'render s':>9} {'html MB':>8}")
+    for rows in args.rows:
+        lat, lon = make_track(rows)
+        if args.markers:
+            start = time.perf_counter()
+            html = point_map(lat, lon).get_root().render()
+            print(f"{rows:>10} {'markers':>12} {rows:>9} {1:>9.0f}x {0:>11.3f} "
+                  f"{time.perf_counter() - start:>9.2f} {len(html.encode('utf-8')) / 1e6:>8.2f}")
+        for tolerance in args.tolerance:
+            start = time.perf_counter()
+            keep = simplify_track(lat, lon, tolerance)
+            simplified = time.perf_counter() - start
+            html = track_map(lat[keep], lon[keep]).get_root().render()
+            rendered = time.perf_counter() - start - simplified
+            print(f"{rows:>10} {tolerance:>12g} {len(keep):>9} {rows / len(keep):>9.0f}x {simplified:>11.3f} "
+                  f"{rendered:>9.2f} {len(html.encode('utf-8')) / 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
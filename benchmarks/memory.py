@@ -0,0 +1,36 @@
+"""Process memory probes shared by the benchmarks."""
+import resource
+import sys
+
+
+def current_rss_mb() -> float:
+    return _proc_status_mb("VmRSS") or peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    hwm = _proc_status_mb("VmHWM")
+    if hwm is not None:
+        return hwm
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def reset_peak_rss() -> None:
+    # Linux only: restart the high-water mark so earlier setup is excluded
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _proc_status_mb(field: str):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
@@ -0,0 +1,101 @@
+"""Synthetic GPS survey datasets for the benchmarks.
+
+Rows look like household survey exports: points scattered around one
+village center each (so groups are spatially compact, as in real data),
+an administrative block, an id, ``labels`` extra label columns of mixed
+types and a share of missing or invalid coordinates. The same arguments
+and seed always give the same data.
+
+Write a CSV for manual testing with:
+
+    python -m benchmarks.synthetic gps.csv --rows 100000 --groups 500 --invalid-rate 0.02
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 1_000_000
+
+# Bounding box the village centers are drawn from (roughly India)
+LAT_RANGE = (8.0, 35.0)
+LON_RANGE = (68.0, 97.0)
+
+# Spread of households around their village center, in degrees (~2 km)
+VILLAGE_SPREAD = 0.02
+
+# Invalid coordinate cells, drawn uniformly from these
+INVALID_VALUES = ("", "NA", "0,0,0", "999.0", "-181.5", "unknown")
+
+LABEL_KINDS = ("category", "int", "float", "date", "text")
+
+
+def make_gps_frame(rows: int, groups: int = 100, labels: int = 2, invalid_rate: float = 0.0,
+                   seed: int = 0, start: int = 0) -> pd.DataFrame:
+    """Synthetic survey rows; ``start`` offsets the ids for chunked writing.
+
+    With ``invalid_rate > 0`` the coordinate columns are strings and that
+    share of rows has a missing or unparseable latitude or longitude.
+    """
+    rng = np.random.default_rng([seed, start])
+    centers = np.random.default_rng(seed).uniform(
+        [LAT_RANGE[0], LON_RANGE[0]], [LAT_RANGE[1], LON_RANGE[1]], size=(max(groups, 1), 2))
+    village = rng.integers(0, max(groups, 1), rows)
+    lat = (centers[village, 0] + rng.normal(0.0, VILLAGE_SPREAD, rows)).round(6)
+    lon = (centers[village, 1] + rng.normal(0.0, VILLAGE_SPREAD, rows)).round(6)
+
+    frame = pd.DataFrame({
+        "village": np.char.add("V", village.astype(str)),
+        "block": np.char.add("B", (village % max(groups // 20, 1)).astype(str)),
+        "household_id": np.char.add("H", np.arange(start, start + rows).astype(str)),
+        "latitude": lat,
+        "longitude": lon,
+    })
+    for i in range(labels):
+        frame[f"label_{i}"] = _label_column(rng, LABEL_KINDS[i % len(LABEL_KINDS)], rows)
+
+    if invalid_rate > 0:
+        bad = np.flatnonzero(rng.random(rows) < invalid_rate)
+        col = np.where(rng.random(len(bad)) < 0.5, "latitude", "longitude")
+        for name in ("latitude", "longitude"):
+            frame[name] = frame[name].astype(str).astype(object)
+            rows_here = bad[col == name]
+            frame.loc[rows_here, name] = rng.choice(INVALID_VALUES, len(rows_here))
+    return frame
+
+
+def _label_column(rng, kind: str, rows: int):
+    if kind == "category":
+        return rng.choice(["A", "B", "C", "D", "E"], rows)
+    if kind == "int":
+        return rng.integers(1, 12, rows)
+    if kind == "float":
+        return rng.gamma(2.0, 1500.0, rows).round(2)
+    if kind == "date":
+        days = pd.date_range("2024-01-01", periods=365).strftime("%Y-%m-%d").to_numpy()
+        return rng.choice(days, rows)
+    return np.char.add("surveyor_", rng.integers(0, 300, rows).astype(str))
+
+
+def write_gps_csv(path, rows: int, groups: int = 100, labels: int = 2, invalid_rate: float = 0.0,
+                  seed: int = 0) -> None:
+    """Write make_gps_frame() rows to ``path`` in chunks, so any size fits in memory."""
+    for start in range(0, rows, CHUNK_ROWS):
+        chunk = make_gps_frame(min(CHUNK_ROWS, rows - start), groups, labels, invalid_rate, seed, start)
+        chunk.to_csv(path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--groups", type=int, default=100)
+    parser.add_argument("--labels", type=int, default=2)
+    parser.add_argument("--invalid-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    write_gps_csv(args.path, args.rows, args.groups, args.labels, args.invalid_rate, args.seed)
+
+
+if __name__ == "__main__":
+    main()
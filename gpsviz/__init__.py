@@ -0,0 +1 @@
+"""Map-generation core shared by the GPS Data Visualization Tool."""
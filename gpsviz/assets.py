@@ -0,0 +1,110 @@
+"""Startup assets (Lottie animations) without blocking the script run.
+
+Animations are looked up in the bundled ``assets/lottie`` directory, then
+in an on-disk cache, and only fetched over the network when neither has
+them. Fetches run concurrently with a short timeout and successful
+downloads are written to the cache, so each server fetches an animation
+at most once. Set GPSVIZ_OFFLINE=1 to skip the network entirely.
+
+Populate the bundle for offline deployments with:
+
+    python -m gpsviz.assets
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+LOTTIE_URLS = {
+    "loading": "https://assets1.lottiefiles.com/packages/lf20_raiw2hpe.json",
+    "map": "https://assets1.lottiefiles.com/packages/lf20_kyOW06.json",
+    "plotting": "https://assets1.lottiefiles.com/packages/lf20_ot6erjsc.json",
+}
+
+BUNDLE_DIR = Path(__file__).resolve().parent.parent / "assets" / "lottie"
+CACHE_DIR = Path(os.environ.get("GPSVIZ_CACHE_DIR", Path.home() / ".cache" / "gpsviz")) / "lottie"
+
+# Seconds per request; the animations are decoration, never worth a long wait
+FETCH_TIMEOUT = 3.0
+
+
+def _offline() -> bool:
+    return os.environ.get("GPSVIZ_OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+def _read_json(path: Path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: Path, data) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def fetch_json(url: str, timeout: float = FETCH_TIMEOUT):
+    try:
+        r = requests.get(url, timeout=timeout)
+        if r.status_code != 200:
+            return None
+        return r.json()
+    except (requests.RequestException, ValueError):
+        return None
+
+
+def load_lottie_assets(names=None, timeout: float = FETCH_TIMEOUT, offline: bool = None) -> dict:
+    """Return ``{name: animation JSON or None}`` for the requested animations."""
+    names = list(names or LOTTIE_URLS)
+    offline = _offline() if offline is None else offline
+
+    assets, missing = {}, []
+    for name in names:
+        data = _read_json(BUNDLE_DIR / f"{name}.json")
+        if data is None:
+            data = _read_json(CACHE_DIR / f"{name}.json")
+        assets[name] = data
+        if data is None:
+            missing.append(name)
+
+    if missing and not offline:
+        with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+            fetched = pool.map(lambda name: fetch_json(LOTTIE_URLS[name], timeout), missing)
+            for name, data in zip(missing, fetched):
+                if data is not None:
+                    _write_json(CACHE_DIR / f"{name}.json", data)
+                assets[name] = data
+    return assets
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download the Lottie animations into the bundle directory.")
+    parser.add_argument("--dest", type=Path, default=BUNDLE_DIR)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for name, url in LOTTIE_URLS.items():
+        data = fetch_json(url, args.timeout)
+        if data is None:
+            print(f"{name}: failed to fetch {url}")
+            failed += 1
+            continue
+        _write_json(args.dest / f"{name}.json", data)
+        print(f"{name}: saved to {args.dest / f'{name}.json'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
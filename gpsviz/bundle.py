@@ -0,0 +1,143 @@
+"""Multi-map export with one shared viewer and a small data file per map.
+
+Every standalone map repeats the same Leaflet page around its points.
+In this format the page, script and stylesheet are written once
+(``index.html``, ``viewer.js``, ``viewer.css``) and each map only adds
+``data/<map>.js``: its points in the compact PointLayer payload, wrapped
+in a callback. The viewer lists the maps and loads a data file through a
+script tag when it is picked, which also works when the extracted ZIP is
+opened from disk.
+"""
+from pathlib import PurePosixPath
+
+import numpy as np
+
+from gpsviz.markers import MARKER_STYLE, point_payload, to_js
+
+VIEWER_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.css"/>
+<link rel="stylesheet" href="viewer.css"/>
+<script src="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.js"></script>
+</head>
+<body>
+<div id="bar">
+<input id="filter" type="search" placeholder="Filter maps...">
+<select id="maps"></select>
+<span id="count"></span>
+</div>
+<h3 id="title"></h3>
+<div id="map"></div>
+<script src="manifest.js"></script>
+<script src="viewer.js"></script>
+</body>
+</html>
+"""
+
+VIEWER_CSS = """html, body { height: 100%; margin: 0; font-family: sans-serif; }
+#bar { display: flex; gap: 8px; align-items: center; padding: 6px 10px; background: #f4f6f8; }
+#bar select { flex: 1; min-width: 0; }
+#count { color: #666; font-size: 13px; white-space: nowrap; }
+#title { text-align: center; font-size: 16px; margin: 4px 0; }
+#map { position: absolute; top: 70px; bottom: 0; width: 100%; }
+"""
+
+VIEWER_JS = """(function() {
+    var manifest = window.gpsvizManifest;
+    var map = L.map("map", {preferCanvas: true});
+    L.tileLayer("https://tile.openstreetmap.org/{z}/{x}/{y}.png", {
+        maxZoom: 19, attribution: "&copy; OpenStreetMap contributors"
+    }).addTo(map);
+    var renderer = L.canvas({padding: 0.5});
+    var select = document.getElementById("maps");
+    var filter = document.getElementById("filter");
+    var layer = null, current = -1;
+
+    function draw(i, d) {
+        if (i !== current) { return; }
+        if (layer) { map.removeLayer(layer); }
+        layer = L.featureGroup();
+        var opts = L.extend({}, manifest.style, {renderer: renderer});
+        for (var k = 0; k < d.lat.length; k++) {
+            var o = d.r ? L.extend({}, opts, {radius: d.r[k]}) : opts;
+            var marker = L.circleMarker([d.lat[k], d.lon[k]], o);
+            if (d.popups.length) { marker.bindPopup(d.popups[d.p[k]]); }
+            marker.addTo(layer);
+        }
+        layer.addTo(map);
+    }
+
+    window.gpsvizData = draw;
+
+    function show(i) {
+        var entry = manifest.maps[i];
+        current = i;
+        select.value = String(i);
+        location.hash = encodeURIComponent(entry.file);
+        document.getElementById("title").textContent = entry.title;
+        map.setView(entry.center, 12);
+        var script = document.createElement("script");
+        script.src = "data/" + entry.file + ".js";
+        script.onload = script.onerror = function() { script.remove(); };
+        document.head.appendChild(script);
+    }
+
+    function fill() {
+        var needle = filter.value.toLowerCase(), shown = 0;
+        select.innerHTML = "";
+        manifest.maps.forEach(function(entry, i) {
+            if (needle && entry.title.toLowerCase().indexOf(needle) < 0) { return; }
+            var option = document.createElement("option");
+            option.value = String(i);
+            option.textContent = entry.title + " (" + entry.count + ")";
+            select.appendChild(option);
+            shown++;
+        });
+        document.getElementById("count").textContent = shown + " of " + manifest.maps.length + " maps";
+        if (current >= 0) { select.value = String(current); }
+    }
+
+    select.addEventListener("change", function() { show(Number(select.value)); });
+    filter.addEventListener("input", fill);
+    fill();
+
+    var wanted = decodeURIComponent(location.hash.slice(1));
+    var start = manifest.maps.findIndex(function(entry) { return entry.file === wanted; });
+    if (manifest.maps.length) { show(start >= 0 ? start : 0); }
+})();
+"""
+
+
+def data_name(filename: str) -> str:
+    """``x_map.html`` -> ``data/x_map.js``, the map's entry in a bundle."""
+    return f"data/{PurePosixPath(filename).stem}.js"
+
+
+class BundleWriter:
+    """Write RenderTasks into ``archive`` as one shared viewer plus data files."""
+
+    def __init__(self, archive, title: str = "GPS Maps"):
+        self.archive = archive
+        self.title = title
+        self.maps = []
+
+    def add(self, task) -> None:
+        name = PurePosixPath(task.filename).stem
+        center = task.center
+        if center is None:
+            center = [float(np.median(task.lat)), float(np.median(task.lon))]
+        payload = point_payload(task.lat, task.lon, task.popups, task.radius)
+        self.archive.add(data_name(task.filename), f"gpsvizData({len(self.maps)},{payload});")
+        self.maps.append({"file": name, "title": task.title, "center": center, "count": len(task.lat)})
+
+    def close(self) -> None:
+        """Write the viewer and the manifest of every map added."""
+        manifest = {"maps": self.maps, "style": MARKER_STYLE}
+        self.archive.add("manifest.js", f"window.gpsvizManifest = {to_js(manifest)};")
+        self.archive.add("index.html", VIEWER_HTML.format(title=self.title))
+        self.archive.add("viewer.js", VIEWER_JS)
+        self.archive.add("viewer.css", VIEWER_CSS)
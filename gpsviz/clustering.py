@@ -0,0 +1,262 @@
+"""Grid-accelerated DBSCAN on GPS coordinates.
+
+Points are projected to metres and bucketed on a grid of side
+eps / sqrt(2), so any two points sharing a cell are within ``eps`` of
+each other and any neighbour lies in one of the few cells around a
+point. A cell holding ``min_samples`` points is therefore core as a
+whole and only points in sparse cells need their neighbours counted.
+Clusters are the connected components of the core cells, where two
+cells are linked if any pair of their core points is within ``eps``;
+cells with many core points are compared through a few representatives
+(their extremes plus a sample), so a link between two very dense cells
+can, rarely, be missed. Border points join the cluster of a core point
+in reach: a representative when one is close enough, otherwise any core
+point of the cells around them. Everything else is noise. Distance tests
+are exact (chord length on the unit sphere, equivalent to haversine); no
+pairwise matrix is ever built, so a million points take seconds.
+Longitudes are unwrapped at the widest gap in the data before gridding,
+so points on either side of the antimeridian are still neighbours (only
+data circling the globe without any gap wider than eps is cut apart).
+"""
+import numpy as np
+import pandas as pd
+
+from gpsviz.spatial import EARTH_RADIUS_M
+
+DEFAULT_EPS_M = 250.0
+DEFAULT_MIN_SAMPLES = 10
+
+NOISE = -1
+NOISE_LABEL = "noise"
+
+# Core points per cell compared when linking cells
+MAX_REPRESENTATIVES = 16
+
+# Candidate pairs evaluated per vectorized step
+PAIR_CHUNK = 4_000_000
+
+# Web Mercator bound, keeps the longitude scale finite near the poles
+MAX_ABS_LATITUDE = 85.0
+
+
+def _unwrap_longitudes(lon: np.ndarray) -> np.ndarray:
+    """``lon`` with values shifted by 360 so the ±180° seam falls in the widest gap."""
+    ordered = np.sort(lon)
+    if len(ordered) < 2:
+        return lon
+    gaps = np.diff(ordered)
+    widest = int(np.argmax(gaps))
+    # The gap across the seam itself, from the largest longitude round to the smallest
+    if gaps[widest] <= 360.0 - (ordered[-1] - ordered[0]):
+        return lon
+    return np.where(lon <= ordered[widest], lon + 360.0, lon)
+
+
+class _Grid:
+    """Points sorted into eps / sqrt(2) cells, one contiguous slice per cell.
+
+    Everything below works on positions in this sorted order.
+    """
+
+    def __init__(self, lat, lon, eps_m: float):
+        lat_r = np.radians(np.clip(lat, -MAX_ABS_LATITUDE, MAX_ABS_LATITUDE))
+        # Scale longitude at the latitude closest to the equator: projected
+        # distances then never underestimate true ones, which keeps whole
+        # cells within eps; the x reach is widened by the same factor
+        cos_max = np.cos(np.abs(lat_r).min())
+        cos_min = np.cos(np.abs(lat_r).max())
+        side = eps_m / np.sqrt(2.0)
+        x = np.radians(_unwrap_longitudes(lon)) * EARTH_RADIUS_M * cos_max / side
+        y = lat_r * EARTH_RADIUS_M / side
+        ix = np.floor(x - x.min()).astype(np.int64)
+        iy = np.floor(y - y.min()).astype(np.int64)
+        self.x_shrink = cos_min / cos_max
+        self.reach_x = int(np.ceil(np.sqrt(2.0) / self.x_shrink))
+        self.reach_y = 2
+        self.width = int(ix.max()) + 2 * self.reach_x + 1
+
+        cell = (iy + self.reach_y) * self.width + ix + self.reach_x
+        self.order = np.argsort(cell, kind="stable")
+        self.cells, self.starts, self.counts = np.unique(cell[self.order], return_index=True,
+                                                         return_counts=True)
+        self.cell_pos = np.repeat(np.arange(len(self.cells)), self.counts)
+        # Projected coordinates, used only to pick per-cell extremes
+        self.x, self.y = x[self.order], y[self.order]
+
+    def offsets(self, forward_only: bool = False) -> list:
+        """Cell id offsets of the cells in reach, nearest first."""
+        found = []
+        for dy in range(-self.reach_y, self.reach_y + 1):
+            for dx in range(-self.reach_x, self.reach_x + 1):
+                # Smallest true distance between the two cells, in cell sides
+                gap = (max(abs(dx) - 1, 0) * self.x_shrink) ** 2 + max(abs(dy) - 1, 0) ** 2
+                offset = dy * self.width + dx
+                if gap <= 2 and (offset > 0 or not forward_only):
+                    found.append((gap, abs(dx) + abs(dy), offset))
+        return [offset for *_, offset in sorted(found)]
+
+    def neighbour_pairs(self, points, slice_start, slice_count, offset: int):
+        """Yield ``(point, target)`` pairs between each point and the cell at ``offset``.
+
+        ``slice_start``/``slice_count`` give, per cell, the slice of a target
+        array (sorted by cell) to pair with. Pairs come in bounded chunks.
+        """
+        wanted = self.cells[self.cell_pos[points]] + offset
+        pos = np.minimum(np.searchsorted(self.cells, wanted), len(self.cells) - 1)
+        hit = self.cells[pos] == wanted
+        src, pos = points[hit], pos[hit]
+        counts = slice_count[pos]
+        keep = counts > 0
+        src, pos, counts = src[keep], pos[keep], counts[keep]
+        if not len(src):
+            return
+        # Split so no chunk expands to more than PAIR_CHUNK pairs
+        bounds = np.searchsorted(np.cumsum(counts), np.arange(PAIR_CHUNK, counts.sum(), PAIR_CHUNK))
+        for part in np.split(np.arange(len(src)), bounds):
+            if len(part):
+                owner, target = _expand(slice_start[pos[part]], counts[part])
+                yield src[part][owner], target
+
+    def representatives(self, core: np.ndarray) -> np.ndarray:
+        """Per cell, up to MAX_REPRESENTATIVES core points: directional extremes then the rest."""
+        x, y = self.x, self.y
+        extremes = np.zeros(len(core), dtype=bool)
+        for key in (x, -x, y, -y, x + y, x - y, -x + y, -x - y):
+            key = np.where(core, key, np.inf)
+            extremes |= core & (key == np.minimum.reduceat(key, self.starts)[self.cell_pos])
+        rank = np.arange(len(core)) - self.starts[self.cell_pos]
+        return extremes | (core & (rank < MAX_REPRESENTATIVES - 8))
+
+
+def _expand(starts, counts):
+    # Concatenated ranges start[i]..start[i]+count[i] and the owner i of each element
+    owner = np.repeat(np.arange(len(starts)), counts)
+    first = np.cumsum(counts) - counts
+    return owner, np.repeat(starts - first, counts) + np.arange(counts.sum())
+
+
+def _components(n_nodes: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Connected-component label (smallest member) of each node, by pointer jumping."""
+    parent = np.arange(n_nodes)
+    while True:
+        lo = np.minimum(parent[a], parent[b])
+        changed = False
+        for side in (a, b):
+            root = parent[side]
+            upd = lo < parent[root]
+            if upd.any():
+                np.minimum.at(parent, root[upd], lo[upd])
+                changed = True
+        # Compress paths
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+        if not changed:
+            return parent
+
+
+def dbscan(lat, lon, eps_m: float = DEFAULT_EPS_M, min_samples: int = DEFAULT_MIN_SAMPLES) -> np.ndarray:
+    """Cluster id of every point (0 = largest cluster), NOISE for noise."""
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    n = len(lat)
+    labels = np.full(n, NOISE, dtype=np.int64)
+    if n == 0:
+        return labels
+
+    grid = _Grid(lat, lon, eps_m)
+    cell_pos = grid.cell_pos
+
+    # Compare squared chord lengths between unit vectors: the same test as
+    # haversine distance <= eps, without trigonometry per pair
+    lat_r, lon_r = np.radians(lat[grid.order]), np.radians(lon[grid.order])
+    ux, uy, uz = np.cos(lat_r) * np.cos(lon_r), np.cos(lat_r) * np.sin(lon_r), np.sin(lat_r)
+    max_chord2 = (2.0 * np.sin(eps_m / (2.0 * EARTH_RADIUS_M))) ** 2
+
+    def within(src, dst):
+        chord2 = (ux[src] - ux[dst]) ** 2 + (uy[src] - uy[dst]) ** 2 + (uz[src] - uz[dst]) ** 2
+        return chord2, chord2 <= max_chord2
+
+    # Core points: whole dense cells, plus exact neighbour counts in sparse ones
+    core = grid.counts[cell_pos] >= min_samples
+    pending = np.flatnonzero(~core)
+    found = np.zeros(n, dtype=np.int64)
+    for offset in grid.offsets():
+        # Nearest cells first, so most core points are settled early
+        for src, dst in grid.neighbour_pairs(pending, grid.starts, grid.counts, offset):
+            found += np.bincount(src[within(src, dst)[1]], minlength=n)
+        settled = found[pending] >= min_samples
+        core[pending[settled]] = True
+        pending = pending[~settled]
+    if not core.any():
+        return labels
+
+    # Link core cells that have core points within eps of each other
+    rep_idx = np.flatnonzero(grid.representatives(core))
+    rep_start = np.searchsorted(cell_pos[rep_idx], np.arange(len(grid.cells)))
+    rep_count = np.diff(np.append(rep_start, len(rep_idx)))
+    heads, tails = [], []
+    for offset in grid.offsets(forward_only=True):
+        # For a fixed offset each cell has one partner, so a flag per cell is enough
+        linked = np.zeros(len(grid.cells), dtype=bool)
+        for src, target in grid.neighbour_pairs(rep_idx, rep_start, rep_count, offset):
+            linked[cell_pos[src[within(src, rep_idx[target])[1]]]] = True
+        head = np.flatnonzero(linked)
+        heads.append(head)
+        tails.append(np.searchsorted(grid.cells, grid.cells[head] + offset))
+    root = _components(len(grid.cells), np.concatenate(heads), np.concatenate(tails))
+
+    sorted_labels = np.full(n, NOISE, dtype=np.int64)
+    sorted_labels[core] = root[cell_pos[core]]
+
+    # Border points join the cluster of the nearest core point in reach
+    best = np.full(n, np.inf)
+
+    def attach(points, idx, start, count):
+        for offset in grid.offsets():
+            for src, target in grid.neighbour_pairs(points, start, count, offset):
+                dst = idx[target]
+                dist, near = within(src, dst)
+                src, dst, dist = src[near], dst[near], dist[near]
+                better = dist < best[src]
+                src, dst, dist = src[better], dst[better], dist[better]
+                # Several candidates per point: keep the closest
+                by = np.lexsort((dist, src))
+                first = by[np.r_[True, src[by][1:] != src[by][:-1]]] if len(by) else by
+                best[src[first]] = dist[first]
+                sorted_labels[src[first]] = sorted_labels[dst[first]]
+
+    # The representatives settle most border points cheaply; the rest are
+    # checked against every core point around them, so none is lost to noise
+    attach(np.flatnonzero(~core), rep_idx, rep_start, rep_count)
+    unsettled = np.flatnonzero(~core & (sorted_labels == NOISE))
+    if len(unsettled):
+        core_idx = np.flatnonzero(core)
+        core_start = np.searchsorted(cell_pos[core_idx], np.arange(len(grid.cells)))
+        core_count = np.diff(np.append(core_start, len(core_idx)))
+        attach(unsettled, core_idx, core_start, core_count)
+
+    # Number clusters by size, largest first
+    clustered = sorted_labels != NOISE
+    uniq, inverse, counts = np.unique(sorted_labels[clustered], return_inverse=True, return_counts=True)
+    rank = np.empty(len(uniq), dtype=np.int64)
+    rank[np.argsort(-counts, kind="stable")] = np.arange(len(uniq))
+    sorted_labels[clustered] = rank[inverse]
+    labels[grid.order] = sorted_labels
+    return labels
+
+
+def cluster_labels(labels: np.ndarray) -> pd.Categorical:
+    """Readable cluster names ("1", "2", ... and "noise") in cluster order."""
+    names = [str(i + 1) for i in range(int(labels.max(initial=NOISE)) + 1)] + [NOISE_LABEL]
+    codes = np.where(labels == NOISE, len(names) - 1, labels)
+    return pd.Categorical.from_codes(codes, categories=names)
+
+
+def add_cluster_column(df: pd.DataFrame, lat_col: str, lon_col: str, eps_m: float = DEFAULT_EPS_M,
+                       min_samples: int = DEFAULT_MIN_SAMPLES, column: str = "cluster") -> pd.DataFrame:
+    """Copy of ``df`` with a ``column`` of DBSCAN cluster names, usable as a grouping variable."""
+    labels = dbscan(df[lat_col].to_numpy(dtype=float), df[lon_col].to_numpy(dtype=float), eps_m, min_samples)
+    return df.assign(**{column: cluster_labels(labels)})
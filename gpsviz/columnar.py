@@ -0,0 +1,108 @@
+"""Parquet and Feather inputs and the Parquet dataset export.
+
+Columnar files skip text parsing: only the requested columns are read,
+straight into typed pandas columns, and the preview reads just the first
+batch of rows. Uploads are read in place from their bytes and batch
+files through a memory map (open_source()), so an uncompressed Feather
+file is not even copied before the columns are converted.
+
+The export writes the cleaned rows of a run as one Parquet file inside
+the ZIP. The rows keep numeric coordinates and any column generation
+added (such as cluster ids), plus the map each row is drawn on and that
+map's center. Downstream jobs and re-uploads read it without parsing.
+"""
+import io
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow ships with streamlit
+    pa = feather = pq = None
+
+COLUMNAR_SUFFIXES = (".parquet", ".feather", ".arrow")
+
+# Where the exported dataset goes inside the ZIP
+DATASET_NAME = "data/dataset.parquet"
+
+# Columns the export adds to every row
+MAP_FILE_COL = "map_file"
+CENTER_COLS = ("map_center_lat", "map_center_lon")
+
+
+def is_columnar(name) -> bool:
+    return str(name).lower().endswith(COLUMNAR_SUFFIXES)
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError("Parquet and Feather files need pyarrow (pip install pyarrow)")
+
+
+def open_source(path):
+    """File contents for load_dataset(): memory-mapped for columnar files, bytes otherwise."""
+    if is_columnar(path):
+        _require_pyarrow()
+        return pa.memory_map(str(path)).read_buffer()
+    return Path(path).read_bytes()
+
+
+def read_columnar(data, name: str, columns=None, nrows: int = None) -> pd.DataFrame:
+    """Read ``columns`` (default: all) of a Parquet or Feather file held in ``data``."""
+    _require_pyarrow()
+    source = pa.BufferReader(data)
+    columns = list(columns) if columns is not None else None
+    if str(name).lower().endswith(".parquet"):
+        parquet = pq.ParquetFile(source)
+        if nrows is None:
+            table = parquet.read(columns=columns)
+        else:
+            # Only as many pages as the first rows need
+            batch = next(parquet.iter_batches(batch_size=max(nrows, 1), columns=columns), None)
+            table = (pa.Table.from_batches([batch]) if batch is not None
+                     else parquet.schema_arrow.empty_table().select(columns or parquet.schema_arrow.names))
+            table = table.slice(0, nrows)
+    else:
+        table = feather.read_table(source, columns=columns, memory_map=False)
+        if nrows is not None:
+            table = table.slice(0, nrows)
+    return table.to_pandas()
+
+
+def annotated_frame(df_clean: pd.DataFrame, lat_col: str, lon_col: str, group_vars=(), groups=None,
+                    entry_name=None) -> pd.DataFrame:
+    """``df_clean`` plus the map file each row is drawn on and that map's center.
+
+    ``groups`` is the split_groups() output for ``group_vars``. Rows with a
+    missing group key are kept without a map. ``entry_name(filename)``
+    gives the archive entry of a map in the chosen export format (the
+    file name itself by default).
+    """
+    entry_name = entry_name or (lambda filename: filename)
+    frame = df_clean.reset_index(drop=True)
+    if group_vars:
+        # Numbered as split_groups() numbers them, so code i is groups[i];
+        # -1 (missing key) picks the trailing empty entry
+        codes = frame.groupby(list(group_vars), sort=False).ngroup().fillna(-1).to_numpy(dtype=np.int64)
+        files = np.array([entry_name(grp.filename) for grp in groups] + [None], dtype=object)
+        centers = np.array([grp.center for grp in groups] + [[np.nan, np.nan]], dtype=float)
+    else:
+        codes = np.zeros(len(frame), dtype=np.int64)
+        files = np.array([entry_name("all_locations_map.html")], dtype=object)
+        centers = np.array([[frame[lat_col].median(), frame[lon_col].median()]], dtype=float)
+    return frame.assign(**{
+        MAP_FILE_COL: files[codes],
+        CENTER_COLS[0]: centers[codes, 0],
+        CENTER_COLS[1]: centers[codes, 1],
+    })
+
+
+def parquet_bytes(frame: pd.DataFrame, compression: str = "zstd") -> bytes:
+    _require_pyarrow()
+    buffer = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), buffer, compression=compression)
+    return buffer.getvalue()
@@ -0,0 +1,185 @@
+"""Coordinate column detection and parsing.
+
+Columns are matched on whole name tokens ("gps_lat", "Latitude",
+"lngDeg"), not substrings, so "population" or "calculation" no longer
+count as coordinates. Candidates are then checked on a sample of their
+values: a latitude column must mostly parse into [-90, 90] and a
+longitude column into [-180, 180]. When no column name looks like a
+coordinate, columns whose sampled values are high-precision decimals in
+range are used instead.
+
+Parsing is vectorized: plain numbers go through pandas' numeric parser
+and only the leftovers are tried as comma decimals ("12,345") and
+degrees-minutes-seconds ("12°34'56.7\\"N", "N 12 34.5", "-12:34:56").
+Values outside the valid range become NaN.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+LIMITS = {"lat": 90.0, "lon": 180.0}
+
+LAT_TOKENS = {"lat": 2, "latitude": 3, "lati": 1}
+LON_TOKENS = {"lon": 2, "lng": 2, "long": 1, "longitude": 3, "longi": 1}
+
+# Rows sampled per column when checking candidate values
+SAMPLE_ROWS = 200
+
+# Share of non-empty sampled values that must parse into range
+MIN_VALID_SHARE = 0.8
+
+# Unnamed columns need this many decimals to pass as coordinates
+MIN_DECIMALS = 3
+
+HEMISPHERES = {"lat": "NS", "lon": "EW"}
+
+# Degrees, minutes and seconds must be separated by a unit symbol, a
+# colon or whitespace, so a run of digits ("12.34.56") is never split
+_DMS = re.compile(
+    r"""^\s*(?P<h1>[NSEWnsew])?\s*
+    (?P<sign>[-+])?\s*
+    (?P<deg>\d+(?:[.,]\d+)?)\s*(?:°|º|deg|d)?
+    (?:(?:(?<=[°ºgd])\s*|\s*:\s*|\s+)
+       (?P<min>\d+(?:[.,]\d+)?)\s*(?:'|′|min|m)?
+       (?:(?:(?<=['′nm])\s*|\s*:\s*|\s+)
+          (?P<sec>\d+(?:[.,]\d+)?)\s*(?:"|″|''|sec|s)?
+       )?
+    )?
+    \s*(?P<h2>[NSEWnsew])?\s*$""",
+    re.VERBOSE,
+)
+_COMMA_DECIMAL = re.compile(r"^\s*[-+]?\d+,\d+\s*$")
+
+
+def _name_tokens(name) -> list:
+    # "gpsLatitude" / "GPSLatitude" / "GPS_LAT" / "lat (deg)"
+    # -> ["gps", "latitude"] / ["gps", "latitude"] / ["gps", "lat"] / ["lat", "deg"]
+    spaced = re.sub(r"([a-z])([A-Z])", r"\1 \2", str(name))
+    spaced = re.sub(r"([A-Z]+)([A-Z][a-z])", r"\1 \2", spaced)
+    return re.findall(r"[a-z]+", spaced.lower())
+
+
+def name_score(name, kind: str) -> int:
+    """How strongly a column name says latitude (``kind="lat"``) or longitude."""
+    table = LAT_TOKENS if kind == "lat" else LON_TOKENS
+    return max((table.get(token, 0) for token in _name_tokens(name)), default=0)
+
+
+def _number(part: pd.Series) -> pd.Series:
+    return pd.to_numeric(part.str.replace(",", ".", regex=False), errors="coerce")
+
+
+def _parse_text(text: pd.Series, kind: str) -> pd.Series:
+    """Comma decimals and DMS strings; anything else becomes NaN."""
+    out = pd.Series(np.nan, index=text.index)
+    comma = text.str.match(_COMMA_DECIMAL)
+    if comma.any():
+        out[comma] = _number(text[comma])
+
+    rest = text[~comma]
+    if rest.empty:
+        return out
+    parts = rest.str.extract(_DMS)
+    matched = parts["deg"].notna()
+    if not matched.any():
+        return out
+    parts = parts[matched]
+    value = (_number(parts["deg"]) + _number(parts["min"]).fillna(0) / 60.0
+             + _number(parts["sec"]).fillna(0) / 3600.0)
+    hemi = parts["h1"].fillna(parts["h2"]).str.upper()
+    # Minutes and seconds must be below 60, and a single hemisphere must suit the axis
+    ok = (_number(parts["min"]).fillna(0) < 60) & (_number(parts["sec"]).fillna(0) < 60)
+    ok &= hemi.isna() | hemi.isin(list(HEMISPHERES[kind]))
+    ok &= parts["h1"].isna() | parts["h2"].isna()
+    negative = (parts["sign"] == "-") | hemi.isin(["S", "W"])
+    out[parts.index] = value.where(~negative, -value).where(ok)
+    return out
+
+
+def parse_coordinates(values, kind: str) -> np.ndarray:
+    """Parse latitudes (``kind="lat"``) or longitudes to float; invalid values are NaN."""
+    values = pd.Series(values) if not isinstance(values, pd.Series) else values
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        parsed = values.to_numpy(dtype=float, na_value=np.nan, copy=True)
+    else:
+        numbers = pd.to_numeric(values, errors="coerce")
+        leftover = numbers.isna() & values.notna()
+        if leftover.any():
+            text = values[leftover].astype(str)
+            text = text[text.str.strip() != ""]
+            if not text.empty:
+                numbers = numbers.astype(float)
+                numbers[text.index] = _parse_text(text, kind)
+        parsed = numbers.to_numpy(dtype=float, na_value=np.nan, copy=True)
+    parsed[np.abs(parsed) > LIMITS[kind]] = np.nan
+    return parsed
+
+
+def _sample(frame: pd.DataFrame) -> pd.DataFrame:
+    if len(frame) <= SAMPLE_ROWS:
+        return frame
+    # Spread over the whole frame rather than just its head
+    return frame.iloc[np.linspace(0, len(frame) - 1, SAMPLE_ROWS).astype(int)]
+
+
+def _valid_share(sample: pd.Series, kind: str):
+    """Share of the non-empty sample that parses into range, or None without data."""
+    present = sample.notna() & (sample.astype(str).str.strip() != "")
+    if not present.any():
+        return None
+    return float(np.isfinite(parse_coordinates(sample[present], kind)).mean())
+
+
+def _value_candidates(sample: pd.DataFrame, exclude) -> list:
+    """Columns whose sampled values all look like precise in-range coordinates."""
+    cols = [col for col in sample.columns if col not in exclude]
+    if not cols or sample.empty:
+        return []
+    # One numeric parse over every cell of every remaining column at once
+    cells = sample[cols].to_numpy(dtype=object).ravel(order="F")
+    numbers = pd.to_numeric(pd.Series(cells), errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    numbers = numbers.reshape(len(sample), len(cols), order="F")
+    scaled = numbers * 10 ** (MIN_DECIMALS - 1)
+    precise = np.abs(scaled - np.round(scaled)) > 1e-6
+    found = []
+    for i, col in enumerate(cols):
+        v = numbers[:, i]
+        ok = np.isfinite(v) & precise[:, i] & (np.abs(v) <= LIMITS["lon"])
+        if ok.mean() >= MIN_VALID_SHARE:
+            found.append((col, bool((np.abs(v[ok]) <= LIMITS["lat"]).all())))
+    return found
+
+
+def detect_coordinate_columns(frame):
+    """Return the (latitude, longitude) column names, or None for each missing one.
+
+    ``frame`` is a DataFrame (names and sampled values are used) or just a
+    list of column names.
+    """
+    if not isinstance(frame, pd.DataFrame):
+        frame = pd.DataFrame(columns=list(frame))
+    sample = _sample(frame)
+
+    def best(kind, exclude=()):
+        ranked = []
+        for pos, col in enumerate(frame.columns):
+            score = name_score(col, kind)
+            if not score or col in exclude:
+                continue
+            share = _valid_share(sample[col], kind) if not sample.empty else None
+            if share is not None and share < MIN_VALID_SHARE:
+                continue
+            ranked.append((-score, -(share or 0.0), pos, col))
+        return min(ranked)[-1] if ranked else None
+
+    lat_col = best("lat")
+    lon_col = best("lon", exclude=(lat_col,))
+    if lat_col is None or lon_col is None:
+        # Fall back to the values: precise decimals in range, latitude first
+        candidates = _value_candidates(sample, exclude={lat_col, lon_col})
+        if lat_col is None:
+            lat_col = next((col for col, fits_lat in candidates if fits_lat), None)
+        if lon_col is None:
+            lon_col = next((col for col, _ in candidates if col != lat_col), None)
+    return lat_col, lon_col
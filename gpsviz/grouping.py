@@ -0,0 +1,85 @@
+"""Single-pass group splitting for the per-group maps.
+
+Rows are numbered by their (composite) group key once, stably sorted by
+that number and then handed out as contiguous slices, so splitting costs
+one sort instead of one boolean mask per group. Per-group median centers
+come out of the same grouped aggregation.
+
+Every group also gets the file name of its map. Names are derived from
+the key but made unique within the run, since different keys can map to
+the same file-system-safe text.
+"""
+import hashlib
+from collections import Counter
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+
+class Group(NamedTuple):
+    key: tuple
+    frame: pd.DataFrame
+    center: list
+    filename: str  # "<key>_map.html", unique among the groups of a split
+
+
+def split_groups(df: pd.DataFrame, group_vars, lat_col: str, lon_col: str) -> list:
+    """Split ``df`` into one Group per combination of ``group_vars`` values.
+
+    Groups come back in order of first appearance and rows inside a group
+    keep their original order. Rows with a missing key are dropped, as the
+    old ``df[df[col] == grp]`` filtering did.
+    """
+    group_vars = list(group_vars)
+    # Rows with a missing key get no group number (NaN on newer pandas)
+    codes = df.groupby(group_vars, sort=False).ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    if len(codes) == 0 or codes.max() < 0:
+        return []
+
+    # -1 (missing key) sorts first, so it is sliced off the front
+    order = np.argsort(codes, kind="stable")
+    order = order[np.searchsorted(codes[order], 0):]
+    sorted_codes = codes[order]
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(sorted_codes))])
+
+    ordered = df.iloc[order]
+    centers = ordered[[lat_col, lon_col]].groupby(sorted_codes).median().to_numpy()
+    keys = list(ordered[group_vars].iloc[bounds[:-1]].itertuples(index=False, name=None))
+
+    return [
+        Group(key, ordered.iloc[bounds[i]:bounds[i + 1]], centers[i].tolist(), filename)
+        for i, (key, filename) in enumerate(zip(keys, map_filenames(keys)))
+    ]
+
+
+def group_title(group_vars, key) -> str:
+    return ", ".join(f"{var}: {value}" for var, value in zip(group_vars, key))
+
+
+def safe_name(key) -> str:
+    return "_".join("".join(c if c.isalnum() else "_" for c in str(value)) for value in key)
+
+
+def map_filenames(keys) -> list:
+    """``<safe_name(key)>_map.html`` per key, unique (ignoring case) within ``keys``.
+
+    safe_name() is not one-to-one: ("x_y", "z") and ("x", "y_z") both give
+    "x_y_z", as do keys differing only in punctuation or letter case. Names
+    shared by several keys get a short hash of the key, so each key keeps
+    the same file name from run to run.
+    """
+    keys = list(keys)
+    stems = [safe_name(key) for key in keys]
+    shared = Counter(stem.lower() for stem in stems)
+    names, taken = [], set()
+    for key, stem in zip(keys, stems):
+        if shared[stem.lower()] > 1:
+            stem = f"{stem}_{hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:8]}"
+        name, n = f"{stem}_map.html", 1
+        while name.lower() in taken:
+            # A hashed name meeting another key's plain one
+            name, n = f"{stem}_{n}_map.html", n + 1
+        taken.add(name.lower())
+        names.append(name)
+    return names
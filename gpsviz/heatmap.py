@@ -0,0 +1,166 @@
+"""Heatmaps from server-side binned density grids.
+
+Instead of shipping every point to leaflet.heat, points are summed into
+Web Mercator grid cells (optionally weighted by a numeric column) at
+several resolutions, one per pair of zoom levels. Cells are 1/16 of a
+map tile, about 16 pixels on screen at the zoom they are drawn for.
+Resolutions stop once a grid would exceed the cell budget (or would no
+longer merge points) and the map then over-zooms the finest one, so the
+payload depends on the grid and not on the number of rows. The same cells can be exported as GeoJSON.
+"""
+from pathlib import PurePosixPath
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from folium.elements import JSCSSMixin
+from folium.plugins import HeatMap
+from jinja2 import Template
+
+from gpsviz.markers import COORD_DECIMALS, base_map, to_js
+from gpsviz.tiles import tile_xy
+
+MIN_ZOOM = 2
+MAX_ZOOM = 18
+
+# Cells per tile side (2^4 = 16, so a cell is 16 px at its display zoom)
+BIN_SHIFT = 4
+
+# Cells per resolution; finer grids are dropped
+CELL_BUDGET = 20_000
+
+# Cells at or above this weight quantile are drawn at full intensity
+INTENSITY_QUANTILE = 0.99
+
+# Grids stop getting finer once this share of points sits alone in a cell
+SEPARATED_SHARE = 0.9
+
+
+class DensityLevel(NamedTuple):
+    zoom: int  # first display zoom this grid is used at
+    x: np.ndarray  # cell indices at zoom + BIN_SHIFT
+    y: np.ndarray
+    weight: np.ndarray
+    count: np.ndarray
+
+
+def numeric_weights(values) -> np.ndarray:
+    """Parse a weight column; unparseable or missing values weigh nothing."""
+    return np.nan_to_num(pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float))
+
+
+def density_levels(lat, lon, weight=None, min_zoom: int = MIN_ZOOM, max_zoom: int = MAX_ZOOM,
+                   budget: int = CELL_BUDGET) -> list:
+    """Binned density grids, coarsest first, one for every other zoom level."""
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    levels = []
+    for zoom in range(min_zoom, max_zoom + 1, 2):
+        z = zoom + BIN_SHIFT
+        x, y = tile_xy(lat, lon, z)
+        cells, inverse, count = np.unique(x * (1 << z) + y, return_inverse=True, return_counts=True)
+        if levels and len(cells) > budget:
+            break
+        summed = count.astype(float) if weight is None else np.bincount(inverse, weights=weight)
+        levels.append(DensityLevel(zoom, cells >> z, cells & ((1 << z) - 1), summed, count))
+        if len(cells) >= SEPARATED_SHARE * len(lat):
+            # Nearly one point per cell: finer grids would only repeat the points
+            break
+    return levels
+
+
+def cell_bounds(x, y, z: int):
+    """(south, west, north, east) of Web Mercator cells at zoom ``z``."""
+    n = float(1 << z)
+
+    def lat_of(row):
+        return np.degrees(np.arctan(np.sinh(np.pi * (1.0 - 2.0 * row / n))))
+
+    return lat_of(y + 1), x / n * 360.0 - 180.0, lat_of(y), (x + 1) / n * 360.0 - 180.0
+
+
+def _level_payload(level: DensityLevel) -> dict:
+    south, west, north, east = cell_bounds(level.x, level.y, level.zoom + BIN_SHIFT)
+    positive = level.weight[level.weight > 0]
+    top = float(np.quantile(positive, INTENSITY_QUANTILE)) if len(positive) else 1.0
+    return {
+        "z": level.zoom,
+        "lat": np.round((south + north) / 2, COORD_DECIMALS).tolist(),
+        "lon": np.round((west + east) / 2, COORD_DECIMALS).tolist(),
+        "w": np.round(level.weight, 4).tolist(),
+        "max": top,
+    }
+
+
+class DensityLayer(JSCSSMixin):
+    """leaflet.heat layer that swaps in the density grid matching the zoom."""
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function() {
+                var map = {{ this._parent.get_name() }};
+                var levels = {{ this.payload }};
+                var cellPx = {{ this.cell_px }};
+                var heat = L.heatLayer([], {minOpacity: 0.3, blur: 12}).addTo(map);
+                function update() {
+                    var z = map.getZoom(), level = levels[0];
+                    levels.forEach(function(l) { if (l.z <= z) { level = l; } });
+                    var points = level.lat.map(function(lat, i) {
+                        return [lat, level.lon[i], level.w[i]];
+                    });
+                    // Intensity is not rescaled by zoom: the grid already matches it
+                    heat.setOptions({
+                        max: level.max,
+                        maxZoom: z,
+                        radius: Math.min(cellPx * Math.pow(2, z - level.z), 80)
+                    });
+                    heat.setLatLngs(points);
+                }
+                map.on("zoomend", update);
+                update();
+                return heat;
+            })();
+        {% endmacro %}
+    """)
+
+    default_js = HeatMap.default_js
+
+    def __init__(self, levels):
+        super().__init__()
+        self._name = "DensityLayer"
+        self.payload = to_js([_level_payload(level) for level in levels])
+        self.cell_px = 256 >> BIN_SHIFT
+
+
+def heatmap_map(levels, title=None, center=None, zoom_start: int = 12):
+    """Build a folium map drawing the density grids as a heatmap."""
+    if center is None:
+        # Weighted centre of the coarsest grid
+        south, west, north, east = cell_bounds(levels[0].x, levels[0].y, levels[0].zoom + BIN_SHIFT)
+        w = levels[0].count
+        center = [float(np.average((south + north) / 2, weights=w)),
+                  float(np.average((west + east) / 2, weights=w))]
+    m = base_map(center, title, zoom_start)
+    DensityLayer(levels).add_to(m)
+    return m
+
+
+def density_geojson(levels) -> str:
+    """Every grid cell as a GeoJSON polygon with its zoom, weight and point count."""
+    features = []
+    for level in levels:
+        south, west, north, east = (pd.Series(np.round(a, COORD_DECIMALS)).astype(str)
+                                    for a in cell_bounds(level.x, level.y, level.zoom + BIN_SHIFT))
+        ring = ("[[" + west + "," + south + "],[" + east + "," + south + "],[" + east + "," + north
+                + "],[" + west + "," + north + "],[" + west + "," + south + "]]")
+        props = ('{"zoom":' + str(level.zoom) + ',"weight":' + pd.Series(level.weight).astype(str)
+                 + ',"count":' + pd.Series(level.count).astype(str) + "}")
+        features.append('{"type":"Feature","geometry":{"type":"Polygon","coordinates":[' + ring
+                        + ']},"properties":' + props + "}")
+    body = ",".join(",".join(f) for f in features)
+    return '{"type":"FeatureCollection","features":[' + body + "]}"
+
+
+def geojson_name(filename: str) -> str:
+    """``x_map.html`` -> ``x_map_density.geojson``."""
+    return f"{PurePosixPath(filename).stem}_density.geojson"
@@ -0,0 +1,225 @@
+"""Upload ingestion with a content-addressed cache.
+
+Streamlit reruns the whole script on every widget change, so parsing is
+done once per distinct upload: the parsed frame, the detected coordinate
+columns and the numeric coordinate arrays are cached under a hash of the
+uploaded bytes plus the reader options, and shared by every rerun and
+session. The cache is LRU with both an entry and a byte budget.
+
+Two readers exist. The default one reads every cell as a string, as the
+app always has. The typed one parses coordinates straight to float64,
+keeps only the requested columns and stores them as text, using
+pyarrow's multithreaded CSV parser when available. Text columns with
+few distinct values become categoricals; near-unique ones (IDs,
+timestamps, free text) stay plain strings, where a dictionary would
+only add to their size. Only the coordinates have their type inferred,
+so IDs such as "007" and "7" stay distinct group keys.
+Parquet and Feather files keep their own column types in both readers
+(see gpsviz.columnar).
+"""
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from gpsviz.columnar import is_columnar, read_columnar
+from gpsviz.coordinates import SAMPLE_ROWS, detect_coordinate_columns, parse_coordinates
+from gpsviz.instrumentation import stage
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:  # pragma: no cover - pyarrow ships with streamlit
+    pa = pc = pa_csv = None
+
+# Rows parsed for the preview when the full read is deferred
+PREVIEW_ROWS = 10
+
+# Text columns with at most this many distinct values per row become categoricals
+CATEGORY_MAX_SHARE = 0.5
+
+
+class Dataset(NamedTuple):
+    frame: pd.DataFrame
+    lat_col: str
+    lon_col: str
+    lat: np.ndarray
+    lon: np.ndarray
+    nbytes: int
+
+
+def read_table(data: bytes, name: str, **options) -> pd.DataFrame:
+    if name.endswith('xlsx'):
+        return pd.read_excel(io.BytesIO(data), **options)
+    if is_columnar(name):
+        # Already typed: the dtype option does not apply
+        return read_columnar(data, name, columns=options.get("usecols"), nrows=options.get("nrows"))
+    return pd.read_csv(io.BytesIO(data), **options)
+
+
+def _coordinates(frame: pd.DataFrame, col, kind: str):
+    if col is None:
+        return None
+    return parse_coordinates(frame[col], kind)
+
+
+def _low_cardinality(distinct: int, rows: int) -> bool:
+    return distinct <= rows * CATEGORY_MAX_SHARE
+
+
+def _read_csv_arrow(data: bytes, usecols, coord_cols) -> pd.DataFrame:
+    read_options = pa_csv.ReadOptions(use_threads=True)
+    if usecols is None:
+        usecols = list(pd.read_csv(io.BytesIO(data), nrows=0).columns)
+
+    def convert_options(coord_type):
+        # Everything but the coordinates is kept as text
+        return pa_csv.ConvertOptions(
+            include_columns=usecols,
+            column_types={col: coord_type if col in coord_cols else pa.string() for col in usecols},
+            strings_can_be_null=True,
+        )
+
+    try:
+        table = pa_csv.read_csv(pa.BufferReader(data), read_options=read_options,
+                                convert_options=convert_options(pa.float64()))
+    except pa.ArrowInvalid:
+        # Some coordinate cells are not numbers: read them as text, coerce below
+        table = pa_csv.read_csv(pa.BufferReader(data), read_options=read_options,
+                                convert_options=convert_options(pa.string()))
+    for i, col in enumerate(table.column_names):
+        column = table.column(i)
+        if col not in coord_cols and _low_cardinality(pc.count_distinct(column).as_py(), len(column)):
+            table = table.set_column(i, col, pc.dictionary_encode(column))
+    return table.to_pandas()
+
+
+def read_typed(data: bytes, name: str, lat_col, lon_col, columns=None) -> pd.DataFrame:
+    """Read only ``columns`` plus the coordinates, with numeric coordinates.
+
+    Coordinate columns come back as float64 with invalid or out-of-range
+    cells as NaN and the other columns of CSV and Excel files as text,
+    categorical where values repeat.
+    """
+    coord_cols = [col for col in (lat_col, lon_col) if col is not None]
+    usecols = None
+    if columns is not None:
+        usecols = list(dict.fromkeys([*columns, *coord_cols]))
+
+    if is_columnar(name):
+        frame = read_columnar(data, name, usecols)
+    elif pa_csv is not None and not name.endswith('xlsx'):
+        frame = _read_csv_arrow(data, usecols, coord_cols)
+    else:
+        frame = read_table(data, name, usecols=usecols, dtype=str)
+        for col in frame.columns:
+            if col not in coord_cols and _low_cardinality(frame[col].nunique(), len(frame)):
+                frame[col] = frame[col].astype("category")
+
+    for col, kind in ((lat_col, "lat"), (lon_col, "lon")):
+        if col is not None:
+            frame[col] = parse_coordinates(frame[col], kind)
+    return frame
+
+
+def load_dataset(data: bytes, name: str, typed: bool = False, columns=None, nrows=None) -> Dataset:
+    """Parse an upload and pre-compute everything that only depends on its content.
+
+    ``typed=True`` uses read_typed() restricted to ``columns``; ``nrows``
+    reads just the first rows as strings (header and preview only).
+    """
+    if typed:
+        # A few rows are enough to score the candidate coordinate columns
+        with stage("detect"):
+            head = read_table(data, name, dtype=str, nrows=SAMPLE_ROWS)
+            lat_col, lon_col = detect_coordinate_columns(head)
+        with stage("parse") as span:
+            frame = read_typed(data, name, lat_col, lon_col, columns)
+            span.rows = len(frame)
+    else:
+        with stage("parse") as span:
+            frame = read_table(data, name, dtype=str, nrows=nrows)
+            span.rows = len(frame)
+        with stage("detect"):
+            lat_col, lon_col = detect_coordinate_columns(frame)
+    with stage("coordinates", rows=len(frame)):
+        lat, lon = _coordinates(frame, lat_col, "lat"), _coordinates(frame, lon_col, "lon")
+    nbytes = int(frame.memory_usage(deep=True).sum())
+    nbytes += sum(arr.nbytes for arr in (lat, lon) if arr is not None)
+    return Dataset(frame, lat_col, lon_col, lat, lon, nbytes)
+
+
+def clean_frame(dataset: Dataset) -> pd.DataFrame:
+    """Rows with valid numeric coordinates, coordinates converted to float.
+
+    The cached frame is shared between sessions and is never modified.
+    """
+    valid = ~(np.isnan(dataset.lat) | np.isnan(dataset.lon))
+    return dataset.frame[valid].assign(**{
+        dataset.lat_col: dataset.lat[valid],
+        dataset.lon_col: dataset.lon[valid],
+    })
+
+
+def input_kind(name: str) -> str:
+    """The reader an upload named ``name`` goes through: "xlsx", "parquet", "feather" or "csv"."""
+    if name.endswith('xlsx'):
+        return 'xlsx'
+    if is_columnar(name):
+        return 'parquet' if name.lower().endswith('.parquet') else 'feather'
+    return 'csv'
+
+
+def content_key(data: bytes, name: str, options: dict) -> tuple:
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    return (digest, input_kind(name), tuple(sorted((k, repr(v)) for k, v in options.items() if v is not None and v is not False)))
+
+
+class IngestCache:
+    """Thread-safe LRU of parsed Datasets, bounded by entry count and bytes."""
+
+    def __init__(self, max_entries: int = 8, max_bytes: int = 2 * 1024 ** 3):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def get_or_load(self, data: bytes, name: str, **options) -> Dataset:
+        """Return the cached Dataset for these bytes and load_dataset() options."""
+        key = content_key(data, name, options)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Parse outside the lock so other sessions are not blocked
+        dataset = load_dataset(data, name, **options)
+        with self._lock:
+            self._entries[key] = dataset
+            self._entries.move_to_end(key)
+            self._evict()
+        return dataset
+
+    def _evict(self) -> None:
+        # Always keep the newest entry, even when it alone exceeds the budget
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self.nbytes > self.max_bytes
+        ):
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
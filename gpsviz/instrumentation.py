@@ -0,0 +1,265 @@
+"""Per-stage timings for a map-generation run.
+
+Library code marks its steps with ``stage()``:
+
+    with stage("group split", rows=len(df)):
+        groups = split_groups(...)
+
+Outside a RunTrace this is a no-op costing one context-variable lookup,
+so the hooks stay in place for the app, the batch pipeline and the
+benchmarks alike. While a RunTrace is started (``with RunTrace() as
+trace:``, or start()/stop() around a Streamlit script run) every stage
+records its wall time, the rows it handled and how much the process'
+resident memory (RSS) grew or shrank over it. RSS is process-wide, so
+runs overlapping in other threads show up in each other's numbers.
+Stages may nest; each record keeps its depth. Per-item timings (e.g.
+one per rendered map) are collected under the enclosing stage with
+``record_item()``.
+
+Two heavier captures are opt-in: ``profile=True`` runs cProfile over
+the traced thread and ``trace_memory=True`` runs tracemalloc, which adds
+the peak traced Python allocation of each stage and the top allocation
+sites of the run. tracemalloc is process-wide, so it keeps running until
+the last memory-tracing RunTrace (of any thread) has stopped, and its
+peak counter is shared: a stage during which another memory-tracing run
+was active reports no peak rather than a wrong one.
+"""
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import NamedTuple
+
+# Per-item timings kept per stage; the summary statistics still cover all of them
+MAX_ITEMS = 1_000
+
+_active = contextvars.ContextVar("gpsviz_run_trace", default=None)
+
+# Memory-tracing RunTraces running now, and whether they started tracemalloc
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+# Bumped whenever a memory-tracing RunTrace starts or stops
+_tracemalloc_events = 0
+
+
+class Stage(NamedTuple):
+    name: str
+    depth: int
+    seconds: float
+    rows: int
+    rss_change: int  # resident memory at the end minus at the start, bytes; None when unknown
+    peak_traced: int  # tracemalloc peak during the stage, None unless tracing memory alone
+
+
+def current_rss() -> int:
+    """Resident set size of this process now, in bytes; None where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _tracing_alone() -> int:
+    """Event count while this is the only memory-tracing RunTrace, else None."""
+    with _tracemalloc_lock:
+        return _tracemalloc_events if _tracemalloc_users == 1 else None
+
+
+class _Span:
+    def __init__(self, name: str, depth: int, rows):
+        self.name = name
+        self.depth = depth
+        self.rows = rows
+        self.peak = 0
+        self.items = []
+        self.item_count = 0
+        self.item_seconds = 0.0
+        self.item_max = 0.0
+
+
+def _acquire_tracemalloc() -> None:
+    global _tracemalloc_users, _tracemalloc_owned, _tracemalloc_events
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_owned = True
+        _tracemalloc_users += 1
+        _tracemalloc_events += 1
+        tracemalloc.reset_peak()
+
+
+def _release_tracemalloc() -> None:
+    global _tracemalloc_users, _tracemalloc_owned, _tracemalloc_events
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        _tracemalloc_events += 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+
+
+class RunTrace:
+    """Collects Stage records while active (``with RunTrace() as trace:``)."""
+
+    def __init__(self, profile: bool = False, trace_memory: bool = False):
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.items = {}
+        self.seconds = None
+        self._stack = []
+        self._profiler = None
+        self.memory_top = None
+        self._running = False
+
+    def start(self) -> "RunTrace":
+        self._running = True
+        self._previous = _active.get()
+        _active.set(self)
+        if self.trace_memory:
+            _acquire_tracemalloc()
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            try:
+                self._profiler.enable()
+            except ValueError:
+                # Another profiler is already attached to this thread
+                self._profiler = None
+        self._start = time.perf_counter()
+        return self
+
+    def stop(self) -> None:
+        """End the trace; safe to call more than once."""
+        if not self._running:
+            return
+        self._running = False
+        self.seconds = time.perf_counter() - self._start
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self.trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            self.memory_top = [
+                {"site": str(stat.traceback), "bytes": stat.size, "blocks": stat.count}
+                for stat in snapshot.statistics("lineno")[:20]
+            ]
+            _release_tracemalloc()
+        _active.set(self._previous)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @contextmanager
+    def stage(self, name: str, rows: int = None):
+        span = _Span(name, len(self._stack), rows)
+        rss_start = current_rss()
+        alone = _tracing_alone() if self.trace_memory else None
+        if self.trace_memory and tracemalloc.is_tracing():
+            # Fold the parent's peak so far in before the counter restarts
+            if self._stack:
+                self._stack[-1].peak = max(self._stack[-1].peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._stack.append(span)
+        # Reserve the slot so stages are listed in the order they started
+        slot = len(self.stages)
+        self.stages.append(None)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            seconds = time.perf_counter() - start
+            self._stack.pop()
+            peak = None
+            if self.trace_memory and tracemalloc.is_tracing():
+                peak = max(span.peak, tracemalloc.get_traced_memory()[1])
+                if self._stack:
+                    self._stack[-1].peak = max(self._stack[-1].peak, peak)
+                tracemalloc.reset_peak()
+                # Another run may have reset the shared peak meanwhile
+                if alone is None or _tracing_alone() != alone:
+                    peak = None
+            rss_end = current_rss()
+            rss_change = rss_end - rss_start if None not in (rss_start, rss_end) else None
+            self.stages[slot] = Stage(name, span.depth, seconds, span.rows, rss_change, peak)
+            if span.item_count:
+                self.items[name] = {
+                    "count": span.item_count,
+                    "seconds": span.item_seconds,
+                    "mean": span.item_seconds / span.item_count,
+                    "max": span.item_max,
+                    "slowest": sorted(span.items, key=lambda item: -item[1])[:10],
+                }
+
+    def record_item(self, label: str, seconds: float) -> None:
+        if not self._stack:
+            return
+        span = self._stack[-1]
+        span.item_count += 1
+        span.item_seconds += seconds
+        span.item_max = max(span.item_max, seconds)
+        if len(span.items) < MAX_ITEMS:
+            span.items.append((label, seconds))
+
+    def summary(self) -> list:
+        """One display row per stage, indented by depth, sizes in MB."""
+        rows = []
+        for st in self.stages:
+            if st is None:
+                continue
+            rows.append({
+                "stage": "  " * st.depth + st.name,
+                "seconds": round(st.seconds, 3),
+                "rows": st.rows,
+                "RSS change MB": None if st.rss_change is None else round(st.rss_change / 1e6, 1),
+                "peak traced MB": None if st.peak_traced is None else round(st.peak_traced / 1e6, 1),
+            })
+        return rows
+
+    def profile_text(self, limit: int = 30) -> str:
+        """cProfile statistics by cumulative time, or None when not profiled."""
+        if self._profiler is None:
+            return None
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    def to_dict(self) -> dict:
+        return {
+            "seconds": self.seconds,
+            "stages": [st._asdict() for st in self.stages if st is not None],
+            "items": self.items,
+            "memory_top": self.memory_top,
+            "profile": self.profile_text(),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+
+@contextmanager
+def stage(name: str, rows: int = None):
+    """Time a step on the active RunTrace; yields an object whose ``rows`` can be set."""
+    trace = _active.get()
+    if trace is None:
+        yield _Span(name, 0, rows)
+        return
+    with trace.stage(name, rows) as span:
+        yield span
+
+
+def record_item(label: str, seconds: float) -> None:
+    """Add one item's time (e.g. a rendered map) to the innermost active stage."""
+    trace = _active.get()
+    if trace is not None:
+        trace.record_item(label, seconds)
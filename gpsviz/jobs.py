@@ -0,0 +1,179 @@
+"""Background map-generation jobs on a bounded worker pool.
+
+A Streamlit script run that renders thousands of maps blocks its session
+and is cancelled by the next widget change. Generation is submitted here
+instead: the JobQueue (one per server) runs at most ``workers`` jobs at
+a time on its own threads, and sessions poll the Job for its stage and
+progress until it has finished, then fetch its result.
+
+Jobs are keyed by everything that determines their output (the upload's
+content hash and the options), so identical submissions (a double click,
+a rerun, or two users generating the same maps) share one job. Finished
+jobs are kept for a while so late pollers still find them, but only
+until every session that submitted one has taken its result: from then
+on the (possibly large) result lives in the sessions' ResultStores
+alone. A failed job is replaced by a fresh one when it is submitted
+again.
+
+The job threads mostly orchestrate: parsing and numpy work release the
+GIL, and the CPU-heavy map rendering fans out to processes when the job
+runs with the "process" render mode.
+"""
+import os
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = int(os.environ.get("GPSVIZ_JOB_WORKERS", 2))
+
+# Finished jobs are kept this long (seconds) and at most this many
+FINISHED_TTL = 900.0
+MAX_FINISHED = 8
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class Job:
+    """State of one submission, updated by the worker and read by pollers."""
+
+    def __init__(self, key):
+        self.key = key
+        self.state = QUEUED
+        self.stage = None
+        self.done = 0
+        self.total = 0
+        self.result = None
+        self.error = None
+        self.traceback = None
+        self.trace = None  # RunTrace of the job, when it was submitted with one
+        self.owners = set()  # submitters that have not taken the result yet
+        self.submitted = time.time()
+        self.started = None
+        self.finished_at = None
+
+    def update(self, stage: str = None, done: int = None, total: int = None) -> None:
+        """Report progress from inside the job function."""
+        if stage is not None:
+            self.stage = stage
+        if total is not None:
+            self.total = total
+        if done is not None:
+            self.done = done
+
+    @property
+    def progress(self) -> float:
+        return min(self.done / self.total, 1.0) if self.total else 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (DONE, FAILED)
+
+    @property
+    def seconds(self) -> float:
+        """Run time so far (or in total once finished)."""
+        if self.started is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started
+
+
+class JobQueue:
+    """Thread-safe, deduplicating job queue with ``workers`` concurrent jobs."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, finished_ttl: float = FINISHED_TTL,
+                 max_finished: int = MAX_FINISHED):
+        self.workers = max(workers, 1)
+        self.finished_ttl = finished_ttl
+        self.max_finished = max_finished
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="gpsviz-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args, trace=None, owner=None, **kwargs) -> Job:
+        """Run ``fn(job, *args, **kwargs)`` in the background, or return the job already under ``key``.
+
+        ``trace`` (a RunTrace) is active on the worker thread while the job
+        runs. ``owner`` (e.g. a session token) identifies the submitter that
+        will take() the result.
+        """
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(key)
+            if job is not None and job.state != FAILED:
+                job.owners.add(owner)
+                return job
+            job = Job(key)
+            job.trace = trace
+            job.owners.add(owner)
+            self._jobs[key] = job
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn, args, kwargs) -> None:
+        job.state, job.started = RUNNING, time.time()
+        state = FAILED
+        try:
+            if job.trace is not None:
+                with job.trace:
+                    job.result = fn(job, *args, **kwargs)
+            else:
+                job.result = fn(job, *args, **kwargs)
+            state = DONE
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.traceback = traceback.format_exc()
+        finally:
+            # finished_at first: _prune() reads it as soon as the job counts as finished
+            with self._lock:
+                job.finished_at = time.time()
+                job.state = state
+
+    def take(self, job: Job, owner=None):
+        """The result of a finished ``job`` for ``owner``.
+
+        The job is dropped from the queue (and lets go of its result) once
+        all of its owners have taken it; submitting the key again then
+        starts a new job.
+        """
+        with self._lock:
+            result = job.result
+            job.owners.discard(owner)
+            if not job.owners:
+                if self._jobs.get(job.key) is job:
+                    del self._jobs[job.key]
+                job.result = None
+            return result
+
+    def get(self, key):
+        """The job under ``key``, or None when unknown or expired."""
+        with self._lock:
+            self._prune()
+            return self._jobs.get(key)
+
+    def position(self, job: Job) -> int:
+        """Number of queued jobs submitted before ``job``."""
+        with self._lock:
+            ahead = 0
+            for other in self._jobs.values():
+                if other is job:
+                    return ahead
+                ahead += other.state == QUEUED
+            return ahead
+
+    def counts(self) -> dict:
+        with self._lock:
+            counts = dict.fromkeys((QUEUED, RUNNING, DONE, FAILED), 0)
+            for job in self._jobs.values():
+                counts[job.state] += 1
+            return counts
+
+    def _prune(self) -> None:
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.finished]
+        for i, job in enumerate(finished):
+            if now - job.finished_at > self.finished_ttl or i < len(finished) - self.max_finished:
+                del self._jobs[job.key]
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,130 @@
+"""Vectorized marker layers.
+
+Instead of one ``folium.CircleMarker`` per row, every point of a map is
+emitted as a single compact JSON payload (columnar lat/lon arrays plus a
+table of unique popups) that a short Leaflet loop turns into canvas-drawn
+circle markers in the browser.
+"""
+import json
+
+import folium
+import numpy as np
+import pandas as pd
+from branca.element import MacroElement
+from jinja2 import Template
+
+# Same look as the original per-row CircleMarkers
+MARKER_STYLE = {
+    "radius": 5,
+    "color": "#2E86AB",
+    "fill": True,
+    "fillColor": "#2E86AB",
+    "fillOpacity": 0.7,
+}
+
+# ~10 cm precision is plenty for field GPS and keeps the payload small
+COORD_DECIMALS = 6
+
+
+def as_text(col: pd.Series) -> pd.Series:
+    """Render a column as strings the way an f-string would, vectorized."""
+    text = col.astype(str)
+    return text.where(col.notna(), "nan")
+
+
+def build_popups(df: pd.DataFrame, label_vars, fallback="Location") -> pd.Series:
+    """Build the popup HTML for every row with whole-column string operations."""
+    if not label_vars:
+        return pd.Series(fallback, index=df.index, dtype=object)
+
+    popups = None
+    for var in label_vars:
+        part = f"<b>{var}:</b> " + as_text(df[var])
+        popups = part if popups is None else popups + "<br>" + part
+    return popups
+
+
+def to_js(obj) -> str:
+    # Keep "</script>" inside popup text from closing the page's script tag
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).replace("</", "<\\/")
+
+
+def point_payload(lat, lon, popups=None, radius=None) -> str:
+    """Serialize one batch of points as the compact JSON PointLayer draws.
+
+    ``radius`` optionally sizes each marker, e.g. by how many points a
+    decimated marker stands for.
+    """
+    lat = np.round(np.asarray(lat, dtype=float), COORD_DECIMALS)
+    lon = np.round(np.asarray(lon, dtype=float), COORD_DECIMALS)
+    payload = {"lat": lat.tolist(), "lon": lon.tolist(), "p": [], "popups": []}
+    if popups is not None:
+        # Many rows share a popup (e.g. the group fallback), so only the
+        # unique strings are shipped and each point stores an index.
+        codes, uniques = pd.factorize(np.asarray(popups, dtype=object))
+        payload["p"] = codes.tolist()
+        payload["popups"] = [str(u) for u in uniques]
+    if radius is not None:
+        payload["r"] = np.round(np.asarray(radius, dtype=float), 1).tolist()
+    return to_js(payload)
+
+
+# Stands in for the payload when the batches are streamed into the page
+STREAMED_PAYLOAD = "/*streamed-points*/[]"
+
+
+class PointLayer(MacroElement):
+    """All points of a map as one canvas-rendered circle-marker layer.
+
+    The payload is either one point batch or a JSON array of batches.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function() {
+                var batches = [].concat({{ this.payload }});
+                var opts = {{ this.style }};
+                opts.renderer = L.canvas({padding: 0.5});
+                var layer = L.featureGroup();
+                batches.forEach(function(d) {
+                    for (var i = 0; i < d.lat.length; i++) {
+                        var o = d.r ? L.extend({}, opts, {radius: d.r[i]}) : opts;
+                        var marker = L.circleMarker([d.lat[i], d.lon[i]], o);
+                        if (d.popups.length) {
+                            marker.bindPopup(d.popups[d.p[i]]);
+                        }
+                        marker.addTo(layer);
+                    }
+                });
+                return layer.addTo({{ this._parent.get_name() }});
+            })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, lat=None, lon=None, popups=None, style=None, payload=None, radius=None):
+        super().__init__()
+        self._name = "PointLayer"
+        self.payload = payload if payload is not None else point_payload(lat, lon, popups, radius)
+        self.style = to_js(style or MARKER_STYLE)
+
+
+def title_element(title: str) -> folium.Element:
+    return folium.Element(f'''
+        <h3 align="center" style="font-size:16px"><b>{title}</b></h3>
+        ''')
+
+
+def base_map(center, title=None, zoom_start=12) -> folium.Map:
+    m = folium.Map(location=center, zoom_start=zoom_start)
+    if title:
+        m.get_root().html.add_child(title_element(title))
+    return m
+
+
+def point_map(lat, lon, popups=None, title=None, center=None, zoom_start=12, radius=None) -> folium.Map:
+    """Build a folium map holding every point in a single PointLayer."""
+    if center is None:
+        center = [float(np.median(lat)), float(np.median(lon))]
+    m = base_map(center, title, zoom_start)
+    PointLayer(lat, lon, popups, radius=radius).add_to(m)
+    return m
@@ -0,0 +1,63 @@
+"""Streaming ZIP packaging for generated maps.
+
+Maps are compressed into the archive as soon as they are rendered. The
+archive lives in a SpooledTemporaryFile, so small downloads stay in
+memory while large grouped runs spill to disk instead of holding every
+HTML string (plus a second copy inside a BytesIO) at once.
+"""
+import os
+import shutil
+import tempfile
+import zipfile
+
+# Archives up to this size never touch the disk
+SPOOL_MAX_BYTES = 32 * 1024 * 1024
+
+
+class MapArchive:
+    """Write-once ZIP of map files, DEFLATE-compressed and disk-spilling."""
+
+    def __init__(self, spool_max_bytes: int = SPOOL_MAX_BYTES, compresslevel: int = 6):
+        self.file = tempfile.SpooledTemporaryFile(max_size=spool_max_bytes)
+        self._zip = zipfile.ZipFile(self.file, "w", compression=zipfile.ZIP_DEFLATED,
+                                    compresslevel=compresslevel)
+        self.names = []
+
+    def add(self, name: str, content, compress: bool = True) -> None:
+        """Add one file; ``compress=False`` stores already compressed content as is."""
+        self._zip.writestr(name, content, compress_type=None if compress else zipfile.ZIP_STORED)
+        self.names.append(name)
+
+    def open(self, name: str):
+        """Writable stream for a map too large to build as one string."""
+        self.names.append(name)
+        return self._zip.open(name, "w", force_zip64=True)
+
+    def close(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def getvalue(self) -> bytes:
+        """Finish the archive and return the compressed ZIP bytes."""
+        self.close()
+        self.file.seek(0)
+        return self.file.read()
+
+    def save(self, path) -> None:
+        """Finish the archive and copy it to ``path`` without reading it into memory."""
+        self.close()
+        self.file.seek(0)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            shutil.copyfileobj(self.file, f)
+        os.replace(tmp, path)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
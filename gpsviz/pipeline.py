@@ -0,0 +1,454 @@
+"""Headless map generation: read, clean, group, render and package.
+
+The app and the command line share this module. build_maps() turns a
+cleaned frame into map files inside a MapArchive. App.py calls it for
+uploads, and process_file() wraps it with reading an input file and
+writing one ZIP next to the others. process_directory() runs
+process_file() over many CSV/XLSX/Parquet/Feather files on a process
+pool, one file per worker, and yields each result as soon as that file
+is done.
+
+Nightly jobs run it from the command line:
+
+    python -m gpsviz.pipeline data/ maps/ --group village --label household_id
+"""
+import argparse
+import functools
+import io
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import NamedTuple
+
+from gpsviz.bundle import BundleWriter, data_name
+from gpsviz.columnar import COLUMNAR_SUFFIXES, DATASET_NAME, annotated_frame, open_source, parquet_bytes
+from gpsviz.clustering import DEFAULT_EPS_M, DEFAULT_MIN_SAMPLES, add_cluster_column
+from gpsviz.decimate import DEFAULT_BUDGET, decimate_task, decimate_tasks
+from gpsviz.grouping import split_groups
+from gpsviz.heatmap import density_geojson, density_levels, geojson_name, heatmap_map
+from gpsviz.ingest import clean_frame, load_dataset
+from gpsviz.instrumentation import record_item, stage
+from gpsviz.packaging import MapArchive
+from gpsviz.render_cache import CACHE_DIR, RenderCache
+from gpsviz.rendering import RENDER_MODES, RenderTask, group_tasks, render_maps, single_task
+from gpsviz.results import GeneratedMaps, PreviewTasks
+from gpsviz.streaming import stream_maps
+from gpsviz.tiles import index_name, write_tileset
+from gpsviz.trajectory import DEFAULT_TOLERANCE_M, order_by_time, simplify_track, track_map
+
+MAP_TYPES = ("points", "heatmap", "trajectory")
+EXPORT_FORMATS = ("html", "bundle", "tiles")
+INPUT_SUFFIXES = (".csv", ".xlsx", *COLUMNAR_SUFFIXES)
+
+
+class MapOptions(NamedTuple):
+    group_vars: tuple = ()
+    label_vars: tuple = ()
+    map_type: str = "points"
+    heat_weight: str = None
+    cluster: bool = False
+    cluster_eps: float = DEFAULT_EPS_M
+    cluster_min_points: int = DEFAULT_MIN_SAMPLES
+    export_format: str = "html"
+    point_budget: int = 0  # markers per exported map, 0 keeps every point
+    render_mode: str = "serial"
+    render_workers: int = None
+    time_col: str = None  # orders the points of trajectory maps
+    track_tolerance: float = DEFAULT_TOLERANCE_M  # metres
+    export_dataset: bool = False  # add the cleaned, annotated rows as Parquet
+
+    def columns(self) -> tuple:
+        """Columns the typed reader has to load besides the coordinates."""
+        wanted = {*self.group_vars, *self.label_vars}
+        if self.heat_weight:
+            wanted.add(self.heat_weight)
+        if self.time_col:
+            wanted.add(self.time_col)
+        return tuple(sorted(wanted))
+
+    def map_entry(self, filename: str) -> str:
+        """Archive entry of the map ``filename``: its page, bundle data file or tiled viewer."""
+        # Heatmaps and trajectories are always written as pages
+        if self.map_type == "points" and self.export_format == "bundle":
+            return data_name(filename)
+        if self.map_type == "points" and self.export_format == "tiles":
+            return index_name(filename)
+        return filename
+
+
+class MapResult(NamedTuple):
+    maps: int
+    group_vars: list  # including the cluster column when clustering
+    first_html: str  # first page rendered as a whole, None for bundle and tiles
+    preview_task: RenderTask  # first map at full detail
+    reused: int  # maps read back from the render cache
+    vertices: tuple = None  # (track points, polyline vertices) of trajectory maps
+
+
+class FileResult(NamedTuple):
+    source: Path
+    output: Path
+    rows: int
+    valid_rows: int
+    maps: int
+    seconds: float
+    error: str = None
+
+
+def build_maps(df_clean, lat_col: str, lon_col: str, options: MapOptions, archive,
+               cache=None, on_stage=None, on_map=None, on_task=None) -> MapResult:
+    """Write the maps for ``options`` into ``archive``.
+
+    ``df_clean`` holds only rows with valid float coordinates (see
+    clean_frame()). ``on_stage(name)`` is called with "order", "cluster"
+    and "maps" as those steps start, ``on_map(done, total)`` after every map and
+    ``on_task(task)`` with each map's full-detail RenderTask before it is
+    written. With ``options.export_dataset`` the rows are written to
+    DATASET_NAME as well, with their map file and its center.
+    """
+    if options.map_type not in MAP_TYPES:
+        raise ValueError(f"Unknown map type {options.map_type!r}; expected one of {MAP_TYPES}")
+    if options.export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {options.export_format!r}; expected one of {EXPORT_FORMATS}")
+    on_stage = on_stage or (lambda name: None)
+    on_map = on_map or (lambda done, total: None)
+    group_vars, label_vars = list(options.group_vars), list(options.label_vars)
+
+    if options.map_type == "trajectory":
+        # Groups keep row order, so every track comes out in time order
+        if not options.time_col:
+            raise ValueError("Trajectory maps need a time column")
+        on_stage("order")
+        with stage("order tracks", rows=len(df_clean)):
+            df_clean = order_by_time(df_clean, options.time_col)
+        if df_clean.empty:
+            raise ValueError(f"No row has a parseable time in {options.time_col!r}")
+
+    if options.cluster:
+        # The cluster column becomes one more grouping variable
+        on_stage("cluster")
+        cluster_col = "cluster" if "cluster" not in df_clean.columns else "gps_cluster"
+        with stage("cluster", rows=len(df_clean)):
+            df_clean = add_cluster_column(df_clean, lat_col, lon_col, options.cluster_eps,
+                                          int(options.cluster_min_points), column=cluster_col)
+        group_vars.append(cluster_col)
+
+    on_stage("maps")
+    groups = None
+    if group_vars:
+        # Split on all grouping variables (composite key) in one pass
+        with stage("group split", rows=len(df_clean)):
+            groups = split_groups(df_clean, group_vars, lat_col, lon_col)
+        tasks = group_tasks(groups, group_vars, label_vars, lat_col, lon_col, options.heat_weight)
+        preview_task = next(group_tasks(groups[:1], group_vars, label_vars, lat_col, lon_col), None)
+        total = len(groups)
+    else:
+        tasks = [single_task(df_clean, label_vars, lat_col, lon_col, options.heat_weight)]
+        preview_task = tasks[0]
+        total = 1
+
+    if on_task is not None:
+        tasks = _observed(tasks, on_task)
+
+    # Level of detail: merge dense points into weighted markers
+    if options.point_budget > 0 and options.export_format != "tiles" and options.map_type == "points":
+        tasks = decimate_tasks(tasks, options.point_budget)
+
+    last = time.perf_counter()
+
+    def finished(i, filename):
+        # Time since the previous map: the render itself when serial, the wait for it with a pool
+        nonlocal last
+        now = time.perf_counter()
+        record_item(filename, now - last)
+        last = now
+        on_map(i + 1, total)
+
+    first_html, reused, vertices = None, 0, None
+    with stage("render", rows=len(df_clean)):
+        if options.map_type == "trajectory":
+            # Only the simplified vertices reach the page
+            points = kept = 0
+            for i, task in enumerate(tasks):
+                keep = simplify_track(task.lat, task.lon, options.track_tolerance)
+                html = track_map(task.lat[keep], task.lon[keep], task.popups[[0, -1]], task.title,
+                                 task.center).get_root().render()
+                archive.add(task.filename, html)
+                first_html = first_html or html
+                points, kept = points + len(task.lat), kept + len(keep)
+                finished(i, task.filename)
+            vertices = (points, kept)
+        elif options.map_type == "heatmap":
+            # Only the binned cells reach the page and the GeoJSON export
+            for i, task in enumerate(tasks):
+                levels = density_levels(task.lat, task.lon, task.weight)
+                html = heatmap_map(levels, task.title, task.center).get_root().render()
+                archive.add(task.filename, html)
+                archive.add(geojson_name(task.filename), density_geojson(levels))
+                first_html = first_html or html
+                finished(i, task.filename)
+        elif options.export_format == "bundle":
+            # One viewer for all maps, one compact data file per map
+            bundle = BundleWriter(archive)
+            for i, task in enumerate(tasks):
+                bundle.add(task)
+                finished(i, task.filename)
+            bundle.close()
+        elif options.export_format == "tiles":
+            # One viewer plus on-demand tiles per map
+            for i, task in enumerate(tasks):
+                write_tileset(archive, task)
+                finished(i, task.filename)
+        else:
+            # Maps stream back in order as the workers finish them;
+            # unchanged ones come straight from the render cache
+            rendered = render_maps(tasks, mode=options.render_mode, workers=options.render_workers, cache=cache)
+            for i, (filename, html, from_cache) in enumerate(rendered):
+                archive.add(filename, html)
+                first_html = first_html or html
+                reused += from_cache
+                finished(i, filename)
+
+    if options.export_dataset:
+        with stage("dataset export", rows=len(df_clean)):
+            frame = annotated_frame(df_clean, lat_col, lon_col, group_vars, groups, options.map_entry)
+            # Parquet is compressed already
+            archive.add(DATASET_NAME, parquet_bytes(frame), compress=False)
+    return MapResult(total, group_vars, first_html, preview_task, reused, vertices)
+
+
+def _observed(tasks, callback):
+    for task in tasks:
+        callback(task)
+        yield task
+
+
+def generate_upload(job, data: bytes, name: str, ingest_mode: str, lat_col: str, lon_col: str,
+                    options: MapOptions, preview_budget: int = DEFAULT_BUDGET, ingest_cache=None,
+                    render_cache=None):
+    """Everything App.py does after "Generate", as a JobQueue job function.
+
+    ``job`` receives progress through ``job.update(stage, done, total)``
+    with the stages "load", "clean", "stream", "order", "cluster", "maps"
+    and "zip".
+    ``ingest_mode`` is "standard", "typed" or "streaming" (CSV only, and
+    without ``options.export_dataset``). Returns
+    GeneratedMaps, or None when no row has valid coordinates.
+    """
+    archive = MapArchive()
+    first_preview = preview_tasks = None
+    notes = []
+    group_vars = list(options.group_vars)
+
+    if ingest_mode == "streaming":
+        # Clean, group and write maps chunk by chunk; previews are read back from the ZIP
+        with stage("stream") as span:
+            streamed = stream_maps(
+                io.BytesIO(data), lat_col, lon_col, options.group_vars, options.label_vars, archive,
+                on_chunk=lambda rows: job.update("stream", rows, 0),
+                on_group=lambda done, total: job.update("maps", done, total),
+            )
+            span.rows = streamed.rows_read
+        if streamed.rows_valid == 0:
+            return None
+        map_count = streamed.maps
+        maps = [(name, name) for name in archive.names if name.endswith(".html")]
+    else:
+        job.update("load")
+        # Through the shared ingestion cache when given (App.py), parsed here otherwise
+        load = functools.partial(ingest_cache.get_or_load if ingest_cache is not None else load_dataset, data, name)
+        with stage("read columns"):
+            dataset = load(typed=True, columns=options.columns()) if ingest_mode == "typed" else load()
+        job.update("clean")
+        with stage("clean", rows=len(dataset.frame)):
+            df_clean = clean_frame(dataset)
+        if df_clean.empty:
+            return None
+
+        # Bundles and tiles always preview within the point budget, heatmaps
+        # and trajectories are already reduced
+        preview_lod = preview_budget > 0 and options.point_budget == 0
+        if options.map_type != "points":
+            preview_lod = False
+        elif options.export_format in ("bundle", "tiles"):
+            preview_lod = True
+
+        # Titles for the preview switcher; budgeted previews are spilled to
+        # disk as tasks and only rendered when picked
+        maps = []
+        if preview_lod:
+            preview_tasks = PreviewTasks()
+
+        def collect(task):
+            maps.append((task.filename, task.title))
+            if preview_tasks is not None:
+                preview_tasks.add(decimate_task(task, preview_budget or DEFAULT_BUDGET))
+
+        built = build_maps(df_clean, lat_col, lon_col, options, archive, cache=render_cache,
+                           on_stage=job.update, on_map=lambda done, total: job.update("maps", done, total),
+                           on_task=collect)
+        group_vars, map_count = built.group_vars, built.maps
+        if built.reused:
+            notes.append(f"♻️ Reused {built.reused} unchanged map(s) from earlier runs.")
+        if built.vertices:
+            notes.append(f"🛣️ Simplified {built.vertices[0]:,} track points to {built.vertices[1]:,} polyline vertices.")
+        if not preview_lod:
+            first_preview = built.first_html
+
+    job.update("zip")
+    with stage("zip"):
+        zip_data = archive.getvalue()
+    info = {"maps": map_count, "grouped": bool(group_vars), "labels": len(options.label_vars), "notes": notes}
+    return GeneratedMaps(zip_data, maps, info, first_preview, preview_tasks)
+
+
+@functools.lru_cache(maxsize=None)
+def _render_cache(directory: str) -> RenderCache:
+    # One instance per worker process, so the cache directory is scanned once
+    return RenderCache(directory)
+
+
+def process_file(path, out_dir, options: MapOptions, typed: bool = True, cache_dir=None,
+                 output_name: str = None) -> FileResult:
+    """Generate the maps for one input file into ``out_dir/<stem>_maps.zip`` (or ``output_name``).
+
+    Errors are caught and reported in the result, so one bad file does not
+    stop a batch. ``cache_dir`` enables the on-disk render cache.
+    """
+    path, start = Path(path), time.perf_counter()
+    output = Path(out_dir) / (output_name or f"{path.stem}_maps.zip")
+
+    def result(rows=0, valid_rows=0, maps=0, error=None):
+        return FileResult(path, output if error is None else None, rows, valid_rows, maps,
+                          time.perf_counter() - start, error)
+
+    try:
+        with stage("read") as span:
+            dataset = load_dataset(open_source(path), path.name, typed=typed,
+                                   columns=options.columns() if typed else None)
+            rows = span.rows = len(dataset.frame)
+        if not dataset.lat_col or not dataset.lon_col:
+            return result(rows, error="no latitude/longitude columns found")
+        with stage("clean", rows=rows):
+            df_clean = clean_frame(dataset)
+        if df_clean.empty:
+            return result(rows, error="no valid coordinates")
+
+        cache = _render_cache(str(cache_dir)) if cache_dir is not None else None
+        with MapArchive() as archive:
+            built = build_maps(df_clean, dataset.lat_col, dataset.lon_col, options, archive, cache=cache)
+            with stage("zip"):
+                archive.save(output)
+    except Exception as e:
+        return result(error=f"{type(e).__name__}: {e}")
+    return result(rows, len(df_clean), built.maps)
+
+
+def input_files(paths) -> list:
+    """Input files (INPUT_SUFFIXES) among ``paths``, with directories expanded (not recursively).
+
+    A Parquet or Feather copy next to a CSV is an input of its own and
+    gets its own ZIP (see output_names()).
+    """
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in INPUT_SUFFIXES))
+        else:
+            files.append(path)
+    return files
+
+
+def output_names(files) -> list:
+    """ZIP name per input file, ``<stem>_maps.zip``, unique (ignoring case) within ``files``.
+
+    Files sharing a stem (d.csv next to d.xlsx or d.parquet, or the same
+    name in two directories) keep their suffix in the name, plus a counter
+    when that is still taken.
+    """
+    files = [Path(path) for path in files]
+    shared = Counter(path.stem.lower() for path in files)
+    names, taken = [], set()
+    for path in files:
+        stem = path.stem if shared[path.stem.lower()] == 1 else f"{path.stem}_{path.suffix.lstrip('.')}"
+        name, n = f"{stem}_maps.zip", 2
+        while name.lower() in taken:
+            name, n = f"{stem}_{n}_maps.zip", n + 1
+        taken.add(name.lower())
+        names.append(name)
+    return names
+
+
+def process_directory(paths, out_dir, options: MapOptions, workers: int = None, typed: bool = True,
+                      cache_dir=None):
+    """Yield a FileResult per input file, in completion order.
+
+    ``paths`` are files or directories (see input_files()). Files are
+    processed ``workers`` at a time in separate processes; maps inside a
+    file are rendered with ``options.render_mode``, which should stay
+    "serial" when several files run at once. Every file gets its own ZIP
+    (see output_names()).
+    """
+    files = input_files([paths] if isinstance(paths, (str, os.PathLike)) else paths)
+    names = output_names(files)
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    workers = min(workers or os.cpu_count() or 1, max(len(files), 1))
+    if workers == 1:
+        for path, name in zip(files, names):
+            yield process_file(path, out_dir, options, typed, cache_dir, name)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(process_file, path, out_dir, options, typed, cache_dir, name)
+                   for path, name in zip(files, names)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate map ZIPs for every CSV/XLSX/Parquet/Feather file in a directory.")
+    parser.add_argument("inputs", nargs="+", type=Path, help="input files or directories")
+    parser.add_argument("out_dir", type=Path, help="directory the ZIPs are written to")
+    parser.add_argument("--group", nargs="+", default=[], help="grouping columns (one map per group)")
+    parser.add_argument("--label", nargs="+", default=[], help="columns shown in the point popups")
+    parser.add_argument("--map-type", choices=MAP_TYPES, default="points")
+    parser.add_argument("--heat-weight", help="numeric column summed per heatmap cell")
+    parser.add_argument("--time-col", help="column ordering the points of trajectory maps")
+    parser.add_argument("--track-tolerance", type=float, default=DEFAULT_TOLERANCE_M,
+                        help="trajectory simplification tolerance in metres, 0 keeps every point")
+    parser.add_argument("--cluster", action="store_true", help="add one map per DBSCAN cluster")
+    parser.add_argument("--cluster-eps", type=float, default=DEFAULT_EPS_M, help="cluster distance in metres")
+    parser.add_argument("--cluster-min-points", type=int, default=DEFAULT_MIN_SAMPLES)
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="html", dest="export_format")
+    parser.add_argument("--export-dataset", action="store_true",
+                        help=f"add the cleaned rows with their map and its center as {DATASET_NAME}")
+    parser.add_argument("--point-budget", type=int, default=0, help="max markers per map, 0 for all points")
+    parser.add_argument("--render-mode", choices=RENDER_MODES, default="serial")
+    parser.add_argument("--workers", type=int, default=None, help="files processed at once (default: CPU count)")
+    parser.add_argument("--standard-reader", action="store_true", help="read every column as text")
+    parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR, help="render cache location")
+    parser.add_argument("--no-cache", action="store_true", help="render every map again")
+    args = parser.parse_args(argv)
+
+    options = MapOptions(
+        tuple(args.group), tuple(args.label), args.map_type, args.heat_weight, args.cluster,
+        args.cluster_eps, args.cluster_min_points, args.export_format, args.point_budget, args.render_mode,
+        time_col=args.time_col, track_tolerance=args.track_tolerance, export_dataset=args.export_dataset,
+    )
+    failed = 0
+    for result in process_directory(args.inputs, args.out_dir, options, workers=args.workers,
+                                    typed=not args.standard_reader,
+                                    cache_dir=None if args.no_cache else args.cache_dir):
+        if result.error:
+            print(f"{result.source}: failed ({result.error})")
+            failed += 1
+        else:
+            print(f"{result.source}: {result.maps} map(s) from {result.valid_rows:,} of {result.rows:,} rows "
+                  f"in {result.seconds:.1f} s -> {result.output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+"""On-disk cache of rendered maps, keyed by what each map is built from.
+
+A RenderTask's key hashes its coordinates, popups (which carry the label
+variables), title, center and marker sizes together with the renderer
+version, so a map is only rendered again when something that shows up
+in it changed. Regenerating after adding a label, or after re-uploading
+a file where a few rows changed, reuses every untouched group's HTML.
+
+Entries are zlib-compressed files named by key. The cache is bounded by
+bytes and evicts the least recently used entries first.
+"""
+import hashlib
+import os
+import threading
+import zlib
+from pathlib import Path
+
+import folium
+import numpy as np
+
+from gpsviz.markers import COORD_DECIMALS, MARKER_STYLE
+
+CACHE_DIR = Path(os.environ.get("GPSVIZ_CACHE_DIR", Path.home() / ".cache" / "gpsviz")) / "renders"
+
+MAX_BYTES = 1024 ** 3
+
+# Bump whenever the map HTML changes for the same task
+RENDER_VERSION = 1
+
+
+def task_key(task) -> str:
+    """Fingerprint of everything that ends up in the task's rendered HTML."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(repr((RENDER_VERSION, folium.__version__, COORD_DECIMALS, sorted(MARKER_STYLE.items()),
+                   task.title, task.center)).encode("utf-8"))
+    for arr in (task.lat, task.lon, task.radius):
+        if arr is not None:
+            h.update(np.ascontiguousarray(arr, dtype=float).tobytes())
+        h.update(b"\x00")
+    h.update("\x1f".join(map(str, task.popups)).encode("utf-8"))
+    return h.hexdigest()
+
+
+class RenderCache:
+    """Thread-safe, byte-bounded LRU of rendered HTML on disk."""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sizes = {}
+        self.hits = 0
+        self.misses = 0
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".html.z"):
+                    self._sizes[entry.name[:-len(".html.z")]] = entry.stat().st_size
+        except OSError:
+            pass
+
+    @property
+    def nbytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.html.z"
+
+    def get(self, key: str):
+        """Cached HTML for ``key``, or None."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                html = zlib.decompress(f.read()).decode("utf-8")
+            os.utime(path)  # mark as recently used
+        except (OSError, zlib.error):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return html
+
+    def put(self, key: str, html: str) -> None:
+        data = zlib.compress(html.encode("utf-8"), 6)
+        path = self._path(key)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        with self._lock:
+            self._sizes[key] = len(data)
+            if self.nbytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Oldest first, down to 90% of the budget so eviction is not run on every put
+        entries = []
+        for key in self._sizes:
+            try:
+                entries.append((self._path(key).stat().st_mtime, key))
+            except OSError:
+                entries.append((0.0, key))
+        total = self.nbytes
+        for _, key in sorted(entries):
+            if total <= 0.9 * self.max_bytes:
+                break
+            total -= self._sizes.pop(key)
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._sizes):
+                try:
+                    self._path(key).unlink()
+                except OSError:
+                    pass
+            self._sizes.clear()
@@ -0,0 +1,131 @@
+"""Map rendering, optionally fanned out to a worker pool.
+
+Each map is described by a small picklable RenderTask (plain arrays, no
+DataFrame), so the same task can be rendered in-process, on a thread pool
+or on a process pool. Results always come back in submission order and
+only a bounded number of renders is in flight at any time.
+"""
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+from gpsviz.grouping import group_title
+from gpsviz.heatmap import numeric_weights
+from gpsviz.markers import build_popups, point_map
+from gpsviz.render_cache import task_key
+
+RENDER_MODES = ("serial", "thread", "process")
+
+# Render processes are not forked: the app starts them from job threads of a
+# multi-threaded server, and a forked child can inherit locks held by them
+PROCESS_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class RenderTask(NamedTuple):
+    filename: str
+    lat: np.ndarray
+    lon: np.ndarray
+    popups: np.ndarray
+    title: str
+    center: list = None
+    radius: np.ndarray = None
+    weight: np.ndarray = None  # per-point heatmap weight
+
+
+def group_tasks(groups, group_vars, label_vars, lat_col: str, lon_col: str, weight_col: str = None):
+    """Lazily turn split_groups() output into one RenderTask per group."""
+    for grp in groups:
+        title = group_title(group_vars, grp.key)
+        popups = build_popups(grp.frame, label_vars, fallback=title)
+        yield RenderTask(
+            grp.filename,
+            grp.frame[lat_col].to_numpy(dtype=float),
+            grp.frame[lon_col].to_numpy(dtype=float),
+            popups.to_numpy(dtype=object),
+            title,
+            grp.center,
+            weight=numeric_weights(grp.frame[weight_col]) if weight_col else None,
+        )
+
+
+def single_task(df, label_vars, lat_col: str, lon_col: str, weight_col: str = None) -> RenderTask:
+    popups = build_popups(df, label_vars, fallback="Location")
+    return RenderTask(
+        "all_locations_map.html",
+        df[lat_col].to_numpy(dtype=float),
+        df[lon_col].to_numpy(dtype=float),
+        popups.to_numpy(dtype=object),
+        "All Locations",
+        weight=numeric_weights(df[weight_col]) if weight_col else None,
+    )
+
+
+def render_task(task: RenderTask) -> str:
+    m = point_map(task.lat, task.lon, task.popups, title=task.title, center=task.center,
+                  radius=task.radius)
+    return m.get_root().render()
+
+
+def render_maps(tasks, mode: str = "serial", workers: int = None, max_in_flight: int = None, cache=None):
+    """Yield ``(filename, html, reused)`` for every task, in the order given.
+
+    ``mode`` is one of RENDER_MODES. With a pool, at most ``max_in_flight``
+    tasks (default: twice the worker count) are submitted but not yet
+    consumed, which bounds the memory held by pending arguments and results.
+    With a RenderCache, unchanged maps are read back instead of rendered;
+    ``reused`` says which. Count those rather than the cache's own hit
+    counter, which every job sharing the cache adds to.
+    """
+    if mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode {mode!r}; expected one of {RENDER_MODES}")
+
+    def lookup(task):
+        if cache is None:
+            return None, None
+        key = task_key(task)
+        return key, cache.get(key)
+
+    def store(key, html):
+        if key is not None:
+            cache.put(key, html)
+        return html
+
+    workers = workers or os.cpu_count() or 1
+    if mode == "serial" or workers == 1:
+        for task in tasks:
+            key, html = lookup(task)
+            if html is not None:
+                yield task.filename, html, True
+            else:
+                yield task.filename, store(key, render_task(task)), False
+        return
+
+    max_in_flight = max(max_in_flight or 2 * workers, 1)
+    if mode == "process":
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(PROCESS_START_METHOD))
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+    pending = deque()
+
+    def finish():
+        filename, key, html, future = pending.popleft()
+        if future is None:
+            return filename, html, True
+        return filename, store(key, future.result()), False
+
+    try:
+        for task in tasks:
+            key, html = lookup(task)
+            future = pool.submit(render_task, task) if html is None else None
+            pending.append((task.filename, key, html, future))
+            if len(pending) >= max_in_flight:
+                yield finish()
+        while pending:
+            yield finish()
+    finally:
+        # Also reached when the consumer stops early (e.g. a Streamlit rerun)
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,206 @@
+"""Per-session store of generated map runs.
+
+Streamlit reruns the whole script on every interaction, so anything
+built inside the "Generate" branch is gone on the next click. A finished
+run (its ZIP, the list of maps and their previews) is kept here instead,
+under a key made of the upload's content hash and every option that
+changes the output. A rerun with the same key shows the stored run and
+only new data or changed options lead to a new key.
+
+ZIPs stay in memory up to a byte budget per session. Beyond that the
+least recently used ones are spilled to a per-session temporary
+directory. Once the disk budget or the run count is exceeded as well,
+the oldest runs are dropped. A preview of another map comes straight
+out of the ZIP when the ZIP holds standalone pages. Otherwise it is
+rendered from a budget-decimated task spilled to disk at generation
+time. Either way each preview is built once and memoized.
+"""
+import io
+import os
+import pickle
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+from typing import NamedTuple
+
+from gpsviz.rendering import render_task
+
+# Compressed ZIP bytes kept in memory per session before spilling to disk
+MEMORY_BYTES = 64 * 1024 ** 2
+
+# Spilled ZIPs and preview tasks kept on disk per session
+DISK_BYTES = 2 * 1024 ** 3
+
+MAX_RUNS = 4
+
+# Pages larger than this are not previewed from the ZIP
+PREVIEW_MAX_BYTES = 20 * 1024 ** 2
+
+# Rendered previews memoized per run
+PREVIEW_CACHE = 8
+
+
+class PreviewTasks:
+    """Append-only spill file of RenderTasks, read back by filename.
+
+    Thread-safe, so sessions sharing one job's result can read it at once.
+    The file is unnamed and disappears with the last reference to it.
+    """
+
+    def __init__(self, directory=None):
+        self.file = tempfile.TemporaryFile(dir=directory)
+        self.offsets = {}
+        self._lock = threading.Lock()
+
+    def add(self, task) -> None:
+        with self._lock:
+            self.offsets[task.filename] = self.file.seek(0, os.SEEK_END)
+            pickle.dump(task, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def get(self, filename: str):
+        with self._lock:
+            self.file.seek(self.offsets[filename])
+            return pickle.load(self.file)
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return self.file.seek(0, os.SEEK_END)
+
+
+class GeneratedMaps(NamedTuple):
+    """What a generation produces; ``StoredRun(key, *generated)`` keeps it for a session."""
+    zip: bytes
+    maps: list  # (filename, title) per map
+    info: dict
+    first_preview: str = None
+    preview_tasks: PreviewTasks = None
+
+
+class StoredRun:
+    """One generation's ZIP, map list and previews.
+
+    ``maps`` is a list of ``(filename, title)`` for the preview switcher.
+    ``preview_tasks`` (a PreviewTasks) is used for the previews when
+    given; otherwise the pages are read from the ZIP.
+    """
+
+    def __init__(self, key, zip_data: bytes, maps, info: dict, first_preview: str = None,
+                 preview_tasks: PreviewTasks = None):
+        self.key = key
+        self.maps = list(maps)
+        self.info = info
+        self.preview_tasks = preview_tasks
+        self._zip = zip_data
+        self._path = None
+        self._previews = OrderedDict()
+        if first_preview is not None and self.maps:
+            self._previews[self.maps[0][0]] = first_preview
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in memory."""
+        return (len(self._zip) if self._zip is not None else 0) + sum(map(len, self._previews.values()))
+
+    @property
+    def disk_bytes(self) -> int:
+        size = os.path.getsize(self._path) if self._path is not None else 0
+        return size + (self.preview_tasks.nbytes if self.preview_tasks is not None else 0)
+
+    def zip_bytes(self) -> bytes:
+        """The ZIP, read back from disk when spilled (usable as a download callable)."""
+        if self._zip is not None:
+            return self._zip
+        with open(self._path, "rb") as f:
+            return f.read()
+
+    def spill(self, directory) -> None:
+        if self._zip is None:
+            return
+        fd, path = tempfile.mkstemp(suffix=".zip", dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(self._zip)
+        self._path, self._zip = path, None
+
+    def preview(self, filename: str):
+        """HTML preview of one map, or None when it is too large to embed."""
+        if filename in self._previews:
+            self._previews.move_to_end(filename)
+            return self._previews[filename]
+        if self.preview_tasks is not None:
+            html = render_task(self.preview_tasks.get(filename))
+        else:
+            source = io.BytesIO(self._zip) if self._zip is not None else self._path
+            with zipfile.ZipFile(source) as zf:
+                if zf.getinfo(filename).file_size > PREVIEW_MAX_BYTES:
+                    return None
+                html = zf.read(filename).decode("utf-8")
+        self._previews[filename] = html
+        while len(self._previews) > PREVIEW_CACHE:
+            self._previews.popitem(last=False)
+        return html
+
+    def close(self) -> None:
+        if self._path is not None:
+            try:
+                os.unlink(self._path)
+            except OSError:
+                pass
+            self._path = None
+        # Preview tasks may be shared with other sessions; dropping the reference frees them
+        self.preview_tasks = None
+        self._zip = None
+        self._previews.clear()
+
+
+class ResultStore:
+    """LRU of StoredRuns for one session, bounded in memory, disk and count."""
+
+    def __init__(self, memory_bytes: int = MEMORY_BYTES, disk_bytes: int = DISK_BYTES,
+                 max_runs: int = MAX_RUNS):
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.max_runs = max_runs
+        # Removed with its contents when the session (and this store) goes away
+        self._dir = tempfile.TemporaryDirectory(prefix="gpsviz-session-")
+        self._runs = OrderedDict()
+
+    def __len__(self):
+        return len(self._runs)
+
+    def get(self, key):
+        run = self._runs.get(key)
+        if run is not None:
+            self._runs.move_to_end(key)
+        return run
+
+    def put(self, run: StoredRun) -> StoredRun:
+        old = self._runs.pop(run.key, None)
+        if old is not None:
+            old.close()
+        self._runs[run.key] = run
+        self._evict()
+        return run
+
+    def _evict(self) -> None:
+        # Always keep the newest run, even when it alone exceeds a budget
+        while len(self._runs) > max(self.max_runs, 1):
+            self._drop_oldest()
+        # Move the least recently used ZIPs out of memory ...
+        for run in list(self._runs.values()):
+            if sum(r.nbytes for r in self._runs.values()) <= self.memory_bytes:
+                break
+            run.spill(self._dir.name)
+        # ... and drop whole runs once the disk is full too
+        while len(self._runs) > 1 and sum(run.disk_bytes for run in self._runs.values()) > self.disk_bytes:
+            self._drop_oldest()
+
+    def _drop_oldest(self) -> None:
+        _, run = self._runs.popitem(last=False)
+        run.close()
+
+    def clear(self) -> None:
+        for run in self._runs.values():
+            run.close()
+        self._runs.clear()
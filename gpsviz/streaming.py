@@ -0,0 +1,168 @@
+"""Chunked map generation for CSV uploads larger than memory.
+
+The CSV is read ``chunksize`` rows at a time. Each chunk is cleaned, its
+popups are built, and its rows are routed to per-group accumulators.
+An accumulator appends its points to a spill file on disk and keeps a
+running centroid and a bounded uniform sample for an approximate median
+center. Maps are then written group by group; large groups stream their
+point batches straight into the ZIP entry, so peak memory follows the
+chunk size rather than the file size.
+"""
+import os
+import pickle
+import tempfile
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from gpsviz.coordinates import parse_coordinates
+from gpsviz.grouping import group_title, map_filenames
+from gpsviz.markers import STREAMED_PAYLOAD, PointLayer, base_map, build_popups, point_map, point_payload
+
+CHUNK_ROWS = 250_000
+
+# Points kept per group for the approximate median center
+SAMPLE_SIZE = 4096
+
+# Groups up to this size are built in memory (and can serve as the preview)
+IN_MEMORY_MAX_POINTS = 50_000
+
+
+class StreamResult(NamedTuple):
+    rows_read: int
+    rows_valid: int
+    maps: int
+    preview_html: str
+
+
+class GroupAccumulator:
+    """One group's points, spilled to disk, with running center estimates."""
+
+    def __init__(self, key: tuple, path: str, rng: np.random.Generator):
+        self.key = key
+        self.path = path
+        self.count = 0
+        self._sums = np.zeros(2)
+        self._sample = np.empty((0, 2))
+        self._priority = np.empty(0)
+        self._rng = rng
+
+    def add(self, lat: np.ndarray, lon: np.ndarray, popups) -> None:
+        with open(self.path, "ab") as f:
+            pickle.dump((lat, lon, popups), f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.count += len(lat)
+        self._sums += (lat.sum(), lon.sum())
+
+        # Bottom-k sampling: the points with the smallest random priorities
+        # form a uniform sample of everything seen so far
+        priority = np.concatenate([self._priority, self._rng.random(len(lat))])
+        sample = np.concatenate([self._sample, np.column_stack([lat, lon])])
+        if len(priority) > SAMPLE_SIZE:
+            keep = np.argpartition(priority, SAMPLE_SIZE)[:SAMPLE_SIZE]
+            priority, sample = priority[keep], sample[keep]
+        self._priority, self._sample = priority, sample
+
+    @property
+    def centroid(self) -> list:
+        return (self._sums / max(self.count, 1)).tolist()
+
+    @property
+    def center(self) -> list:
+        """Median of the sample; exact while the group has at most SAMPLE_SIZE points."""
+        return np.median(self._sample, axis=0).tolist()
+
+    def batches(self):
+        with open(self.path, "rb") as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+
+
+def _write_map(archive, name: str, acc: GroupAccumulator, title: str, fallback: str):
+    """Add one group's map to the archive; returns its HTML if built in memory."""
+    if acc.count <= IN_MEMORY_MAX_POINTS:
+        batches = list(acc.batches())
+        lat = np.concatenate([b[0] for b in batches])
+        lon = np.concatenate([b[1] for b in batches])
+        if batches[0][2] is None:
+            popups = np.full(len(lat), fallback, dtype=object)
+        else:
+            popups = np.concatenate([b[2] for b in batches])
+        html = point_map(lat, lon, popups, title=title, center=acc.center).get_root().render()
+        archive.add(name, html)
+        return html
+
+    m = base_map(acc.center, title)
+    PointLayer(payload=STREAMED_PAYLOAD).add_to(m)
+    head, tail = m.get_root().render().split(STREAMED_PAYLOAD)
+    with archive.open(name) as f:
+        f.write(head.encode("utf-8") + b"[")
+        for i, (lat, lon, popups) in enumerate(acc.batches()):
+            if popups is None:
+                popups = np.full(len(lat), fallback, dtype=object)
+            f.write((b"," if i else b"") + point_payload(lat, lon, popups).encode("utf-8"))
+        f.write(b"]" + tail.encode("utf-8"))
+    return None
+
+
+def stream_maps(source, lat_col: str, lon_col: str, group_vars, label_vars, archive,
+                chunksize: int = CHUNK_ROWS, on_chunk=None, on_group=None) -> StreamResult:
+    """Read a CSV in chunks and write one map per group into ``archive``.
+
+    ``source`` is a path or binary file object. ``on_chunk(rows_read)`` is
+    called after every chunk and ``on_group(done, total)`` after every map.
+    """
+    group_vars, label_vars = list(group_vars), list(label_vars)
+    usecols = list(dict.fromkeys([*group_vars, *label_vars, lat_col, lon_col]))
+    rng = np.random.default_rng(0)
+    groups = {}
+    rows_read = rows_valid = 0
+
+    with tempfile.TemporaryDirectory(prefix="gpsviz-") as spill_dir:
+        for chunk in pd.read_csv(source, dtype=str, usecols=usecols, chunksize=chunksize):
+            rows_read += len(chunk)
+            lat = parse_coordinates(chunk[lat_col], "lat")
+            lon = parse_coordinates(chunk[lon_col], "lon")
+            valid = ~(np.isnan(lat) | np.isnan(lon))
+            chunk, lat, lon = chunk[valid], lat[valid], lon[valid]
+            rows_valid += len(chunk)
+            if on_chunk:
+                on_chunk(rows_read)
+            if chunk.empty:
+                continue
+
+            # Without labels every point of a group shares one fallback popup,
+            # which is filled in when the map is written
+            popups = build_popups(chunk, label_vars).to_numpy(dtype=object) if label_vars else None
+            if group_vars:
+                parts = sorted(chunk.groupby(group_vars, sort=False).indices.items(),
+                               key=lambda part: part[1][0])
+            else:
+                parts = [((), np.arange(len(chunk)))]
+
+            for key, idx in parts:
+                key = key if isinstance(key, tuple) else (key,)
+                acc = groups.get(key)
+                if acc is None:
+                    path = os.path.join(spill_dir, f"{len(groups)}.pkl")
+                    acc = groups[key] = GroupAccumulator(key, path, rng)
+                acc.add(lat[idx], lon[idx], None if popups is None else popups[idx])
+
+        preview_html = None
+        names = map_filenames(groups)
+        for i, acc in enumerate(groups.values()):
+            if group_vars:
+                title = group_title(group_vars, acc.key)
+                name, fallback = names[i], title
+            else:
+                title, name, fallback = "All Locations", "all_locations_map.html", "Location"
+            html = _write_map(archive, name, acc, title, fallback)
+            if preview_html is None:
+                preview_html = html
+            if on_group:
+                on_group(i + 1, len(groups))
+
+    return StreamResult(rows_read, rows_valid, len(groups), preview_html)
@@ -0,0 +1,161 @@
+"""Columnar summary statistics for the non-map branch.
+
+The standard reader keeps every column as text, so numeric columns are
+inferred from their values instead of their dtype. A column is numeric
+when nearly every non-empty value of a sample parses as a number. It is
+then parsed in full (with pyarrow's vectorized string kernels when
+available), and any cell that does not parse counts as missing.
+Categorical columns are inferred from their (few) categories alone.
+
+Rows are numbered by their group key once. count, mean, min and max of
+all numeric columns then come out of one grouped aggregation. Quartiles
+are exact, as the rows are in memory anyway: each column is sorted by
+value once and then stably by group number (an integer sort), so every
+group's values end up contiguous and in order and each quantile is read
+off by position. That is one sort per column instead of one per group
+and column, and outliers cannot skew it the way they skew a
+fixed-range histogram.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from gpsviz.coordinates import SAMPLE_ROWS
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - pyarrow ships with streamlit
+    pa = pc = None
+
+QUANTILES = (0.25, 0.5, 0.75)
+
+# Share of non-empty sampled values that must be numbers
+MIN_NUMERIC_SHARE = 0.9
+
+# Plain decimal numbers, optionally in scientific notation
+_NUMBER = r"^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$"
+
+
+class Summary(NamedTuple):
+    groups: pd.DataFrame  # one row per group_vars combination with its row count, None without groups
+    stats: pd.DataFrame  # one row per group and numeric column
+    numeric: list  # columns found to be numeric
+
+
+def _to_float(values: pd.Series) -> np.ndarray:
+    if pc is None:
+        return pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    text = pa.array(values, type=pa.string(), from_pandas=True)
+    try:
+        return pc.cast(text, pa.float64()).to_numpy(zero_copy_only=False)
+    except pa.ArrowInvalid:
+        # Some cells are not numbers: only the cells that look like one are cast
+        text = pc.utf8_trim_whitespace(text)
+        numbers = pc.if_else(pc.match_substring_regex(text, _NUMBER), text, pa.scalar(None, pa.string()))
+        return pc.cast(numbers, pa.float64()).to_numpy(zero_copy_only=False)
+
+
+def _parse_numbers(values: pd.Series):
+    """Column as float64, or None when sampled values are not all numbers."""
+    if pd.api.types.is_bool_dtype(values):
+        return None
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float, na_value=np.nan)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        numbers = _parse_numbers(pd.Series(values.cat.categories))
+        if numbers is None:
+            return None
+        codes = values.cat.codes.to_numpy()
+        return np.where(codes >= 0, numbers[codes], np.nan)
+    if not (pd.api.types.is_string_dtype(values) or values.dtype == object):
+        return None
+    sample = values.head(SAMPLE_ROWS).dropna().astype(str).str.strip()
+    sample = sample[sample != ""]
+    if sample.empty or np.isnan(_to_float(sample)).mean() > 1 - MIN_NUMERIC_SHARE:
+        return None
+    return _to_float(values)
+
+
+def numeric_columns(frame: pd.DataFrame, columns=None) -> pd.DataFrame:
+    """The numeric columns among ``columns`` (default: all), as float64."""
+    parsed = {}
+    for col in frame.columns if columns is None else columns:
+        numbers = _parse_numbers(frame[col])
+        if numbers is not None:
+            parsed[col] = numbers
+    return pd.DataFrame(parsed, index=frame.index)
+
+
+def group_quantiles(values, codes, groups: int, quantiles=QUANTILES) -> np.ndarray:
+    """Exact per-group quantiles, shape ``(groups, len(quantiles))``.
+
+    ``codes`` numbers each value's group (0 to ``groups - 1``). Quantiles
+    interpolate linearly between the two nearest values, as pandas does.
+    NaN values are ignored and groups without values get NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    values, codes = values[valid], np.asarray(codes)[valid]
+    # By value, then stably by group: each group's values are contiguous and sorted.
+    # Group numbers in 8 or 16 bits get numpy's radix sort
+    order = np.argsort(values)
+    small = codes[order].astype(np.min_scalar_type(max(groups - 1, 0)))
+    order = order[np.argsort(small, kind="stable")]
+    values = values[order]
+    count = np.bincount(codes, minlength=groups)
+    start = np.cumsum(count) - count
+
+    out = np.full((groups, len(quantiles)), np.nan)
+    has = count > 0
+    for j, q in enumerate(quantiles):
+        pos = q * (count[has] - 1)
+        below = np.floor(pos).astype(np.int64)
+        above = np.minimum(below + 1, count[has] - 1)
+        low, high = values[start[has] + below], values[start[has] + above]
+        out[has, j] = low + (high - low) * (pos - below)
+    return out
+
+
+def summarize(frame: pd.DataFrame, group_vars=(), quantiles=QUANTILES) -> Summary:
+    """Row counts per group and count/mean/min/quantiles/max per group and numeric column.
+
+    Rows with a missing group key are left out, as in the per-group maps.
+    """
+    group_vars = list(group_vars)
+    numeric = numeric_columns(frame, [col for col in frame.columns if col not in group_vars])
+    if group_vars:
+        grouped = frame.groupby(group_vars, sort=False, observed=True)
+        groups = grouped.size().reset_index(name="rows")
+        codes = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+        keep = codes >= 0
+        numeric, codes = numeric[keep], codes[keep]
+    else:
+        groups = None
+        codes = np.zeros(len(frame), dtype=np.int64)
+    count = len(groups) if groups is not None else 1
+
+    names = ["count", "mean", "min", *(f"{q:.0%}" for q in quantiles), "max"]
+    if numeric.columns.empty:
+        return Summary(groups, pd.DataFrame(columns=[*group_vars, "column", *names]), [])
+
+    # count, mean, min and max of every column in one grouped aggregation
+    agg = numeric.groupby(codes).agg(["count", "mean", "min", "max"]).reindex(range(count))
+    blocks = []
+    for col in numeric.columns:
+        low, high = agg[(col, "min")].to_numpy(), agg[(col, "max")].to_numpy()
+        block = pd.DataFrame({
+            "column": col,
+            "count": agg[(col, "count")].fillna(0).to_numpy(dtype=np.int64),
+            "mean": agg[(col, "mean")].to_numpy(),
+            "min": low,
+        })
+        qs = group_quantiles(numeric[col].to_numpy(), codes, count, quantiles)
+        for j, name in enumerate(names[3:-1]):
+            block[name] = qs[:, j]
+        block["max"] = high
+        if groups is not None:
+            block = pd.concat([groups[group_vars], block], axis=1)
+        blocks.append(block)
+    return Summary(groups, pd.concat(blocks, ignore_index=True), list(numeric.columns))
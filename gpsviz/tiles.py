@@ -0,0 +1,193 @@
+"""Tiled export for datasets too large for a single self-contained map.
+
+Points are sorted into Web Mercator z/x/y tiles once per zoom level, so
+each tile is a contiguous slice of the sorted index. The pyramid stops
+at the first zoom where every tile fits the per-tile budget (capped at
+MAX_ZOOM); that deepest level keeps every point and the viewer
+over-zooms it. Shallower tiles are thinned to the budget with the grid
+decimation. Tiles are written into the archive
+as ``<map>/tiles/z/x/y.js``: a GeoJSON FeatureCollection wrapped in a
+callback, so the viewer can load them with script tags. Unlike fetch(),
+script tags also work when the extracted ZIP is opened from disk. The
+thin ``<map>/index.html`` viewer requests only the tiles in view, so a
+map opens instantly and its size grows per tile, not per dataset.
+"""
+import json
+from pathlib import PurePosixPath
+
+import numpy as np
+import pandas as pd
+
+from gpsviz.decimate import grid_decimate, marker_radius
+from gpsviz.markers import COORD_DECIMALS, MARKER_STYLE, to_js
+
+MIN_ZOOM = 3
+MAX_ZOOM = 14
+
+# Markers per tile above the deepest zoom
+TILE_BUDGET = 1_000
+
+# Web Mercator is undefined at the poles
+MAX_LATITUDE = 85.05112878
+
+
+def tile_xy(lat, lon, zoom: int):
+    """Web Mercator tile indices of each point at ``zoom``."""
+    n = 1 << zoom
+    lat = np.radians(np.clip(lat, -MAX_LATITUDE, MAX_LATITUDE))
+    x = np.floor((np.asarray(lon) + 180.0) / 360.0 * n)
+    y = np.floor((1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0 * n)
+    return np.clip(x, 0, n - 1).astype(np.int64), np.clip(y, 0, n - 1).astype(np.int64)
+
+
+def _json_strings(values) -> np.ndarray:
+    # JSON-encode each distinct value once
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    encoded = np.array([json.dumps(str(u), ensure_ascii=False) for u in uniques], dtype=object)
+    return encoded[codes]
+
+
+def feature_strings(lat, lon, popups_json, weight=None) -> np.ndarray:
+    """One serialized GeoJSON Point feature per point, built column-wise."""
+    lat = pd.Series(np.round(lat, COORD_DECIMALS)).astype(str)
+    lon = pd.Series(np.round(lon, COORD_DECIMALS)).astype(str)
+    props = '"p":' + pd.Series(popups_json, dtype=object)
+    if weight is not None:
+        weight = pd.Series(weight)
+        radius = pd.Series(np.round(marker_radius(weight.to_numpy()), 1)).astype(str)
+        props = props.where(weight == 1, props + ',"n":' + weight.astype(str) + ',"r":' + radius)
+    features = ('{"type":"Feature","geometry":{"type":"Point","coordinates":[' + lon + ","
+                + lat + ']},"properties":{' + props + "}}")
+    return features.to_numpy(dtype=object)
+
+
+def _tile_keys(lat, lon, z: int):
+    x, y = tile_xy(lat, lon, z)
+    return x, y, x * (1 << z) + y
+
+
+def pyramid_depth(lat, lon, min_zoom: int = MIN_ZOOM, max_zoom: int = MAX_ZOOM,
+                  budget: int = TILE_BUDGET) -> int:
+    """First zoom at which no tile holds more than ``budget`` points."""
+    for z in range(min_zoom, max_zoom):
+        _, _, key = _tile_keys(lat, lon, z)
+        if np.unique(key, return_counts=True)[1].max() <= budget:
+            return z
+    return max_zoom
+
+
+def iter_tiles(lat, lon, popups, min_zoom: int = MIN_ZOOM, max_zoom: int = MAX_ZOOM,
+               budget: int = TILE_BUDGET):
+    """Yield ``(z, x, y, feature_collection_json)`` for every non-empty tile."""
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    popups_json = _json_strings(popups)
+    features = None  # full-detail features, built on first use and shared by all levels
+    for z in range(min_zoom, max_zoom + 1):
+        x, y, key = _tile_keys(lat, lon, z)
+        order = np.argsort(key, kind="stable")
+        bounds = np.flatnonzero(np.diff(key[order])) + 1
+        for idx in np.split(order, bounds):
+            if z < max_zoom and len(idx) > budget:
+                d = grid_decimate(lat[idx], lon[idx], budget)
+                tile = feature_strings(d.lat, d.lon, popups_json[idx][d.rep], d.weight)
+            else:
+                if features is None:
+                    features = feature_strings(lat, lon, popups_json)
+                tile = features[idx]
+            body = '{"type":"FeatureCollection","features":[' + ",".join(tile) + "]}"
+            yield z, int(x[idx[0]]), int(y[idx[0]]), body
+
+
+VIEWER_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.css"/>
+<script src="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.js"></script>
+<style>html, body {{ height: 100%; margin: 0; }} #map {{ position: absolute; top: 40px; bottom: 0; width: 100%; }}</style>
+</head>
+<body>
+<h3 align="center" style="font-size:16px"><b>{title}</b></h3>
+<div id="map"></div>
+<script>
+var meta = {meta};
+var map = L.map("map", {{preferCanvas: true}}).fitBounds(meta.bounds);
+L.tileLayer("https://tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png", {{
+    maxZoom: 19, attribution: "&copy; OpenStreetMap contributors"
+}}).addTo(map);
+
+var callbacks = {{}};
+window.gpsvizTile = function(key, data) {{
+    if (callbacks[key]) callbacks[key](data);
+}};
+
+var PointTiles = L.GridLayer.extend({{
+    createTile: function(coords, done) {{
+        var key = coords.z + "/" + coords.x + "/" + coords.y;
+        var tile = document.createElement("div");
+        var layers = this._points = this._points || {{}};
+        callbacks[key] = function(data) {{
+            layers[key] = L.geoJSON(data, {{
+                pointToLayer: function(f, latlng) {{
+                    var r = f.properties.r ? {{radius: f.properties.r}} : {{}};
+                    return L.circleMarker(latlng, L.extend({{}}, meta.style, r));
+                }},
+                onEachFeature: function(f, layer) {{ layer.bindPopup(f.properties.p); }}
+            }}).addTo(map);
+        }};
+        var script = document.createElement("script");
+        script.src = "tiles/" + key + ".js";
+        // Empty tiles are not written, so a failed load just means "no points"
+        script.onload = script.onerror = function() {{
+            delete callbacks[key];
+            script.remove();
+            done(null, tile);
+        }};
+        document.head.appendChild(script);
+        return tile;
+    }}
+}});
+
+var points = new PointTiles({{minNativeZoom: meta.minZoom, maxNativeZoom: meta.maxZoom}});
+points.on("tileunload", function(e) {{
+    var key = e.coords.z + "/" + e.coords.x + "/" + e.coords.y;
+    if (points._points && points._points[key]) {{
+        map.removeLayer(points._points[key]);
+        delete points._points[key];
+    }}
+}});
+points.addTo(map);
+</script>
+</body>
+</html>
+"""
+
+
+def viewer_html(title: str, bounds, min_zoom: int = MIN_ZOOM, max_zoom: int = MAX_ZOOM) -> str:
+    meta = {"bounds": bounds, "minZoom": min_zoom, "maxZoom": max_zoom, "style": MARKER_STYLE}
+    return VIEWER_TEMPLATE.format(title=title, meta=to_js(meta))
+
+
+def index_name(filename: str) -> str:
+    """``x_map.html`` -> ``x_map/index.html``, the map's viewer in a tiled export."""
+    return f"{PurePosixPath(filename).stem}/index.html"
+
+
+def write_tileset(archive, task, min_zoom: int = MIN_ZOOM, max_zoom: int = MAX_ZOOM,
+                  budget: int = TILE_BUDGET) -> int:
+    """Write one RenderTask as ``<stem>/index.html`` plus its tiles; returns the tile count."""
+    root = PurePosixPath(task.filename).stem
+    max_zoom = max(pyramid_depth(task.lat, task.lon, min_zoom, max_zoom, budget), min_zoom)
+    bounds = [[float(np.min(task.lat)), float(np.min(task.lon))],
+              [float(np.max(task.lat)), float(np.max(task.lon))]]
+    archive.add(index_name(task.filename), viewer_html(task.title, bounds, min_zoom, max_zoom))
+
+    count = 0
+    for z, x, y, body in iter_tiles(task.lat, task.lon, task.popups, min_zoom, max_zoom, budget):
+        key = f"{z}/{x}/{y}"
+        archive.add(f"{root}/tiles/{key}.js", f'gpsvizTile("{key}",{body});')
+        count += 1
+    return count
@@ -0,0 +1,166 @@
+"""Trajectory maps: time-ordered tracks drawn as simplified polylines.
+
+A 1 Hz device log has hundreds of thousands of points that mostly lie on
+straight stretches of the route. Rows are ordered by a timestamp column
+(per group, since split_groups() keeps row order) and each track is
+simplified with Douglas-Peucker under a distance tolerance in metres.
+
+The simplification is vectorized over the open segments instead of
+recursing: every pass measures all interior points of all segments
+against their chords at once, splits each segment at its farthest
+point if that is beyond the tolerance and closes the rest. A pass
+costs one sweep over the points still open, and the number of passes
+is the depth of the split tree (logarithmic for typical tracks).
+Distances are measured on a local equirectangular projection, which is
+accurate to well under a metre over the extent of a track.
+"""
+import numpy as np
+import pandas as pd
+from branca.element import MacroElement
+from jinja2 import Template
+
+from gpsviz.markers import COORD_DECIMALS, base_map, to_js
+from gpsviz.spatial import EARTH_RADIUS_M
+
+# Vertices within this distance (metres) of the simplified line are dropped
+DEFAULT_TOLERANCE_M = 10.0
+
+TRACK_STYLE = {"color": "#2E86AB", "weight": 4, "opacity": 0.8}
+
+# Start and end of each track
+START_COLOR = "#2A9D3F"
+END_COLOR = "#C0392B"
+
+
+def timestamps(values) -> np.ndarray:
+    """Sortable float timestamps; unparseable or missing values become NaN.
+
+    Numbers (e.g. epoch seconds) are used as they are when every present
+    value is numeric, anything else is parsed as a date and time.
+    """
+    values = pd.Series(values)
+    numbers = pd.to_numeric(values, errors="coerce")
+    if numbers.notna().sum() == values.notna().sum():
+        return numbers.to_numpy(dtype=float)
+    parsed = pd.to_datetime(values, errors="coerce")
+    if getattr(parsed.dt, "tz", None) is not None:
+        parsed = parsed.dt.tz_convert(None)
+    times = parsed.to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(float)
+    times[parsed.isna().to_numpy()] = np.nan
+    return times
+
+
+def order_by_time(df: pd.DataFrame, time_col: str) -> pd.DataFrame:
+    """Rows with a parseable ``time_col``, in time order (ties keep file order)."""
+    times = timestamps(df[time_col])
+    valid = np.flatnonzero(~np.isnan(times))
+    return df.iloc[valid[np.argsort(times[valid], kind="stable")]]
+
+
+def _project(lat: np.ndarray, lon: np.ndarray):
+    lat0 = np.radians(np.mean(lat))
+    x = np.radians(lon - lon[0]) * np.cos(lat0) * EARTH_RADIUS_M
+    y = np.radians(lat - lat[0]) * EARTH_RADIUS_M
+    return x, y
+
+
+def _segment_distance(px, py, ax, ay, bx, by) -> np.ndarray:
+    """Distance from each point to its chord; zero-length chords measure to the point."""
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    t = np.clip(((px - ax) * dx + (py - ay) * dy) / np.where(length2 > 0, length2, 1.0), 0.0, 1.0)
+    return np.hypot(px - ax - t * dx, py - ay - t * dy)
+
+
+def simplify_track(lat, lon, tolerance_m: float = DEFAULT_TOLERANCE_M) -> np.ndarray:
+    """Positions of the vertices Douglas-Peucker keeps, ascending.
+
+    The first and last point are always kept. ``tolerance_m <= 0`` keeps
+    every point.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    n = len(lat)
+    if n <= 2 or tolerance_m <= 0:
+        return np.arange(n)
+    x, y = _project(lat, lon)
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, -1]] = True
+
+    # Open segments as (start, end) positions with at least one interior point
+    starts, ends = np.array([0]), np.array([n - 1])
+    while len(starts):
+        interior = ends - starts - 1
+        seg = np.repeat(np.arange(len(starts)), interior)
+        offsets = np.cumsum(interior) - interior
+        idx = np.arange(len(seg)) - offsets[seg] + starts[seg] + 1
+        d = _segment_distance(x[idx], y[idx], x[starts][seg], y[starts][seg], x[ends][seg], y[ends][seg])
+
+        # Farthest interior point of every segment (the first one on ties)
+        seg_max = np.maximum.reduceat(d, offsets)
+        at_max = np.flatnonzero(d == seg_max[seg])
+        farthest = idx[at_max[np.unique(seg[at_max], return_index=True)[1]]]
+
+        split = seg_max > tolerance_m
+        mid = farthest[split]
+        keep[mid] = True
+        starts = np.concatenate([starts[split], mid])
+        ends = np.concatenate([mid, ends[split]])
+        still_open = ends - starts > 1
+        starts, ends = starts[still_open], ends[still_open]
+    return np.flatnonzero(keep)
+
+
+class TrackLayer(MacroElement):
+    """One track as a canvas polyline with start and end markers; the map fits it."""
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function() {
+                var d = {{ this.payload }};
+                var map = {{ this._parent.get_name() }};
+                var opts = {{ this.style }};
+                opts.renderer = L.canvas({padding: 0.5});
+                var points = d.lat.map(function(lat, i) { return [lat, d.lon[i]]; });
+                var layer = L.featureGroup([L.polyline(points, opts)]);
+                [[0, "{{ this.start_color }}"], [points.length - 1, "{{ this.end_color }}"]].forEach(function(end, j) {
+                    var marker = L.circleMarker(points[end[0]], {
+                        radius: 6, color: end[1], fillColor: end[1], fillOpacity: 0.9, renderer: opts.renderer
+                    });
+                    if (d.popups[j]) {
+                        marker.bindPopup(d.popups[j]);
+                    }
+                    marker.addTo(layer);
+                });
+                layer.addTo(map);
+                if (points.length > 1) {
+                    map.fitBounds(layer.getBounds(), {padding: [20, 20]});
+                }
+                return layer;
+            })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, lat, lon, popups=None, style=None):
+        super().__init__()
+        self._name = "TrackLayer"
+        self.payload = to_js({
+            "lat": np.round(np.asarray(lat, dtype=float), COORD_DECIMALS).tolist(),
+            "lon": np.round(np.asarray(lon, dtype=float), COORD_DECIMALS).tolist(),
+            "popups": [str(p) for p in popups] if popups is not None else [],
+        })
+        self.style = to_js(style or TRACK_STYLE)
+        self.start_color = START_COLOR
+        self.end_color = END_COLOR
+
+
+def track_map(lat, lon, popups=None, title=None, center=None, zoom_start: int = 12):
+    """Build a folium map drawing one (already simplified) track.
+
+    ``popups`` holds the start and end point popups.
+    """
+    if center is None:
+        center = [float(np.median(lat)), float(np.median(lon))]
+    m = base_map(center, title, zoom_start)
+    TrackLayer(lat, lon, popups).add_to(m)
+    return m
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from gpsviz.clustering import NOISE, cluster_labels, dbscan
+from gpsviz.spatial import EARTH_RADIUS_M
+
+
+def brute_force_dbscan(lat, lon, eps_m, min_samples):
+    """Textbook DBSCAN on the full haversine distance matrix."""
+    lat_r, lon_r = np.radians(lat), np.radians(lon)
+    a = (np.sin((lat_r[:, None] - lat_r[None, :]) / 2) ** 2
+         + np.cos(lat_r[:, None]) * np.cos(lat_r[None, :]) * np.sin((lon_r[:, None] - lon_r[None, :]) / 2) ** 2)
+    near = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1))) <= eps_m
+    core = near.sum(axis=1) >= min_samples
+    labels = np.full(len(lat), NOISE)
+    cluster = 0
+    for seed in np.flatnonzero(core):
+        if labels[seed] != NOISE:
+            continue
+        labels[seed] = cluster
+        stack = [seed]
+        while stack:
+            point = stack.pop()
+            for other in np.flatnonzero(near[point] & core & (labels == NOISE)):
+                labels[other] = cluster
+                stack.append(other)
+        cluster += 1
+    # Border points take the cluster of the first core point in reach
+    for point in np.flatnonzero(~core & (near & core[None, :]).any(axis=1)):
+        labels[point] = labels[np.flatnonzero(near[point] & core)[0]]
+    return labels, core, near
+
+
+def blobs(n_blobs=6, per_blob=400, noise=300, spread_m=300.0, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform([19.0, 72.8], [19.1, 72.9], (n_blobs, 2))
+    deg = spread_m / 111_320.0
+    lat = np.concatenate([rng.normal(c[0], deg, per_blob) for c in centers] + [rng.uniform(19.0, 19.1, noise)])
+    lon = np.concatenate([rng.normal(c[1], deg, per_blob) for c in centers] + [rng.uniform(72.8, 72.9, noise)])
+    return lat, lon
+
+
+@pytest.mark.parametrize("eps_m, min_samples, seed", [(200.0, 80, 0), (200.0, 80, 1), (120.0, 10, 2), (300.0, 5, 3)])
+def test_matches_brute_force(eps_m, min_samples, seed):
+    lat, lon = blobs(seed=seed)
+    labels = dbscan(lat, lon, eps_m, min_samples)
+    expected, core, near = brute_force_dbscan(lat, lon, eps_m, min_samples)
+
+    # Same core points, partitioned into the same clusters
+    assert ((labels != NOISE) & core).sum() == core.sum()
+    pairs = {(a, b) for a, b in zip(labels[core], expected[core])}
+    assert len(pairs) == len(set(labels[core])) == len(set(expected[core]))
+    # Border points join a cluster exactly when a core point is in reach,
+    # and it is the cluster of one of those core points
+    border = ~core
+    reachable = (near & core[None, :]).any(axis=1)
+    np.testing.assert_array_equal(labels[border] != NOISE, reachable[border])
+    for point in np.flatnonzero(border & reachable):
+        assert labels[point] in set(labels[near[point] & core])
+
+
+def test_border_point_reaching_only_an_inner_core_point():
+    # A dense cell whose corners (its representatives) are all out of the
+    # border point's reach; only a core point inside the cell is within eps
+    eps_m, min_samples = 200.0, 80
+    side = eps_m / np.sqrt(2.0)
+    rng = np.random.default_rng(0)
+    xy = [(0.01, 0.01), (0.01, side - 0.01), (side - 0.01, 0.01), (side - 0.01, side - 0.01)]
+    xy += [(rng.uniform(0.8, 0.99) * side, rng.uniform(0.01, 0.99) * side) for _ in range(100)]
+    xy += [(0.03 * side, side / 2), (-188.0, side / 2)]
+    # Puts the grid's cell boundaries on the dense cell's edges
+    xy += [(-3 * side, -2 * side)]
+    xy = np.array(xy)
+    lat, lon = np.degrees(xy[:, 1] / EARTH_RADIUS_M), np.degrees(xy[:, 0] / EARTH_RADIUS_M)
+    labels = dbscan(lat, lon, eps_m, min_samples)
+    expected, core, near = brute_force_dbscan(lat, lon, eps_m, min_samples)
+    assert not core[-2] and near[-2, -3]
+    assert labels[-2] == labels[-3] == 0
+    np.testing.assert_array_equal(labels == NOISE, expected == NOISE)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_cluster_across_antimeridian(seed):
+    rng = np.random.default_rng(seed)
+    lat = np.concatenate([rng.normal(rng.uniform(-60, 60), 0.002, 300), rng.uniform(-60, 60, 50)])
+    lon = np.concatenate([rng.normal(180.0, 0.003, 300), rng.uniform(-180, 180, 50)])
+    lon = np.where(lon > 180, lon - 360, lon)
+    labels = dbscan(lat, lon, 100.0, 5)
+    expected, core, near = brute_force_dbscan(lat, lon, 100.0, 5)
+    np.testing.assert_array_equal(labels == NOISE, expected == NOISE)
+    assert len({(a, b) for a, b in zip(labels[core], expected[core])}) == len(set(expected[core]))
+    # The largest cluster has points on both sides of the seam
+    assert (lon[labels == 0] > 0).any() and (lon[labels == 0] < 0).any()
+
+
+def test_cluster_numbering_and_names():
+    lat, lon = blobs(n_blobs=3, per_blob=100, noise=0)
+    labels = dbscan(lat, lon, 150.0, 5)
+    sizes = np.bincount(labels[labels != NOISE])
+    assert list(sizes) == sorted(sizes, reverse=True)
+    names = cluster_labels(np.array([1, 0, NOISE]))
+    assert list(names) == ["2", "1", "noise"]
+
+
+def test_empty_and_all_noise():
+    assert len(dbscan([], [])) == 0
+    lat = np.array([19.0, 19.5, 20.0])
+    assert (dbscan(lat, np.array([72.0, 72.5, 73.0]), 100.0, 2) == NOISE).all()
@@ -0,0 +1,50 @@
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gpsviz.columnar import DATASET_NAME, MAP_FILE_COL
+from gpsviz.ingest import content_key, input_kind
+from gpsviz.packaging import MapArchive
+from gpsviz.pipeline import MapOptions, build_maps
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "village": rng.choice(["A", "B", "C d"], 60),
+        "latitude": rng.uniform(10, 11, 60),
+        "longitude": rng.uniform(70, 71, 60),
+    })
+
+
+@pytest.mark.parametrize("map_type, export_format", [
+    ("points", "html"), ("points", "bundle"), ("points", "tiles"), ("heatmap", "bundle"),
+])
+@pytest.mark.parametrize("group_vars", [(), ("village",)])
+def test_dataset_map_files_are_archive_entries(frame, map_type, export_format, group_vars):
+    options = MapOptions(group_vars=group_vars, map_type=map_type, export_format=export_format,
+                         export_dataset=True)
+    archive = MapArchive()
+    build_maps(frame, "latitude", "longitude", options, archive)
+    zf = zipfile.ZipFile(io.BytesIO(archive.getvalue()))
+    dataset = pd.read_parquet(io.BytesIO(zf.read(DATASET_NAME)))
+    assert len(dataset) == len(frame)
+    assert set(dataset[MAP_FILE_COL]) <= set(zf.namelist())
+    assert dataset[MAP_FILE_COL].nunique() == (3 if group_vars else 1)
+
+
+@pytest.mark.parametrize("name, kind", [
+    ("d.csv", "csv"), ("d.xlsx", "xlsx"), ("d.parquet", "parquet"), ("D.PARQUET", "parquet"),
+    ("d.feather", "feather"), ("d.arrow", "feather"),
+])
+def test_input_kind(name, kind):
+    assert input_kind(name) == kind
+
+
+def test_content_key_tells_formats_apart():
+    assert content_key(b"data", "d.parquet", {}) != content_key(b"data", "d.csv", {})
+    assert content_key(b"data", "a.csv", {}) == content_key(b"data", "b.csv", {})
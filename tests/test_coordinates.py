@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from gpsviz.coordinates import detect_coordinate_columns, name_score, parse_coordinates
+
+
+@pytest.mark.parametrize("text, kind, expected", [
+    ("12°34'56.7\"N", "lat", 12 + 34 / 60 + 56.7 / 3600),
+    ("N 12 34.5", "lat", 12 + 34.5 / 60),
+    ("-12:34:56", "lat", -(12 + 34 / 60 + 56 / 3600)),
+    ("12d34m56s", "lat", 12 + 34 / 60 + 56 / 3600),
+    ("12°34.5'", "lat", 12 + 34.5 / 60),
+    ("S 12°30'", "lat", -12.5),
+    ("12 34 56 S", "lat", -(12 + 34 / 60 + 56 / 3600)),
+    ("72°52'E", "lon", 72 + 52 / 60),
+    ("W 72 52", "lon", -(72 + 52 / 60)),
+])
+def test_dms(text, kind, expected):
+    assert parse_coordinates([text], kind)[0] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("text, expected", [("12,345", 12.345), ("-72,5", -72.5), (" 1,25 ", 1.25)])
+def test_comma_decimal(text, expected):
+    assert parse_coordinates([text], "lon")[0] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("text, kind", [
+    ("12.34.56", "lat"),  # no separators between groups
+    ("1.234,5", "lat"),
+    ("12°3456", "lat"),
+    ("12°75'", "lat"),  # minutes out of range
+    ("12°30'75\"", "lat"),  # seconds out of range
+    ("12°30'E", "lat"),  # longitude hemisphere on a latitude
+    ("N 12 30 S", "lat"),
+    ("95.5", "lat"),
+    ("abc", "lon"),
+    ("", "lon"),
+])
+def test_malformed(text, kind):
+    assert np.isnan(parse_coordinates([text], kind)[0])
+
+
+def test_plain_numbers_and_missing():
+    out = parse_coordinates(pd.Series(["19.07", 72.88, None, "-0.5"]), "lon")
+    np.testing.assert_allclose(out, [19.07, 72.88, np.nan, -0.5])
+
+
+def test_name_score_whole_tokens():
+    assert name_score("gps_lat", "lat") > 0
+    assert name_score("lngDeg", "lon") > 0
+    assert name_score("population", "lat") == 0
+    assert name_score("calculation", "lat") == 0
+
+
+@pytest.mark.parametrize("name, kind", [
+    ("GPSLatitude", "lat"), ("GPSLongitude", "lon"), ("EXIFGPSLat", "lat"), ("gpsLng", "lon"),
+])
+def test_name_score_acronym_prefix(name, kind):
+    assert name_score(name, kind) > 0
+
+
+def test_detect_acronym_columns():
+    frame = pd.DataFrame({"GPSLatitude": [19.07, 19.08], "GPSLongitude": [72.88, 72.89]})
+    assert detect_coordinate_columns(frame) == ("GPSLatitude", "GPSLongitude")
+
+
+def test_detect_columns():
+    frame = pd.DataFrame({
+        "village": ["a", "b", "c"],
+        "Latitude": ["19.07", "19.08", "19.09"],
+        "Longitude": ["72.88", "72.89", "72.90"],
+    })
+    assert detect_coordinate_columns(frame) == ("Latitude", "Longitude")
@@ -0,0 +1,90 @@
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gpsviz.columnar import MAP_FILE_COL, annotated_frame
+from gpsviz.grouping import map_filenames, safe_name, split_groups
+from gpsviz.packaging import MapArchive
+from gpsviz.pipeline import MapOptions, build_maps
+from gpsviz.streaming import stream_maps
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "village": ["A", "B", "A", None, "B", "A"],
+        "block": ["x", "x", "y", "x", "x", "x"],
+        "latitude": [10.0, 20.0, 11.0, 0.0, 21.0, 12.0],
+        "longitude": [70.0, 80.0, 71.0, 0.0, 81.0, 72.0],
+    })
+
+
+def test_split_groups_order_and_rows(frame):
+    groups = split_groups(frame, ["village"], "latitude", "longitude")
+    assert [grp.key for grp in groups] == [("A",), ("B",)]
+    # Rows keep their original order; the missing key is dropped
+    assert groups[0].frame.index.tolist() == [0, 2, 5]
+    assert groups[1].frame.index.tolist() == [1, 4]
+    assert groups[0].center == [11.0, 71.0]
+    assert [grp.filename for grp in groups] == ["A_map.html", "B_map.html"]
+
+
+def test_split_groups_composite_key(frame):
+    groups = split_groups(frame, ["village", "block"], "latitude", "longitude")
+    assert [grp.key for grp in groups] == [("A", "x"), ("B", "x"), ("A", "y")]
+    assert [len(grp.frame) for grp in groups] == [2, 2, 1]
+    assert sum(len(grp.frame) for grp in groups) == frame["village"].notna().sum()
+
+
+def test_split_groups_empty(frame):
+    assert split_groups(frame.iloc[:0], ["village"], "latitude", "longitude") == []
+    assert split_groups(frame.iloc[[3]], ["village"], "latitude", "longitude") == []
+
+
+def test_map_filenames_unique():
+    keys = [("x_y", "z"), ("x", "y_z"), ("A",), ("a",), ("a b",), ("plain",)]
+    assert safe_name(keys[0]) == safe_name(keys[1])
+    names = map_filenames(keys)
+    assert len({name.lower() for name in names}) == len(keys)
+    assert names[-1] == "plain_map.html"
+    # The same key keeps its name whatever else is in the run
+    assert map_filenames(list(reversed(keys)))[::-1] == names
+
+
+@pytest.fixture
+def colliding():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "a": ["x_y"] * 5 + ["x"] * 5,
+        "b": ["z"] * 5 + ["y_z"] * 5,
+        "latitude": rng.uniform(10, 11, 10),
+        "longitude": rng.uniform(70, 71, 10),
+    })
+
+
+@pytest.mark.parametrize("export_format", ["html", "bundle", "tiles"])
+def test_colliding_keys_get_separate_files(colliding, export_format):
+    options = MapOptions(group_vars=("a", "b"), export_format=export_format, export_dataset=True)
+    archive = MapArchive()
+    result = build_maps(colliding, "latitude", "longitude", options, archive)
+    assert result.maps == 2
+    names = zipfile.ZipFile(io.BytesIO(archive.getvalue())).namelist()
+    assert len(names) == len(set(names))
+
+
+def test_annotated_frame_uses_group_files(colliding):
+    groups = split_groups(colliding, ["a", "b"], "latitude", "longitude")
+    files = annotated_frame(colliding, "latitude", "longitude", ["a", "b"], groups)[MAP_FILE_COL]
+    assert files.nunique() == 2
+    assert files.tolist() == [groups[0].filename] * 5 + [groups[1].filename] * 5
+
+
+def test_streaming_colliding_keys(colliding):
+    archive = MapArchive()
+    stream_maps(io.BytesIO(colliding.to_csv(index=False).encode()), "latitude", "longitude",
+                ["a", "b"], [], archive)
+    names = zipfile.ZipFile(io.BytesIO(archive.getvalue())).namelist()
+    assert len(names) == 2 and len(set(names)) == 2
@@ -0,0 +1,47 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gpsviz.ingest import clean_frame, load_dataset, read_typed
+
+CSV = b"""site,block,latitude,longitude
+007,x,19.07,72.88
+7,y,19.08,72.89
+01,x,bad,72.90
+1,,19.10,72.91
+010,y,19.11,72.92
+10,x,19.12,72.93
+"""
+
+
+def _excel(data: bytes) -> bytes:
+    buffer = io.BytesIO()
+    pd.read_csv(io.BytesIO(data), dtype=str).to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("name", ["d.csv", "d.xlsx"])
+def test_typed_reader_keeps_ids_as_text(name):
+    data = _excel(CSV) if name.endswith("xlsx") else CSV
+    frame = read_typed(data, name, "latitude", "longitude", ["site", "block"])
+    assert frame["site"].tolist() == ["007", "7", "01", "1", "010", "10"]
+    # Unique IDs stay plain text, repeated labels become categoricals
+    assert pd.api.types.is_string_dtype(frame["site"])
+    assert isinstance(frame["block"].dtype, pd.CategoricalDtype)
+    assert frame["block"].isna().tolist() == [False, False, False, True, False, False]
+    assert frame["latitude"].dtype == np.float64 and np.isnan(frame["latitude"][2])
+
+
+def test_typed_reader_all_columns():
+    frame = read_typed(CSV, "d.csv", "latitude", "longitude")
+    assert list(frame.columns) == ["site", "block", "latitude", "longitude"]
+    assert frame["site"].nunique() == 6
+
+
+def test_typed_groups_match_standard_reader():
+    typed = clean_frame(load_dataset(CSV, "d.csv", typed=True, columns=("site",)))
+    standard = clean_frame(load_dataset(CSV, "d.csv"))
+    assert typed["site"].astype(str).tolist() == standard["site"].tolist() == ["007", "7", "1", "010", "10"]
+    np.testing.assert_allclose(typed["latitude"], standard["latitude"])
@@ -0,0 +1,52 @@
+import threading
+
+from gpsviz.instrumentation import RunTrace, current_rss
+
+
+def test_stage_reports_rss_change_not_high_water_mark():
+    with RunTrace() as trace:
+        with trace.stage("grow"):
+            block = bytearray(64 * 1024 * 1024)
+            block[::4096] = b"x" * len(block[::4096])
+        del block
+        with trace.stage("idle"):
+            pass
+    grow, idle = trace.stages
+    if current_rss() is None:
+        assert grow.rss_change is None
+        return
+    assert grow.rss_change > 32e6
+    # A lifetime peak would still show the 64 MB here
+    assert abs(idle.rss_change) < 16e6
+    assert "RSS change MB" in trace.summary()[0]
+
+
+def test_traced_peak_of_a_lone_run():
+    with RunTrace(trace_memory=True) as trace:
+        with trace.stage("alloc"):
+            data = [object() for _ in range(100_000)]
+        del data
+    assert trace.stages[0].peak_traced > 1e6
+
+
+def test_overlapping_memory_traces_report_no_peak():
+    inside, release = threading.Event(), threading.Event()
+
+    def other():
+        with RunTrace(trace_memory=True):
+            inside.set()
+            release.wait(5)
+
+    with RunTrace(trace_memory=True) as trace:
+        with trace.stage("overlapped"):
+            thread = threading.Thread(target=other)
+            thread.start()
+            inside.wait(5)
+            release.set()
+            thread.join()
+        with trace.stage("alone"):
+            data = [object() for _ in range(10_000)]
+        del data
+    overlapped, alone = trace.stages
+    assert overlapped.peak_traced is None
+    assert alone.peak_traced is not None
@@ -0,0 +1,85 @@
+import threading
+
+from gpsviz.jobs import DONE, FAILED, JobQueue
+
+
+def _wait(job, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        if job.finished:
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError(f"job {job.key!r} did not finish")
+
+
+def test_identical_submissions_share_one_job():
+    queue = JobQueue(workers=1)
+    release = threading.Event()
+    calls = []
+
+    def work(job, value):
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    first = queue.submit("key", work, 21)
+    second = queue.submit("key", work, 21)
+    release.set()
+    assert second is first
+    assert _wait(first).state == DONE and first.result == 42
+    # Still deduplicated once finished
+    assert queue.submit("key", work, 21) is first
+    assert calls == [21]
+    queue.shutdown()
+
+
+def test_different_keys_run_separately():
+    queue = JobQueue(workers=2)
+    a = queue.submit("a", lambda job: "a")
+    b = queue.submit("b", lambda job: "b")
+    assert a is not b
+    assert _wait(a).result == "a" and _wait(b).result == "b"
+    queue.shutdown()
+
+
+def test_failed_job_is_replaced():
+    queue = JobQueue(workers=1)
+
+    def fail(job):
+        raise ValueError("bad input")
+
+    failed = _wait(queue.submit("key", fail))
+    assert failed.state == FAILED and failed.error == "ValueError: bad input"
+    assert failed.finished_at is not None
+    retry = _wait(queue.submit("key", lambda job: "ok"))
+    assert retry is not failed and retry.result == "ok"
+    queue.shutdown()
+
+
+def test_finished_jobs_are_pruned():
+    queue = JobQueue(workers=1, max_finished=2)
+    jobs = [_wait(queue.submit(i, lambda job: None)) for i in range(4)]
+    assert queue.get(0) is None and queue.get(1) is None
+    assert queue.get(2) is jobs[2] and queue.get(3) is jobs[3]
+    queue.shutdown()
+
+
+def test_result_is_dropped_once_every_owner_took_it():
+    queue = JobQueue(workers=1)
+    release = threading.Event()
+
+    def work(job):
+        release.wait(5)
+        return b"zip"
+
+    job = queue.submit("key", work, owner="a")
+    assert queue.submit("key", work, owner="b") is job
+    release.set()
+    _wait(job)
+    assert queue.take(job, "a") == b"zip"
+    assert queue.get("key") is job and job.result == b"zip"
+    assert queue.take(job, "b") == b"zip"
+    assert queue.get("key") is None and job.result is None
+    # A new submission runs again instead of finding an emptied job
+    again = _wait(queue.submit("key", work, owner="a"))
+    assert again is not job and again.result == b"zip"
+    queue.shutdown()
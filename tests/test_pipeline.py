@@ -0,0 +1,60 @@
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gpsviz.pipeline import main, output_names
+
+
+def _frame(village, rows=20, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "village": [village] * rows,
+        "latitude": rng.uniform(19.0, 19.1, rows).round(5),
+        "longitude": rng.uniform(72.8, 72.9, rows).round(5),
+    })
+
+
+def test_output_names_unique():
+    names = output_names(["a/d.csv", "a/d.xlsx", "b/d.csv", "a/e.csv", "a/D.parquet"])
+    assert names == ["d_csv_maps.zip", "d_xlsx_maps.zip", "d_csv_2_maps.zip", "e_maps.zip", "D_parquet_maps.zip"]
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_cli_same_stem_inputs_get_separate_zips(tmp_path, capsys, workers):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    _frame("csv").to_csv(tmp_path / "a" / "d.csv", index=False)
+    _frame("xlsx").to_excel(tmp_path / "a" / "d.xlsx", index=False)
+    _frame("other dir").to_csv(tmp_path / "b" / "d.csv", index=False)
+    out = tmp_path / "out"
+
+    status = main([str(tmp_path / "a"), str(tmp_path / "b"), str(out), "--group", "village",
+                   "--workers", workers, "--no-cache"])
+    assert status == 0
+    zips = sorted(path.name for path in out.iterdir())
+    assert zips == ["d_csv_2_maps.zip", "d_csv_maps.zip", "d_xlsx_maps.zip"]
+    maps = {name: zipfile.ZipFile(out / name).namelist() for name in zips}
+    assert maps == {
+        "d_csv_maps.zip": ["csv_map.html"],
+        "d_xlsx_maps.zip": ["xlsx_map.html"],
+        "d_csv_2_maps.zip": ["other_dir_map.html"],
+    }
+    assert "failed" not in capsys.readouterr().out
+
+
+def test_cli_csv_with_columnar_copies(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    frame = _frame("A")
+    frame.to_csv(data / "d.csv", index=False)
+    frame.to_parquet(data / "d.parquet", index=False)
+    frame.to_feather(data / "d.feather")
+    out = tmp_path / "out"
+
+    assert main([str(data), str(out), "--workers", "2", "--no-cache", "--export-dataset"]) == 0
+    zips = sorted(path.name for path in out.iterdir())
+    assert zips == ["d_csv_maps.zip", "d_feather_maps.zip", "d_parquet_maps.zip"]
+    for name in zips:
+        assert "all_locations_map.html" in zipfile.ZipFile(out / name).namelist()
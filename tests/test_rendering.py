@@ -0,0 +1,47 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from gpsviz.grouping import split_groups
+from gpsviz.render_cache import RenderCache
+from gpsviz.rendering import group_tasks, render_maps
+
+
+def _tasks():
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        "village": rng.choice(["A", "B", "C"], 90),
+        "latitude": rng.uniform(19.0, 19.1, 90),
+        "longitude": rng.uniform(72.8, 72.9, 90),
+    })
+    return list(group_tasks(split_groups(frame, ["village"], "latitude", "longitude"),
+                            ["village"], ["village"], "latitude", "longitude"))
+
+
+def _names(pages):
+    return [name for name, _, _ in pages]
+
+
+def test_process_pool_from_a_worker_thread():
+    # As in the app, where JobQueue threads start the render processes
+    tasks = _tasks()
+    serial = list(render_maps(tasks))
+    pooled = []
+    thread = threading.Thread(target=lambda: pooled.extend(render_maps(tasks, mode="process", workers=2)))
+    thread.start()
+    thread.join(120)
+    assert not thread.is_alive()
+    assert _names(pooled) == _names(serial) == [task.filename for task in tasks]
+    assert all(len(html) > 1000 for _, html, _ in pooled)
+
+
+def test_reuse_is_flagged_per_call(tmp_path):
+    tasks = _tasks()
+    cache = RenderCache(tmp_path)
+    assert [reused for _, _, reused in render_maps(tasks, cache=cache)] == [False] * len(tasks)
+    # Hits by another job on the same cache don't leak into this call's flags
+    list(render_maps(tasks, cache=cache))
+    again = list(render_maps(tasks[:1], mode="thread", workers=2, cache=cache))
+    assert [reused for _, _, reused in again] == [True]
+    assert cache.hits == len(tasks) + 1
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from gpsviz.spatial import SpatialIndex, haversine_m
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(0)
+    # A dense town, a sparse region and a few points either side of the antimeridian
+    lat = np.concatenate([rng.normal(19.07, 0.01, 3000), rng.uniform(10, 30, 1000), rng.uniform(-5, 5, 50)])
+    lon = np.concatenate([rng.normal(72.88, 0.01, 3000), rng.uniform(60, 90, 1000),
+                          rng.choice([-1, 1], 50) * rng.uniform(179.5, 180, 50)])
+    return lat, lon, SpatialIndex(lat, lon)
+
+
+QUERIES = [(19.07, 72.88), (19.1, 72.9), (25.0, 80.0), (0.0, 179.9), (0.0, -179.95), (-60.0, 0.0)]
+
+
+@pytest.mark.parametrize("lat0, lon0", QUERIES)
+@pytest.mark.parametrize("radius_m", [50.0, 1_000.0, 200_000.0])
+def test_radius_matches_brute_force(points, lat0, lon0, radius_m):
+    lat, lon, index = points
+    dist = haversine_m(lat0, lon0, lat, lon)
+    found = index.radius(lat0, lon0, radius_m)
+    assert sorted(found.index) == sorted(np.flatnonzero(dist <= radius_m))
+    np.testing.assert_allclose(found.distance, dist[found.index])
+    assert (np.diff(found.distance) >= 0).all()
+
+
+@pytest.mark.parametrize("lat0, lon0", QUERIES)
+@pytest.mark.parametrize("k", [1, 10, 500])
+def test_knn_matches_brute_force(points, lat0, lon0, k):
+    lat, lon, index = points
+    dist = haversine_m(lat0, lon0, lat, lon)
+    found = index.knn(lat0, lon0, k)
+    assert len(found.index) == k
+    np.testing.assert_allclose(found.distance, np.sort(dist)[:k])
+    np.testing.assert_allclose(dist[found.index], found.distance)
+
+
+@pytest.mark.parametrize("box", [
+    (19.06, 72.87, 19.08, 72.89), (10, 60, 30, 90), (-5, 179.8, 5, -179.8), (40, 0, 50, 10),
+])
+def test_bbox_matches_brute_force(points, box):
+    lat, lon, index = points
+    south, west, north, east = box
+    inside_lon = (lon >= west) & (lon <= east) if west <= east else (lon >= west) | (lon <= east)
+    expected = np.flatnonzero((lat >= south) & (lat <= north) & inside_lon)
+    assert sorted(index.bbox(*box)) == sorted(expected)
+
+
+def test_empty_index():
+    index = SpatialIndex([], [])
+    assert len(index.bbox(-90, -180, 90, 180)) == 0
+    assert len(index.knn(0.0, 0.0, 3).index) == 0
+    assert len(index.radius(0.0, 0.0, 1e6).index) == 0
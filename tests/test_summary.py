@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from gpsviz.summary import QUANTILES, group_quantiles, summarize
+
+
+def test_group_quantiles_match_numpy():
+    rng = np.random.default_rng(0)
+    codes = rng.integers(0, 50, 20_000)
+    values = rng.lognormal(size=len(codes))
+    out = group_quantiles(values, codes, 50)
+    for group in range(50):
+        np.testing.assert_allclose(out[group], np.quantile(values[codes == group], QUANTILES))
+
+
+def test_outlier_does_not_skew_quartiles():
+    values = np.append(np.arange(1.0, 51.0), 1e7)
+    out = group_quantiles(values, np.zeros(len(values), dtype=np.int64), 1)
+    np.testing.assert_allclose(out[0], np.quantile(values, QUANTILES))
+    assert out[0, 2] < 40
+
+
+def test_missing_values_and_empty_groups():
+    values = np.array([1.0, np.nan, 3.0, 5.0, np.nan])
+    codes = np.array([0, 0, 0, 2, 1])
+    out = group_quantiles(values, codes, 4)
+    np.testing.assert_allclose(out[0], [1.5, 2.0, 2.5])
+    np.testing.assert_allclose(out[2], [5.0, 5.0, 5.0])
+    assert np.isnan(out[[1, 3]]).all()
+
+
+def test_many_groups():
+    # Group numbers too large for the 16-bit radix sort
+    codes = np.arange(70_000).repeat(3)
+    values = np.tile([3.0, 1.0, 2.0], 70_000)
+    np.testing.assert_allclose(group_quantiles(values, codes, 70_000), np.tile([1.5, 2.0, 2.5], (70_000, 1)))
+
+
+def test_summarize_matches_pandas_describe():
+    rng = np.random.default_rng(1)
+    frame = pd.DataFrame({
+        "village": rng.choice(["A", "B", "C"], 500),
+        "population": rng.integers(0, 1000, 500).astype(str),
+        "name": rng.choice(["x", "y"], 500),
+    })
+    frame.loc[3, "population"] = "n/a"
+    summary = summarize(frame, ["village"])
+    assert summary.numeric == ["population"]
+    exact = pd.to_numeric(frame["population"], errors="coerce").groupby(frame["village"]).describe()
+    stats = summary.stats.set_index("village").loc[exact.index]
+    for col in ("count", "mean", "min", "25%", "50%", "75%", "max"):
+        np.testing.assert_allclose(stats[col].to_numpy(dtype=float), exact[col].to_numpy(dtype=float))
+    assert summary.groups["rows"].sum() == len(frame)
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from gpsviz.trajectory import _project, _segment_distance, order_by_time, simplify_track, timestamps
+
+
+def reference_douglas_peucker(lat, lon, tolerance_m):
+    """Recursive Douglas-Peucker on the same projection."""
+    x, y = _project(np.asarray(lat, dtype=float), np.asarray(lon, dtype=float))
+    keep = {0, len(x) - 1}
+
+    def split(start, end):
+        if end - start < 2:
+            return
+        idx = np.arange(start + 1, end)
+        d = _segment_distance(x[idx], y[idx], x[start], y[start], x[end], y[end])
+        far = int(np.argmax(d))
+        if d[far] > tolerance_m:
+            keep.add(start + 1 + far)
+            split(start, start + 1 + far)
+            split(start + 1 + far, end)
+
+    split(0, len(x) - 1)
+    return np.array(sorted(keep))
+
+
+def track(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    heading = np.cumsum(rng.normal(0.0, 0.05, rows))
+    lat = 19.07 + np.cumsum(np.cos(heading)) * 8 / 111_320 + rng.normal(0, 3 / 111_320, rows)
+    lon = 72.88 + np.cumsum(np.sin(heading)) * 8 / 111_320 + rng.normal(0, 3 / 111_320, rows)
+    return lat, lon
+
+
+@pytest.mark.parametrize("tolerance", [1.0, 5.0, 25.0])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_matches_recursive_reference(tolerance, seed):
+    lat, lon = track(3_000, seed)
+    np.testing.assert_array_equal(simplify_track(lat, lon, tolerance),
+                                  reference_douglas_peucker(lat, lon, tolerance))
+
+
+def test_endpoints_kept_and_straight_line_collapses():
+    lat = np.linspace(19.0, 19.1, 500)
+    lon = np.linspace(72.0, 72.1, 500)
+    np.testing.assert_array_equal(simplify_track(lat, lon, 1.0), [0, 499])
+
+
+def test_zero_tolerance_and_short_tracks_keep_every_point():
+    lat, lon = track(100)
+    np.testing.assert_array_equal(simplify_track(lat, lon, 0), np.arange(100))
+    np.testing.assert_array_equal(simplify_track(lat[:2], lon[:2], 10.0), [0, 1])
+    assert len(simplify_track([], [], 10.0)) == 0
+
+
+def test_closed_loop():
+    # Start and end coincide, so every chord starts as a zero-length one
+    angle = np.linspace(0, 2 * np.pi, 200)
+    lat, lon = 19.0 + 0.01 * np.sin(angle), 72.0 + 0.01 * np.cos(angle)
+    keep = simplify_track(lat, lon, 5.0)
+    assert keep[0] == 0 and keep[-1] == 199 and 4 < len(keep) < 200
+    np.testing.assert_array_equal(keep, reference_douglas_peucker(lat, lon, 5.0))
+
+
+def test_order_by_time():
+    frame = pd.DataFrame({"t": ["2024-01-01 00:00:03", "bad", "2024-01-01 00:00:01", "2024-01-01 00:00:03"],
+                          "v": [0, 1, 2, 3]})
+    assert order_by_time(frame, "t")["v"].tolist() == [2, 0, 3]
+    np.testing.assert_array_equal(timestamps(["5", "1.5", None]), [5.0, 1.5, np.nan])